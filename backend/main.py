@@ -22,6 +22,7 @@ from src.services.file_service import FileService
 from src.services.slide_service import SlideService
 from src.services.kg_task_manager import KnowledgeGraphTaskManager
 from src.services.kg_processing import perform_final_clustering
+from src.services.llm_service import close_openai_clients
 
 # Import routers
 from src.routers.root import router as root_router
@@ -115,6 +116,9 @@ async def lifespan(app: FastAPI):
     except asyncio.CancelledError:
         pass
 
+    # Release the shared OpenAI connection pool
+    await close_openai_clients()
+
     logger.info("Shutting down SlideFlip Backend...")
 
 # Create FastAPI app
@@ -22,7 +22,8 @@ class Settings(BaseSettings):
         env_file=(".env.local", ".env"),
         env_file_encoding="utf-8",
         case_sensitive=True,
-        extra="ignore"  # Ignore extra fields not defined in this model
+        extra="ignore",  # Ignore extra fields not defined in this model
+        frozen=True      # Instances are shared between services - use model_copy(update=...) to override
     )
     
     # Server settings - Frontend should connect to these endpoints
@@ -33,6 +34,8 @@ class Settings(BaseSettings):
     # File storage settings - Important for upload component integration
     UPLOAD_DIR: str = "uploads"                    # Directory for uploaded files
     KNOWLEDGE_GRAPH_BASE_DIR:str = "kg"           # Knowledge graph storage
+    EMBEDDINGS_QUANTIZATION: bool = False         # Save graph embeddings as int8 - 4x smaller files
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 20_000     # Embedded texts kept in the shared cache - about 120MB of 1536-dim rows
     TEMP_DIR: str = "temp"                        # Temporary processing files
     OUTPUT_DIR: str = "output"                    # Generated slide outputs
     MAX_FILE_SIZE: int = 50 * 1024 * 1024         # 50MB limit - enforce in frontend
@@ -74,6 +77,9 @@ class Settings(BaseSettings):
     MAX_PROCESSING_TIME: int = 300     # 5 minutes - show timeout warning to users
     CONCURRENT_PROCESSES: int = 4      # Backend can handle 4 simultaneous requests
     MAX_THREADS: int = 4               # Threading limit for parallel operations
+    OPENAI_MAX_CONCURRENCY: int = 20   # Concurrent knowledge graph extraction requests per file
+    OPENAI_RPM: int = 0                # OpenAI requests per minute to stay under - 0 means unlimited
+    OPENAI_TPM: int = 0                # OpenAI tokens per minute (prompt plus max_tokens) to stay under - 0 means unlimited
     
     # Logging settings - For debugging integration issues
     LOG_LEVEL: str = "INFO"
@@ -88,4 +94,13 @@ class Settings(BaseSettings):
     ANTHROPIC_API_KEY: Optional[str] = None       # Set this in .env.local or .env
     
     # OpenAI settings - Alternative AI service for knowledge graph generation
-    OPENAI_API_KEY: Optional[str] = None          # Set this in .env.local or .env
\ No newline at end of file
+    OPENAI_API_KEY: Optional[str] = None          # Set this in .env.local or .env
+    ENABLE_LLM_CACHE: bool = False                # Reuse slide responses for identical requests instead of regenerating
+    ENABLE_SEMANTIC_LLM_CACHE: bool = False       # Also reuse them for near-identical requests - costs one embedding call per miss
+    SEMANTIC_LLM_CACHE_THRESHOLD: float = 0.95    # Cosine similarity a request needs to reuse a cached response
+    LAYOUT_MODEL: str = "gpt-4o-mini"             # Structured layout JSON - the small model is enough
+    CONTENT_MODEL: str = "gpt-4o"                 # Slide prose, including layout and content generated together
+    KG_MODEL: str = "gpt-4o-mini"                 # Knowledge graph extraction - low-temperature and schema-constrained
+    GENERAL_MODEL: str = "gpt-4o-mini"            # generate_content requests that use the default system prompt
+    PROMPT_CONTENT_TOKENS: int = 750              # Source content budget per slide prompt, about 3000 characters of English text
+    ENABLE_STRUCTURED_OUTPUTS: bool = True        # Strict JSON schema for graph extraction - turn off for models without structured outputs
\ No newline at end of file
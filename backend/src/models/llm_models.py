@@ -0,0 +1,41 @@
+"""
+Pydantic models for validating LLM slide generation responses
+"""
+
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Dict, Any, Optional, List
+
+class SectionPosition(BaseModel):
+    """Model for a layout section's placement, in percent of the slide"""
+    model_config = ConfigDict(strict=True, extra="allow")
+
+    x: float = Field(10, description="Left edge")
+    y: float = Field(30, description="Top edge")
+    width: float = Field(80, description="Section width")
+    height: float = Field(60, description="Section height")
+
+class LayoutSection(BaseModel):
+    """Model for one section of a generated slide layout"""
+    model_config = ConfigDict(strict=True, extra="allow")
+
+    type: str = Field(..., description="Section type, e.g. text or bullet_list")
+    content: str = Field("", description="Description of what the section will contain")
+    position: SectionPosition = Field(default_factory=SectionPosition, description="Section placement on the slide")
+    style: Dict[str, Any] = Field(default_factory=dict, description="Font, color and alignment styling")
+
+class SlideLayout(BaseModel):
+    """Model for a generated slide layout"""
+    model_config = ConfigDict(strict=True, extra="allow")
+
+    layout_type: str = Field("content_slide", description="Overall layout type")
+    title: str = Field("", description="Slide title")
+    sections: List[LayoutSection] = Field(..., description="Sections placed on the slide")
+    background_style: Optional[str] = Field(None, description="Background style")
+    color_scheme: Optional[str] = Field(None, description="Color scheme")
+
+class SectionContent(BaseModel):
+    """Model for the generated content of one layout section"""
+    model_config = ConfigDict(strict=True, extra="allow")
+
+    content: str = Field(..., description="Text shown in the section")
+    style_notes: Optional[str] = Field(None, description="Styling or formatting notes")
@@ -136,7 +136,7 @@ async def generate_embeddings(request: EmbeddingRequest):
             )
         
         # Generate embeddings
-        result = kg_service.generate_graph_embeddings()
+        result = await kg_service.generate_graph_embeddings()
         
         if result.get("success"):
             # Save embeddings
@@ -372,8 +372,8 @@ async def query_knowledge_graph(request: GraphQueryRequest):
         kg_service = get_kg_service(request.client_id)
         
         # Initialize LLM service
-        from src.services.llm_service import LLMService
-        llm_service = LLMService()
+        from src.services.llm_service import get_llm_service
+        llm_service = get_llm_service()
         
         # Initialize enhanced graph query service
         from src.services.graph_query_service import GraphQueryService
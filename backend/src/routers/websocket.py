@@ -31,7 +31,7 @@ from src.services.slide_service import SlideService
 from src.services.knowledge_graph_service import KnowledgeGraphService
 from src.services.kg_task_manager import KnowledgeGraphTaskManager
 from src.services.graph_query_service import GraphQueryService
-from src.services.llm_service import LLMService
+from src.services.llm_service import get_llm_service
 from src.services.kg_processing import process_file_for_knowledge_graph, perform_final_clustering, get_current_timestamp
 from src.handlers.kg_message_handlers import (
     handle_kg_status_request,
@@ -1047,7 +1047,7 @@ async def handle_generate_slide(websocket: WebSocket, client_id: str, data: dict
 
         # Initialize knowledge graph service and query service for document content
         kg_service = await kg_task_manager.get_or_create_kg_service(client_id)
-        llm_service = LLMService()
+        llm_service = get_llm_service()
         logger.info(f"Knowledge graph service: {kg_service}")
         logger.info(f"LLM service: {llm_service}")
         query_service = GraphQueryService(
@@ -63,6 +63,9 @@ except Exception:
 
 logger = logging.getLogger(__name__)
 
+# Characters replaced with '_' when a filename is used for storage
+_UNSAFE_FILENAME_TABLE = str.maketrans({char: '_' for char in '<>:"|?*\\/'})
+
 class FileService:
     """
     Service for handling file operations
@@ -168,10 +171,7 @@ class FileService:
         Removes unsafe characters and limits length to prevent filesystem issues
         """
         # Remove or replace unsafe characters that could cause issues
-        unsafe_chars = ['<', '>', ':', '"', '|', '?', '*', '\\', '/']
-        safe_filename = filename
-        for char in unsafe_chars:
-            safe_filename = safe_filename.replace(char, '_')
+        safe_filename = filename.translate(_UNSAFE_FILENAME_TABLE)
         
         # Limit length to prevent filesystem issues
         if len(safe_filename) > 100:
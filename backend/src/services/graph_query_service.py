@@ -3,10 +3,12 @@ Enhanced Graph Query Service for intelligent search and retrieval from knowledge
 Integrates directly with KnowledgeGraphService and LLMService for optimal performance
 """
 
+import heapq
 import logging
 import numpy as np
 from typing import List, Dict, Any, Tuple, Optional
-from collections import defaultdict
+from collections import Counter, defaultdict
+from operator import itemgetter
 import networkx as nx
 from sklearn.metrics.pairwise import cosine_similarity
 import json
@@ -15,6 +17,9 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Optional markdown code fence around a JSON response, matched against the stripped response
+_JSON_FENCE_RE = re.compile(r"^(?:```(?:json)?)?\s*(.*?)\s*(?:```)?$", re.DOTALL)
+
 class GraphQueryService:
     """
     Enhanced service for querying knowledge graphs using LLMs for concept extraction
@@ -48,8 +53,8 @@ class GraphQueryService:
                 "errors": [],
                 "warnings": [],
                 "attribute_summary": {},
-                "node_count": len(graph.nodes),
-                "edge_count": len(graph.edges)
+                "node_count": graph.number_of_nodes(),
+                "edge_count": graph.number_of_edges()
             }
             
             # Check node attributes
@@ -288,12 +293,9 @@ class GraphQueryService:
         
         # Extract key terms
         words = re.findall(r'\b[a-zA-Z]+\b', slide_description.lower())
-        word_freq = defaultdict(int)
-        for word in words:
-            if len(word) > 3:
-                word_freq[word] += 1
+        word_freq = Counter(word for word in words if len(word) > 3)
         
-        frequent_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:8]
+        frequent_words = word_freq.most_common(8)
         key_terms = [word for word, freq in frequent_words if freq > 1]
         
         # Filter common words
@@ -377,11 +379,11 @@ class GraphQueryService:
                 importance_score = (frequency * 0.3) + (connections * 0.4) + (facts * 0.3)
                 entity_scores[node] += importance_score * 0.3  # Lower weight for importance
         
-        # Sort entities by score and return top-k results
-        sorted_entities = sorted(entity_scores.items(), key=lambda x: x[1], reverse=True)
+        # Take the top-scoring entities without sorting every candidate
+        sorted_entities = heapq.nlargest(top_k * 2, entity_scores.items(), key=itemgetter(1))
         
         relevant_entities = []
-        for node, score in sorted_entities[:top_k * 2]:  # Get more candidates for filtering
+        for node, score in sorted_entities:  # Get more candidates for filtering
             if score > similarity_threshold:
                 attrs = graph.nodes[node]
                 
@@ -472,11 +474,11 @@ class GraphQueryService:
                 frequency = len(chunks) if chunks else 1
                 fact_scores[node] += frequency * 0.2
         
-        # Sort facts by score and return top-k results
-        sorted_facts = sorted(fact_scores.items(), key=lambda x: x[1], reverse=True)
+        # Take the top-scoring facts without sorting every candidate
+        sorted_facts = heapq.nlargest(top_k * 2, fact_scores.items(), key=itemgetter(1))
         
         relevant_facts = []
-        for node, score in sorted_facts[:top_k * 2]:  # Get more candidates for filtering
+        for node, score in sorted_facts:  # Get more candidates for filtering
             if score > similarity_threshold:
                 attrs = graph.nodes[node]
                 
@@ -537,30 +539,17 @@ class GraphQueryService:
             
             logger.debug(f"Slide embedding shape: {slide_embedding.shape if hasattr(slide_embedding, 'shape') else 'unknown'}")
             
+            # Score every embedded node against the slide in one matrix product
+            similarities = self.kg_service.get_node_similarities(slide_embedding)
+            
             # Calculate similarity with entity embeddings
             similarity_count = 0
             for node, attrs in graph.nodes(data=True):
                 if attrs.get("node_type") == "entity":
-                    node_embedding = self.kg_service.node_embeddings.get(node)
-                    if node_embedding is not None:
-                        try:
-                            # Validate embeddings before similarity calculation
-                            if not isinstance(slide_embedding, np.ndarray):
-                                logger.debug(f"Slide embedding is not numpy array: {type(slide_embedding)}")
-                                continue
-                            if not isinstance(node_embedding, np.ndarray):
-                                logger.debug(f"Node embedding is not numpy array: {type(node_embedding)}")
-                                continue
-                            
-                            # Calculate cosine similarity
-                            similarity = self._cosine_similarity(slide_embedding, node_embedding)
-                            
-                            if similarity > similarity_threshold:
-                                entity_scores[node] += similarity * 2.0  # High weight for embedding similarity
-                                similarity_count += 1
-                        except Exception as sim_e:
-                            logger.debug(f"Similarity calculation failed for node {node}: {sim_e}")
-                            continue
+                    similarity = similarities.get(node)
+                    if similarity is not None and similarity > similarity_threshold:
+                        entity_scores[node] += similarity * 2.0  # High weight for embedding similarity
+                        similarity_count += 1
             
             logger.debug(f"Successfully calculated similarity for {similarity_count} entities")
                             
@@ -602,30 +591,17 @@ class GraphQueryService:
             
             logger.debug(f"Slide embedding shape for facts: {slide_embedding.shape if hasattr(slide_embedding, 'shape') else 'unknown'}")
             
+            # Score every embedded node against the slide in one matrix product
+            similarities = self.kg_service.get_node_similarities(slide_embedding)
+            
             # Calculate similarity with fact embeddings
             similarity_count = 0
             for node, attrs in graph.nodes(data=True):
                 if attrs.get("node_type") == "fact":
-                    node_embedding = self.kg_service.node_embeddings.get(node)
-                    if node_embedding is not None:
-                        try:
-                            # Validate embeddings before similarity calculation
-                            if not isinstance(slide_embedding, np.ndarray):
-                                logger.debug(f"Slide embedding is not numpy array: {type(slide_embedding)}")
-                                continue
-                            if not isinstance(node_embedding, np.ndarray):
-                                logger.debug(f"Node embedding is not numpy array: {type(node_embedding)}")
-                                continue
-                            
-                            # Calculate cosine similarity
-                            similarity = self._cosine_similarity(slide_embedding, node_embedding)
-                            
-                            if similarity > similarity_threshold:
-                                fact_scores[node] += similarity * 1.5  # Medium weight for fact similarity
-                                similarity_count += 1
-                        except Exception as sim_e:
-                            logger.debug(f"Fact similarity calculation failed for node {node}: {sim_e}")
-                            continue
+                    similarity = similarities.get(node)
+                    if similarity is not None and similarity > similarity_threshold:
+                        fact_scores[node] += similarity * 1.5  # Medium weight for fact similarity
+                        similarity_count += 1
             
             logger.debug(f"Successfully calculated similarity for {similarity_count} facts")
                             
@@ -662,12 +638,9 @@ class GraphQueryService:
                     logger.warning("KG service returned None embedding")
                     return None
                     
-            elif self.kg_service and self.kg_service.openai_client:
-                # Use OpenAI client directly if available
-                response = self.kg_service.openai_client.embeddings.create(
-                    input=text,
-                    model="text-embedding-3-small"
-                )
+            elif self.kg_service and self.kg_service.async_openai_client:
+                # Use the KG service's OpenAI client if available
+                response = await self.kg_service._create_embeddings(text)
                 embedding = np.array(response.data[0].embedding)
                 logger.debug(f"Generated embedding via OpenAI, shape: {embedding.shape}")
                 return embedding
@@ -680,62 +653,6 @@ class GraphQueryService:
             logger.debug(f"Exception details: {type(e).__name__}: {str(e)}")
             return None
     
-    def _cosine_similarity(self, vec1: np.ndarray, vec2: np.ndarray) -> float:
-        """
-        Calculate cosine similarity between two vectors
-        
-        Args:
-            vec1: First vector
-            vec2: Second vector
-            
-        Returns:
-            Cosine similarity score
-        """
-        try:
-            # Log input types for debugging
-            logger.debug(f"Cosine similarity input types: vec1={type(vec1)}, vec2={type(vec2)}")
-            
-            # Ensure vectors are 1D and convert to numpy arrays if needed
-            if not isinstance(vec1, np.ndarray):
-                vec1 = np.array(vec1)
-                logger.debug(f"Converted vec1 to numpy array, shape: {vec1.shape}")
-            if not isinstance(vec2, np.ndarray):
-                vec2 = np.array(vec2)
-                logger.debug(f"Converted vec2 to numpy array, shape: {vec2.shape}")
-                
-            vec1 = vec1.flatten()
-            vec2 = vec2.flatten()
-            
-            # Check for zero vectors using np.all() to avoid boolean array issues
-            if np.all(vec1 == 0) or np.all(vec2 == 0):
-                logger.debug("Zero vector detected, returning 0.0")
-                return 0.0
-            
-            # Calculate cosine similarity
-            dot_product = np.dot(vec1, vec2)
-            norm1 = np.linalg.norm(vec1)
-            norm2 = np.linalg.norm(vec2)
-            
-            # Avoid division by zero
-            if norm1 == 0.0 or norm2 == 0.0:
-                logger.debug("Zero norm detected, returning 0.0")
-                return 0.0
-            
-            similarity = dot_product / (norm1 * norm2)
-            
-            # Ensure the result is a valid float
-            if np.isnan(similarity) or np.isinf(similarity):
-                logger.debug(f"Invalid similarity value: {similarity}")
-                return 0.0
-                
-            logger.debug(f"Cosine similarity calculated successfully: {similarity}")
-            return float(similarity)
-            
-        except Exception as e:
-            logger.warning(f"Cosine similarity calculation failed: {e}")
-            logger.debug(f"Exception details: {type(e).__name__}: {str(e)}")
-            return 0.0
-    
     async def _find_top_k_chunks(
         self, 
         graph: nx.DiGraph,
@@ -790,11 +707,11 @@ class GraphQueryService:
             
             chunk_scores[chunk_idx] = score
         
-        # Sort chunks by score and return top-k results
-        sorted_chunks = sorted(chunk_scores.items(), key=lambda x: x[1], reverse=True)
+        # Take the top-k chunks by score without sorting every candidate
+        sorted_chunks = heapq.nlargest(top_k, chunk_scores.items(), key=itemgetter(1))
         
         relevant_chunks = []
-        for chunk_idx, score in sorted_chunks[:top_k]:
+        for chunk_idx, score in sorted_chunks:
             if score > 0:
                 # Find chunk content from entities or facts
                 chunk_content = self._get_chunk_content(graph, chunk_idx, relevant_entities, relevant_facts)
@@ -831,9 +748,11 @@ class GraphQueryService:
         
         # Find edges between relevant entities
         for source_id in entity_ids:
+            # Look up each source's neighbors once instead of has_edge plus edges[] per pair
+            neighbors = graph.adj.get(source_id, {})
             for target_id in entity_ids:
-                if source_id != target_id and graph.has_edge(source_id, target_id):
-                    edge_attrs = graph.edges[source_id, target_id]
+                edge_attrs = neighbors.get(target_id)
+                if source_id != target_id and edge_attrs is not None:
                     
                     # Check for entity connections (both edge types are valid)
                     edge_type = edge_attrs.get("edge_type", "")
@@ -864,9 +783,8 @@ class GraphQueryService:
                             }
                         })
         
-        # Sort by weight and return top-k
-        sorted_relationships = sorted(relevant_relationships, key=lambda x: x["weight"], reverse=True)
-        return sorted_relationships[:top_k]
+        # Return the top-k by weight without sorting every relationship
+        return heapq.nlargest(top_k, relevant_relationships, key=itemgetter("weight"))
     
     async def _generate_high_level_insights_with_llm(
         self,
@@ -955,19 +873,8 @@ class GraphQueryService:
             
             # Try to parse JSON response
             try:
-                # Clean the response to extract JSON
-                cleaned_response = response.strip()
-                
-                # Remove markdown code blocks if present
-                if cleaned_response.startswith("```json"):
-                    cleaned_response = cleaned_response[7:]
-                elif cleaned_response.startswith("```"):
-                    cleaned_response = cleaned_response[3:]
-                
-                if cleaned_response.endswith("```"):
-                    cleaned_response = cleaned_response[:-3]
-                
-                cleaned_response = cleaned_response.strip()
+                # Clean the response to extract JSON, removing markdown code blocks if present
+                cleaned_response = _JSON_FENCE_RE.match(response.strip()).group(1)
                 
                 # Try to parse the cleaned JSON
                 llm_insights = json.loads(cleaned_response)
@@ -1032,29 +939,25 @@ class GraphQueryService:
         }
         
         # Identify main themes based on entity types
-        entity_types = defaultdict(int)
-        for entity in relevant_entities:
-            entity_type = entity.get("type", "unknown")
-            entity_types[entity_type] += 1
+        entity_types = Counter(entity.get("type", "unknown") for entity in relevant_entities)
         
-        main_types = sorted(entity_types.items(), key=lambda x: x[1], reverse=True)[:3]
+        main_types = entity_types.most_common(3)
         insights["main_themes"] = [f"{entity_type} ({count} entities)" for entity_type, count in main_types]
         
         # Identify central entities (highest relevance and connections)
-        central_entities = sorted(
-            relevant_entities, 
-            key=lambda x: (x.get("relevance_score", 0), x.get("connections", 0)), 
-            reverse=True
-        )[:5]
+        central_entities = heapq.nlargest(
+            5,
+            relevant_entities,
+            key=lambda x: (x.get("relevance_score", 0), x.get("connections", 0))
+        )
         insights["central_entities"] = [entity.get("name", "Unknown") for entity in central_entities]
         
         # Identify key relationships
-        relationship_types = defaultdict(int)
-        for rel in relevant_relationships:
-            rel_type = rel.get("relationship_type", rel.get("type", "unknown"))
-            relationship_types[rel_type] += 1
+        relationship_types = Counter(
+            rel.get("relationship_type", rel.get("type", "unknown")) for rel in relevant_relationships
+        )
         
-        key_rels = sorted(relationship_types.items(), key=lambda x: x[1], reverse=True)[:3]
+        key_rels = relationship_types.most_common(3)
         insights["key_relationships"] = [f"{rel_type} ({count} instances)" for rel_type, count in key_rels]
         
         # Generate content summary
@@ -1217,7 +1120,7 @@ class GraphQueryService:
         try:
             entity_count = 0
             total_frequency = 0
-            entity_types = defaultdict(int)
+            entity_types = Counter()
             source_files = set()
             clustered_entities = 0
             merged_entities = 0
@@ -1228,10 +1131,7 @@ class GraphQueryService:
                     total_frequency += attrs.get("frequency", 1)
                     
                     # Entity types
-                    entity_type = attrs.get("type", "unknown")
-                    if entity_type not in entity_types:
-                        entity_types[entity_type] = 0
-                    entity_types[entity_type] += 1
+                    entity_types[attrs.get("type", "unknown")] += 1
                     
                     # Source files
                     if attrs.get("filename"):
@@ -1269,7 +1169,7 @@ class GraphQueryService:
         try:
             relationship_count = 0
             total_weight = 0
-            relationship_types = defaultdict(int)
+            relationship_types = Counter()
             source_files = set()
             clustered_edges = 0
             merged_edges = 0
@@ -1280,10 +1180,7 @@ class GraphQueryService:
                     total_weight += attrs.get("weight", 1.0)
                     
                     # Relationship types
-                    rel_type = attrs.get("relationship_type", "unknown")
-                    if rel_type not in relationship_types:
-                        relationship_types[rel_type] = 0
-                    relationship_types[rel_type] += 1
+                    relationship_types[attrs.get("relationship_type", "unknown")] += 1
                     
                     # Source files
                     if attrs.get("filename"):
@@ -1323,11 +1220,15 @@ class GraphQueryService:
             if not graph:
                 return {"error": "No knowledge graph available"}
             
+            # Count node and edge types
+            node_types = Counter(attrs.get("node_type", "unknown") for _, attrs in graph.nodes(data=True))
+            edge_types = Counter(attrs.get("edge_type", "unknown") for _, _, attrs in graph.edges(data=True))
+            
             stats = {
-                "total_nodes": len(graph.nodes),
-                "total_edges": len(graph.edges),
-                "node_types": defaultdict(int),
-                "edge_types": defaultdict(int),
+                "total_nodes": graph.number_of_nodes(),
+                "total_edges": graph.number_of_edges(),
+                "node_types": dict(node_types),
+                "edge_types": dict(edge_types),
                 "embeddings": {
                     "nodes_with_embeddings": len(self.kg_service.node_embeddings) if self.kg_service.node_embeddings else 0,
                     "edges_with_embeddings": len(self.kg_service.edge_embeddings) if self.kg_service.edge_embeddings else 0
@@ -1335,16 +1236,6 @@ class GraphQueryService:
                 "timestamp": self._get_current_timestamp()
             }
             
-            # Count node types
-            for node, attrs in graph.nodes(data=True):
-                node_type = attrs.get("node_type", "unknown")
-                stats["node_types"][node_type] += 1
-            
-            # Count edge types
-            for source, target, attrs in graph.edges(data=True):
-                edge_type = attrs.get("edge_type", "unknown")
-                stats["edge_types"][edge_type] += 1
-            
             # Get detailed entity and relationship statistics
             entity_stats = self._calculate_entity_statistics(graph)
             relationship_stats = self._calculate_relationship_statistics(graph)
@@ -1352,10 +1243,6 @@ class GraphQueryService:
             stats["entities"] = entity_stats
             stats["relationships"] = relationship_stats
             
-            # Convert defaultdict to regular dict for JSON serialization
-            stats["node_types"] = dict(stats["node_types"])
-            stats["edge_types"] = dict(stats["edge_types"])
-            
             return stats
             
         except Exception as e:
@@ -1378,8 +1265,8 @@ class GraphQueryService:
                 "errors": [],
                 "warnings": [],
                 "attribute_summary": {},
-                "node_count": len(graph.nodes),
-                "edge_count": len(graph.edges)
+                "node_count": graph.number_of_nodes(),
+                "edge_count": graph.number_of_edges()
             }
             
             # Check node attributes
@@ -108,7 +108,7 @@ async def perform_final_clustering(
         # Generate embeddings for the clustered graph if they don't exist
         if not kg_service.node_embeddings and not kg_service.edge_embeddings:
             logger.info("Generating embeddings for clustered graph...")
-            embedding_result = kg_service.generate_graph_embeddings()
+            embedding_result = await kg_service.generate_graph_embeddings()
             if embedding_result.get("success"):
                 logger.info(f"Generated embeddings: {embedding_result['node_embeddings_count']} nodes, {embedding_result['edge_embeddings_count']} edges")
             else:
@@ -2,40 +2,228 @@
 Knowledge Graph Service for building and managing knowledge graphs from uploaded files
 """
 
+import io
 import logging
 import networkx as nx
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Callable, Dict, List, Optional, Any, Tuple
 from pathlib import Path
 import multiprocessing as mp
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import lru_cache
 import json
 import os
 import asyncio
-from collections import defaultdict
+import heapq
+import hashlib
+import pickle
+import tempfile
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from collections.abc import Mapping
 import numpy as np
 from sklearn.cluster import DBSCAN
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
 import openai
 import tiktoken  # Add this import
 from datetime import datetime
 
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+    logging.warning("pyahocorasick not available. Fact-entity mention matching will use substring scans.")
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logging.warning("orjson not available. Graph data and embeddings will use the standard json module.")
+
+try:
+    import zstandard as zstd
+    ZSTANDARD_AVAILABLE = True
+except ImportError:
+    ZSTANDARD_AVAILABLE = False
+    logging.warning("zstandard not available. Graphs will be pickled without compression.")
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+    logging.warning("ijson not available. Legacy JSON embeddings will be parsed in one piece.")
+
 from src.models.message_models import FileInfo
 from src.core.config import Settings
-from src.services.llm_service import LLMService
+from src.services.llm_service import _get_client, get_llm_service
 
 logger = logging.getLogger(__name__)
 
+# Characters replaced with '_' when a filename is used for storage
+_UNSAFE_FILENAME_TABLE = str.maketrans({char: '_' for char in '<>:"|?*\\/'})
+
+# Guards the shared embedding caches and serializes reads and writes of their files
+_embedding_cache_lock = threading.Lock()
+
+class _EmbeddingRows(Mapping):
+    """Read-only mapping from node ids or edge keys to rows of an embedding matrix"""
+    
+    def __init__(self, index: dict, matrix: np.ndarray):
+        self._index = index
+        self._matrix = matrix
+    
+    def __getitem__(self, key) -> np.ndarray:
+        return self._matrix[self._index[key]]
+    
+    def __contains__(self, key) -> bool:
+        return key in self._index
+    
+    def __iter__(self):
+        return iter(self._index)
+    
+    def __len__(self) -> int:
+        return len(self._index)
+
+class _EmbeddingCache:
+    """
+    Embeddings of graph texts keyed by digest, shared by every client and persisted to one file
+    
+    Entries are ordered from least to most recently used, so the oldest are dropped first once
+    the cache is over its cap. The file is only read again when another process replaced it
+    after this one last read or wrote it. Every method takes _embedding_cache_lock, which is
+    held during file IO, so call them off the event loop.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._unsaved = False
+        # Modification time of the file when this process last read or wrote it
+        self._file_mtime: Optional[int] = None
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def load(self, max_entries: int):
+        """Pick up entries written to the file by another process"""
+        with _embedding_cache_lock:
+            self._merge_file()
+            self._trim(max_entries)
+    
+    def get_many(self, digests: List[str]) -> Dict[str, np.ndarray]:
+        """Look up cached embeddings, marking the ones found as recently used"""
+        with _embedding_cache_lock:
+            found = {}
+            for digest in digests:
+                row = self._entries.get(digest)
+                if row is not None:
+                    self._entries.move_to_end(digest)
+                    found[digest] = row
+            return found
+    
+    def put_many(self, rows: Dict[str, np.ndarray]):
+        """Add newly embedded texts, to be written on the next save"""
+        if not rows:
+            return
+        with _embedding_cache_lock:
+            self._entries.update(rows)
+            self._unsaved = True
+    
+    def save(self, max_entries: int):
+        """Write the cache to its file if anything was added since the last save"""
+        with _embedding_cache_lock:
+            if not self._unsaved:
+                return
+            # Keep what other processes wrote since the file was last read
+            self._merge_file()
+            self._trim(max_entries)
+            
+            temp_path = None
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                # Written beside the cache and swapped in, so readers never see a partial file
+                with tempfile.NamedTemporaryFile(dir=self.path.parent, suffix=".npz.tmp", delete=False) as temp_file:
+                    temp_path = temp_file.name
+                    np.savez(
+                        temp_file,
+                        digests=np.array(list(self._entries), dtype=str),
+                        matrix=np.stack(list(self._entries.values()))
+                    )
+                os.replace(temp_path, self.path)
+                self._file_mtime = self._current_mtime()
+                self._unsaved = False
+            except Exception as e:
+                logger.warning(f"Could not write embedding cache {self.path}: {e}")
+                if temp_path is not None and os.path.exists(temp_path):
+                    os.remove(temp_path)
+    
+    def _current_mtime(self) -> Optional[int]:
+        try:
+            return self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+    
+    def _merge_file(self):
+        """Add entries of the file that are missing from memory, as the least recently used"""
+        mtime = self._current_mtime()
+        if mtime is None or mtime == self._file_mtime:
+            return
+        try:
+            with np.load(self.path) as data:
+                digests = data["digests"].tolist()
+                matrix = data["matrix"]
+        except Exception as e:
+            logger.warning(f"Could not read embedding cache {self.path}: {e}")
+            return
+        
+        self._file_mtime = mtime
+        merged = OrderedDict(
+            (digest, row) for digest, row in zip(digests, matrix) if digest not in self._entries
+        )
+        merged.update(self._entries)
+        self._entries = merged
+        logger.info(f"Loaded {len(digests)} cached embeddings from {self.path}")
+    
+    def _trim(self, max_entries: int):
+        while len(self._entries) > max_entries:
+            self._entries.popitem(last=False)
+
+@lru_cache(maxsize=None)
+def _get_embedding_cache(cache_path: Path) -> _EmbeddingCache:
+    """Get the embedding cache stored at cache_path, shared by every service in the process"""
+    return _EmbeddingCache(cache_path)
+
 class KnowledgeGraphService:
     """Service for building and managing knowledge graphs from document content"""
     
+    # Stateless, so a single instance is shared by every clustering call
+    _entity_vectorizer = HashingVectorizer(
+        n_features=1 << 14, alternate_sign=False, norm=None, stop_words='english'
+    )
+    # Longest entity description (in characters) used as clustering text
+    _max_cluster_description_chars = 500
+    # Graphs are pickled, and compressed when zstandard is installed
+    _graph_file_suffix = ".pkl.zst" if ZSTANDARD_AVAILABLE else ".pkl"
+    # GML exports are compressed the same way
+    _gml_file_suffix = ".gml.zst" if ZSTANDARD_AVAILABLE else ".gml"
+    # Most inputs the embeddings endpoint accepts in a single request
+    _embedding_batch_size = 2048
+    # Embedding requests allowed in flight at once, to stay within rate limits
+    _embedding_concurrency = 8
+    
     def __init__(self, client_id: str):
         self.graph = nx.DiGraph()
         self.file_graphs = {}  # Maps file_id to NetworkX graph
         self.file_graph_data = {}  # Maps file_id to graph data
+        # Maps file_id to the graph data its chunk content indexes were built from, and the indexes
+        self._chunk_content_indexes: Dict[str, Tuple[dict, Dict[int, str], Dict[Tuple[str, int], str]]] = {}
         self.settings = Settings()
         self.client_id = client_id
-        self.llm_service = LLMService()
+        # Every file this service writes lives under the client's directory
+        self._client_dir = Path(self.settings.KNOWLEDGE_GRAPH_BASE_DIR) / client_id
+        self.llm_service = get_llm_service()
         
         # Initialize tiktoken tokenizer for chunking
         try:
@@ -49,21 +237,21 @@ class KnowledgeGraphService:
             self.chunk_overlap = 100  # characters
         # Create output directories
         self._create_output_directories()
-        # Embedding storage
-        self.node_embeddings: Dict[str, np.ndarray] = {}
-        self.edge_embeddings: Dict[Tuple[str, str], np.ndarray] = {}
-        self.openai_client: Optional[openai.OpenAI] = None
+        # Embedding storage: one float32 matrix per kind with a row per node or edge.
+        # node_embeddings/edge_embeddings are read-only mappings from each id to its row (a view, not a copy)
+        self._set_node_embeddings([], np.empty((0, 0), dtype=np.float32))
+        self._set_edge_embeddings([], np.empty((0, 0), dtype=np.float32))
+        self.async_openai_client: Optional[openai.AsyncOpenAI] = None
         
         # Initialize OpenAI client
         self._initialize_openai_client()
     
     def _create_output_directories(self):
         """Create necessary output directories"""
-        base_dir = Path(self.settings.KNOWLEDGE_GRAPH_BASE_DIR) / self.client_id
         directories = ["graph_data", "graphs", "clustered_graphs"]
         
         for dir_name in directories:
-            dir_path = base_dir / dir_name
+            dir_path = self._client_dir / dir_name
             dir_path.mkdir(parents=True, exist_ok=True)
             logger.info(f"Created directory: {dir_path}")
     
@@ -99,7 +287,7 @@ class KnowledgeGraphService:
             # Generate embeddings for the clustered graph if they don't exist
             if not self.node_embeddings and not self.edge_embeddings:
                 logger.info("Generating embeddings for clustered graph...")
-                embedding_result = self.generate_graph_embeddings()
+                embedding_result = await self.generate_graph_embeddings()
                 if embedding_result.get("success"):
                     logger.info(f"Generated embeddings: {embedding_result['node_embeddings_count']} nodes, {embedding_result['edge_embeddings_count']} edges")
                 else:
@@ -247,32 +435,10 @@ class KnowledgeGraphService:
         return text
 
     async def _process_chunks_in_parallel(self, chunks: List[str], filename: str, file_path: str) -> List[Dict[str, Any]]:
-        """Process chunks in parallel using asyncio.gather"""
+        """Process chunks concurrently, bounded by the LLM service's OpenAI concurrency limit"""
         logger.info(f"Processing {len(chunks)} chunks in parallel for {filename}")
         
-        # Create tasks for parallel processing
-        tasks = []
-        for i, chunk in enumerate(chunks):
-            task = self.llm_service.extract_knowledge_graph_from_chunk(
-                chunk, i, filename, file_path
-            )
-            tasks.append(task)
-        
-        # Process all chunks concurrently
-        chunk_results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Filter out any failed extractions
-        valid_results = []
-        for i, result in enumerate(chunk_results):
-            if isinstance(result, Exception):
-                logger.error(f"Chunk {i} extraction failed: {result}")
-                # Generate fallback data for failed chunks
-                fallback_data = self.llm_service._generate_fallback_knowledge_graph_data(
-                    chunks[i], i, filename, file_path
-                )
-                valid_results.append(fallback_data)
-            else:
-                valid_results.append(result)
+        valid_results = await self.llm_service.extract_knowledge_graph_from_chunks(chunks, filename, file_path)
         
         logger.info(f"Successfully processed {len(valid_results)} chunks for {filename}")
         return valid_results
@@ -387,10 +553,10 @@ class KnowledgeGraphService:
                     target = rel.get("target", rel.get("target_entity", "")).strip()
                     rel_type = rel.get("type", rel.get("relationship_type", "")).strip()
                     
-                    logger.debug(f"Processing relationship: source='{source}', target='{target}', type='{rel_type}'")
+                    logger.debug("Processing relationship: source='%s', target='%s', type='%s'", source, target, rel_type)
                     
                     # Log the full relationship data for debugging
-                    logger.debug(f"Full relationship data: {rel}")
+                    logger.debug("Full relationship data: %s", rel)
                     
                     # If we have entity IDs instead of names, try to find the entity names
                     if source and source.startswith("entity_") and "source_name" in rel:
@@ -399,25 +565,22 @@ class KnowledgeGraphService:
                         target = rel.get("target_name", target)
                     
                     if not all([source, target, rel_type]):
-                        logger.debug(f"Skipping relationship due to missing fields: {rel}")
+                        logger.debug("Skipping relationship due to missing fields: %s", rel)
                         continue
                     
-                    # Find the unified IDs for source and target entities
-                    source_id = None
-                    target_id = None
-                    
                     # Debug: log available entity names
                     if logger.isEnabledFor(logging.DEBUG):
                         available_entities = [entity_info["name"].lower() for entity_info in entity_data.values()]
                         logger.debug(f"Available entities: {available_entities[:10]}...")  # Show first 10
                     
-                    for entity_id, entity_info in entity_data.items():
-                        if entity_info["name"].lower() == source.lower():
-                            source_id = entity_id
-                            logger.debug(f"Found source entity: {source} -> {entity_id}")
-                        if entity_info["name"].lower() == target.lower():
-                            target_id = entity_id
-                            logger.debug(f"Found target entity: {target} -> {entity_id}")
+                    # Find the unified IDs for source and target entities through the lowercased
+                    # name index built while merging entities, instead of scanning every entity
+                    source_id = entity_mapping.get(source.lower())
+                    target_id = entity_mapping.get(target.lower())
+                    if source_id:
+                        logger.debug("Found source entity: %s -> %s", source, source_id)
+                    if target_id:
+                        logger.debug("Found target entity: %s -> %s", target, target_id)
                     
                     if source_id and target_id:
                         # Create relationship data
@@ -464,7 +627,7 @@ class KnowledgeGraphService:
                     # Handle both field naming conventions
                     fact_text = fact.get("text", fact.get("content", "")).strip()
                     if not fact_text:
-                        logger.debug(f"Skipping fact due to missing text: {fact}")
+                        logger.debug("Skipping fact due to missing text: %s", fact)
                         continue
                     
                     # Log sample facts for debugging
@@ -565,20 +728,27 @@ class KnowledgeGraphService:
             "metadata": clustered_data.get("metadata", {})
         }
         
+        # Bind the separator join once instead of rebuilding it for every field
+        join_values = " ||| ".join
+        
+        def join_field(record: dict, field: str) -> str:
+            values = record.get(field)
+            return join_values(values) if values else ""
+        
         # Convert entities
         for entity in clustered_data.get("entities", []):
             legacy_entity = {
                 "id": entity["id"],
                 "name": entity["name"],
-                "type": " ||| ".join(entity.get("type", [])) if entity.get("type") else "",
-                "description": " ||| ".join(entity.get("description", [])) if entity.get("description") else "",
+                "type": join_field(entity, "type"),
+                "description": join_field(entity, "description"),
                 "confidence": entity.get("confidence", 0.0),
                 "frequency": entity.get("frequency", 1),
                 "chunks": entity.get("chunks", []),
-                "chunk_content": " ||| ".join(entity.get("chunk_content", [])),
-                "filename": " ||| ".join(entity.get("filename", [])),
-                "file_path": " ||| ".join(entity.get("file_path", [])),
-                "extraction_timestamp": " ||| ".join(entity.get("extraction_timestamp", []))
+                "chunk_content": join_field(entity, "chunk_content"),
+                "filename": join_field(entity, "filename"),
+                "file_path": join_field(entity, "file_path"),
+                "extraction_timestamp": join_field(entity, "extraction_timestamp")
             }
             legacy_data["entities"].append(legacy_entity)
         
@@ -592,10 +762,10 @@ class KnowledgeGraphService:
                 "confidence": relationship.get("confidence", 0.0),
                 "frequency": len(relationship.get("chunks", [])),
                 "chunks": relationship.get("chunks", []),
-                "chunk_content": " ||| ".join(relationship.get("chunk_content", [])),
-                "filename": " ||| ".join(relationship.get("filename", [])),
-                "file_path": " ||| ".join(relationship.get("file_path", [])),
-                "extraction_timestamp": " ||| ".join(relationship.get("extraction_timestamp", [])),
+                "chunk_content": join_field(relationship, "chunk_content"),
+                "filename": join_field(relationship, "filename"),
+                "file_path": join_field(relationship, "file_path"),
+                "extraction_timestamp": join_field(relationship, "extraction_timestamp"),
                 "weight": relationship.get("weight", 1.0)
             }
             legacy_data["relationships"].append(legacy_relationship)
@@ -608,10 +778,10 @@ class KnowledgeGraphService:
                 "confidence": fact.get("confidence", 0.0),
                 "frequency": len(fact.get("chunks", [])),
                 "chunks": fact.get("chunks", []),
-                "chunk_content": " ||| ".join(fact.get("chunk_content", [])),
-                "filename": " ||| ".join(fact.get("filename", [])),
-                "file_path": " ||| ".join(fact.get("file_path", [])),
-                "extraction_timestamp": " ||| ".join(fact.get("extraction_timestamp", []))
+                "chunk_content": join_field(fact, "chunk_content"),
+                "filename": join_field(fact, "filename"),
+                "file_path": join_field(fact, "file_path"),
+                "extraction_timestamp": join_field(fact, "extraction_timestamp")
             }
             legacy_data["facts"].append(legacy_fact)
         
@@ -631,28 +801,25 @@ class KnowledgeGraphService:
         relationships = clustered_data.get("relationships", [])
         facts = clustered_data.get("facts", [])
         
-        # Entity type distribution
-        type_distribution = {}
-        for entity in entities:
-            for entity_type in entity.get("type", ["unknown"]):
-                type_distribution[entity_type] = type_distribution.get(entity_type, 0) + 1
-        
-        # Connection type distribution
-        connection_type_distribution = {}
-        total_connections = 0
-        for relationship in relationships:
-            rel_type = relationship.get("type", "unknown")
-            connection_type_distribution[rel_type] = connection_type_distribution.get(rel_type, 0) + 1
-            total_connections += 1
+        # Entity type and connection type distributions
+        type_distribution = Counter(
+            entity_type for entity in entities for entity_type in entity.get("type", ["unknown"])
+        )
+        connection_type_distribution = Counter(
+            relationship.get("type", "unknown") for relationship in relationships
+        )
+        total_connections = len(relationships)
         
         # Entity connectivity analysis
+        facts_lower = [fact["text"].lower() for fact in facts]
         connectivity_stats = []
         for entity in entities:
             entity_id = entity["id"]
+            entity_name_lower = entity["name"].lower()
             # Count relationships where this entity is source or target
             connections = sum(1 for rel in relationships if rel["source"] == entity_id or rel["target"] == entity_id)
             # Count facts that mention this entity
-            entity_facts = sum(1 for fact in facts if entity["name"].lower() in fact["text"].lower())
+            entity_facts = sum(1 for fact_text in facts_lower if entity_name_lower in fact_text)
             
             connectivity_stats.append({
                 "entity_name": entity["name"],
@@ -661,16 +828,16 @@ class KnowledgeGraphService:
                 "frequency": entity.get("frequency", 1)
             })
         
-        # Sort by connectivity
-        connectivity_stats.sort(key=lambda x: x["connections"], reverse=True)
+        # Only the top 10 are reported, so select them without sorting everything
+        most_connected_entities = heapq.nlargest(10, connectivity_stats, key=lambda x: x["connections"])
         
         summary = {
             "total_entities": len(entities),
             "total_connections": total_connections,
             "total_facts": len(facts),
-            "entity_type_distribution": type_distribution,
-            "connection_type_distribution": connection_type_distribution,
-            "most_connected_entities": connectivity_stats[:10],  # Top 10
+            "entity_type_distribution": dict(type_distribution),
+            "connection_type_distribution": dict(connection_type_distribution),
+            "most_connected_entities": most_connected_entities,
             "entity_frequency_stats": {
                 "min": min((entity.get("frequency", 1) for entity in entities), default=1),
                 "max": max((entity.get("frequency", 1) for entity in entities), default=1),
@@ -692,114 +859,21 @@ class KnowledgeGraphService:
         
         return summary
     
-    def test_filtering_logic(self, sample_chunk_data: List[dict]) -> dict:
-        """
-        Test the filtering logic with sample data to demonstrate entity and connection limits
-        
-        Args:
-            sample_chunk_data: Sample chunk data to test with
-            
-        Returns:
-            Dictionary showing filtering results and statistics
-        """
-        # Create a large sample dataset to test filtering
-        large_chunk_data = []
-        
-        # Generate 500 entities across multiple chunks
-        for chunk_idx in range(10):
-            chunk_entities = []
-            chunk_relationships = []
-            chunk_facts = []
-            
-            # Add 50 entities per chunk
-            for entity_idx in range(50):
-                entity_id = f"entity_{chunk_idx}_{entity_idx}"
-                entity_name = f"Entity_{chunk_idx}_{entity_idx}"
-                
-                # Vary frequency and importance
-                frequency = (chunk_idx + 1) * (entity_idx + 1) % 10 + 1
-                
-                chunk_entities.append({
-                    "id": entity_id,
-                    "name": entity_name,
-                    "type": f"type_{entity_idx % 5}",
-                    "description": f"Description for {entity_name}",
-                    "chunk_content": f"Content mentioning {entity_name}",
-                    "chunk_index": chunk_idx,
-                    "filename": f"chunk_{chunk_idx}.txt",
-                    "file_path": f"/path/to/chunk_{chunk_idx}.txt",
-                    "extraction_timestamp": "2024-01-01T10:00:00"
-                })
-                
-                # Add some relationships
-                if entity_idx > 0:
-                    chunk_relationships.append({
-                        "source": entity_name,
-                        "target": f"Entity_{chunk_idx}_{entity_idx-1}",
-                        "type": "related_to",
-                        "chunk_content": f"Relationship between {entity_name} and Entity_{chunk_idx}_{entity_idx-1}",
-                        "chunk_index": chunk_idx,
-                        "filename": f"chunk_{chunk_idx}.txt",
-                        "file_path": f"/path/to/chunk_{chunk_idx}.txt",
-                        "extraction_timestamp": "2024-01-01T10:00:00"
-                    })
-                
-                # Add some facts
-                chunk_facts.append({
-                    "text": f"Fact about {entity_name}",
-                    "chunk_content": f"Content with fact about {entity_name}",
-                    "chunk_index": chunk_idx,
-                    "filename": f"chunk_{chunk_idx}.txt",
-                    "file_path": f"/path/to/chunk_{chunk_idx}.txt",
-                    "extraction_timestamp": "2024-01-01T10:00:00"
-                })
-            
-            large_chunk_data.append({
-                "entities": chunk_entities,
-                "relationships": chunk_relationships,
-                "facts": chunk_facts,
-                "chunk_index": chunk_idx,
-                "filename": f"chunk_{chunk_idx}.txt",
-                "file_path": f"/path/to/chunk_{chunk_idx}.txt"
-            })
-        
-        # Process with filtering
-        filtered_data = self._merge_graph_data_with_weights(large_chunk_data)
-        
-        # Get summary
-        summary = self.get_clustered_data_summary(filtered_data)
-        
-        return {
-            "test_results": {
-                "input_chunks": len(large_chunk_data),
-                "input_entities": sum(len(chunk.get("entities", [])) for chunk in large_chunk_data),
-                "input_relationships": sum(len(chunk.get("relationships", [])) for chunk in large_chunk_data),
-                "input_facts": sum(len(chunk.get("facts", [])) for chunk in large_chunk_data)
-            },
-            "filtered_results": {
-                "output_entities": filtered_data["total_entities"],
-                "output_relationships": filtered_data["total_relationships"],
-                "output_facts": filtered_data["total_facts"]
-            },
-            "filtering_summary": summary,
-            "limits_applied": {
-                "entity_limit": 200,
-                "connection_limit": 400
-            }
-        }
-    
     async def _save_graph_data_to_json(self, filename: str, graph_data: dict) -> str:
         """Save graph data to a JSON file"""
         try:
-            output_dir = Path(self.settings.KNOWLEDGE_GRAPH_BASE_DIR) / self.client_id / "graph_data"
+            output_dir = self._client_dir / "graph_data"
             output_dir.mkdir(parents=True, exist_ok=True)
             
             safe_filename = self._sanitize_filename(filename)
             json_filename = f"{safe_filename}_graph_data.json"
             json_path = output_dir / json_filename
             
-            with open(json_path, 'w', encoding='utf-8') as save:
-                json.dump(graph_data, save, indent=2, ensure_ascii=False)
+            if ORJSON_AVAILABLE:
+                json_path.write_bytes(orjson.dumps(graph_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+            else:
+                with open(json_path, 'w', encoding='utf-8') as save:
+                    json.dump(graph_data, save, indent=2, ensure_ascii=False)
             
             logger.info(f"Saved graph data to: {json_path}")
             return str(json_path)
@@ -817,6 +891,7 @@ class KnowledgeGraphService:
         # Add entities as nodes with metadata
         if "entities" in graph_data:
             logger.info(f"Processing {len(graph_data['entities'])} entities...")
+            entity_nodes = []
             for i, entity_data in enumerate(graph_data["entities"]):
                 try:
                     node_id = entity_data["id"]
@@ -864,7 +939,7 @@ class KnowledgeGraphService:
                         else:
                             node_attrs["all_descriptions"] = [entity_data["description"]]
                     
-                    graph.add_node(node_id, **node_attrs)
+                    entity_nodes.append((node_id, node_attrs))
                     
                     if i < 5:  # Log first few entities for debugging
                         logger.debug(f"Added entity {i+1}: {node_id} - {entity_data['name']}")
@@ -873,16 +948,20 @@ class KnowledgeGraphService:
                     logger.error(f"Error processing entity {i}: {e}")
                     logger.error(f"Entity data: {entity_data}")
                     continue
+            
+            graph.add_nodes_from(entity_nodes)
         
         # Add relationships as edges with metadata
         if "relationships" in graph_data:
             logger.info(f"Processing {len(graph_data['relationships'])} relationships...")
+            relationship_edges = []
+            known_node_ids = set(graph.nodes)
             for i, relationship in enumerate(graph_data["relationships"]):
                 try:
                     source_id = relationship["source"]
                     target_id = relationship["target"]
                     
-                    if source_id in graph.nodes and target_id in graph.nodes:
+                    if source_id in known_node_ids and target_id in known_node_ids:
                         edge_attrs = {
                             "relationship_type": relationship.get("type", "related"),
                             "weight": relationship.get("weight", 1.0),
@@ -895,7 +974,7 @@ class KnowledgeGraphService:
                             "target_name": relationship.get("target_name", "")
                         }
                         
-                        graph.add_edge(source_id, target_id, **edge_attrs)
+                        relationship_edges.append((source_id, target_id, edge_attrs))
                         
                         if i < 5:  # Log first few relationships for debugging
                             logger.debug(f"Added relationship {i+1}: {source_id} -> {target_id}")
@@ -906,18 +985,26 @@ class KnowledgeGraphService:
                     logger.error(f"Error processing relationship {i}: {e}")
                     logger.error(f"Relationship data: {relationship}")
                     continue
+            
+            graph.add_edges_from(relationship_edges)
         
         # Add facts as special nodes connected to entities
         if "facts" in graph_data:
             logger.info(f"Processing {len(graph_data['facts'])} facts...")
-            for i, fact in enumerate(graph_data["facts"]):
+            # Index entity names once so each fact is scanned a single time for mentions
+            find_mentioned_entities = self._build_entity_mention_matcher(graph)
+            # Derive each fact's id and lowercased text once; facts without text are skipped
+            fact_infos = [
+                (fact, fact["text"], fact["text"].lower(), f"fact_{hash(fact['text'])}")
+                for fact in graph_data["facts"]
+                if fact.get("text")
+            ]
+            for i, (fact, fact_text, fact_text_lower, fact_id) in enumerate(fact_infos):
                 try:
-                    fact_id = f"fact_{hash(fact['text'])}"
-                    
                     # Check if fact node already exists
                     if fact_id not in graph.nodes:
                         fact_attrs = {
-                            "content": fact["text"],
+                            "content": fact_text,
                             "confidence": fact.get("confidence", 0.0),
                             "chunks": fact.get("chunks", []),
                             "filename": filename,
@@ -927,22 +1014,22 @@ class KnowledgeGraphService:
                         graph.add_node(fact_id, **fact_attrs)
                         
                         if i < 5:  # Log first few facts for debugging
-                            logger.debug(f"Added fact {i+1}: {fact_id} - {fact['text'][:50]}...")
+                            logger.debug(f"Added fact {i+1}: {fact_id} - {fact_text[:50]}...")
                     
                     # Connect fact to entities mentioned in it
-                    for entity_id, entity_info in graph.nodes(data=True):
-                        if entity_info.get("node_type") == "entity":
-                            entity_name = entity_info.get("name", "").lower()
-                            if entity_name and entity_name in fact["text"].lower():
-                                # Connect fact to entity
-                                graph.add_edge(fact_id, entity_id,
-                                             relationship_type="mentions",
-                                             weight=0.3,
-                                             confidence=fact.get("confidence", 0.0),
-                                             chunks=fact.get("chunks", []),
-                                             filename=filename,
-                                             file_path=file_path,
-                                             edge_type="fact_entity")
+                    mention_attrs = {
+                        "relationship_type": "mentions",
+                        "weight": 0.3,
+                        "confidence": fact.get("confidence", 0.0),
+                        "chunks": fact.get("chunks", []),
+                        "filename": filename,
+                        "file_path": file_path,
+                        "edge_type": "fact_entity"
+                    }
+                    graph.add_edges_from(
+                        (fact_id, entity_id, mention_attrs)
+                        for entity_id in find_mentioned_entities(fact_text_lower)
+                    )
                                 
                 except Exception as e:
                     logger.error(f"Error processing fact {i}: {e}")
@@ -952,23 +1039,110 @@ class KnowledgeGraphService:
         logger.info(f"Generated NetworkX graph with {len(graph.nodes)} nodes and {len(graph.edges)} edges")
         return graph
     
+    def _build_entity_mention_matcher(self, graph: nx.DiGraph) -> Callable[[str], List[str]]:
+        """
+        Build a matcher that finds the entity nodes whose name occurs in a text
+        
+        Args:
+            graph: Graph whose entity nodes should be matched
+            
+        Returns:
+            Callable taking a lowercased text and returning the ids of entities whose
+            lowercased name is a substring of it, in graph node order
+        """
+        entity_names = [
+            (entity_id, entity_info.get("name", "").lower())
+            for entity_id, entity_info in graph.nodes(data=True)
+            if entity_info.get("node_type") == "entity" and entity_info.get("name")
+        ]
+        
+        if not AHOCORASICK_AVAILABLE or not entity_names:
+            # Fallback: test every entity name against the text
+            def find_mentions(text: str) -> List[str]:
+                return [entity_id for entity_id, entity_name in entity_names if entity_name in text]
+            return find_mentions
+        
+        # Several entities can share a lowercased name, so each key maps to all of them
+        ids_by_name = defaultdict(list)
+        for order, (entity_id, entity_name) in enumerate(entity_names):
+            ids_by_name[entity_name].append((order, entity_id))
+        
+        automaton = ahocorasick.Automaton()
+        for entity_name, entity_ids in ids_by_name.items():
+            automaton.add_word(entity_name, entity_ids)
+        automaton.make_automaton()
+        
+        def find_mentions(text: str) -> List[str]:
+            matched = {}
+            for _, entity_ids in automaton.iter(text):
+                for order, entity_id in entity_ids:
+                    matched[order] = entity_id
+            return [matched[order] for order in sorted(matched)]
+        return find_mentions
+    
     def _get_graph_file_path(self, filename: str) -> str:
         """Get the file path for saving the graph"""
-        output_dir = Path(self.settings.KNOWLEDGE_GRAPH_BASE_DIR) / self.client_id / "graphs"
+        output_dir = self._client_dir / "graphs"
         output_dir.mkdir(parents=True, exist_ok=True)
         
         safe_filename = self._sanitize_filename(filename)
-        graph_filename = f"{safe_filename}_graph.gml"
+        graph_filename = f"{safe_filename}_graph{self._graph_file_suffix}"
         return str(output_dir / graph_filename)
     
     def _save_graph(self, graph: nx.DiGraph, file_path: str):
         """Save the knowledge graph to a file"""
         try:
-            nx.write_gml(graph, file_path)
+            self._write_graph_file(graph, Path(file_path))
             logger.info(f"Saved graph to: {file_path}")
         except Exception as e:
             logger.error(f"Error saving graph to {file_path}: {e}")
     
+    @staticmethod
+    def _is_gml_path(graph_path: Path) -> bool:
+        """Check whether a graph file holds GML rather than a pickle"""
+        return graph_path.name.endswith((".gml", ".gml.zst"))
+    
+    def _write_graph_file(self, graph: nx.DiGraph, graph_path: Path):
+        """Write a graph as a pickle, or as GML for .gml paths, compressing it when the path ends in .zst"""
+        with open(graph_path, 'wb') as f:
+            if graph_path.suffix == ".zst":
+                with zstd.ZstdCompressor(level=3).stream_writer(f) as writer:
+                    self._dump_graph(graph, writer, self._is_gml_path(graph_path))
+            else:
+                self._dump_graph(graph, f, self._is_gml_path(graph_path))
+    
+    def _read_graph_file(self, graph_path: Path) -> nx.DiGraph:
+        """Read a graph saved by _write_graph_file, including GML files saved by older versions"""
+        with open(graph_path, 'rb') as f:
+            if graph_path.suffix == ".zst":
+                with zstd.ZstdDecompressor().stream_reader(f) as reader:
+                    # Buffer the decompressed stream, since read_gml iterates it line by line
+                    return self._load_graph(io.BufferedReader(reader), self._is_gml_path(graph_path))
+            return self._load_graph(f, self._is_gml_path(graph_path))
+    
+    @staticmethod
+    def _dump_graph(graph: nx.DiGraph, f, as_gml: bool):
+        """Write a graph to an open binary file as GML or as a pickle"""
+        if as_gml:
+            nx.write_gml(graph, f)
+        else:
+            pickle.dump(graph, f, protocol=5)
+    
+    @staticmethod
+    def _load_graph(f, as_gml: bool) -> nx.DiGraph:
+        """Read a graph from an open binary file written by _dump_graph"""
+        if as_gml:
+            return nx.read_gml(f)
+        return pickle.load(f)
+    
+    def _readable_graph_suffixes(self) -> List[str]:
+        """Graph file suffixes this install can read, most preferred first"""
+        suffixes = [".pkl", ".gml"]
+        if ZSTANDARD_AVAILABLE:
+            suffixes.insert(0, ".pkl.zst")
+            suffixes.insert(2, ".gml.zst")
+        return suffixes
+    
     async def _cluster_networkx_graphs(self, graphs: List[nx.DiGraph]) -> nx.DiGraph:
         """Cluster knowledge graphs using entity similarity and graph structure"""
         if not graphs:
@@ -979,18 +1153,18 @@ class KnowledgeGraphService:
         
         logger.info(f"Clustering {len(graphs)} graphs...")
         
-        # Extract entity names and descriptions for similarity calculation
+        # Extract entity names and descriptions for similarity calculation; graphs are
+        # independent, so they are scanned concurrently and flattened in graph order
         all_entities = []
         entity_to_graph = {}
         
-        for i, graph in enumerate(graphs):
-            for node, attrs in graph.nodes(data=True):
-                if attrs.get("node_type") == "entity":
-                    entity_name = attrs.get("name", "")
-                    entity_desc = attrs.get("description", "")
-                    if entity_name:
-                        all_entities.append(f"{entity_name} {entity_desc}".strip())
-                        entity_to_graph[node] = i
+        with ThreadPoolExecutor(max_workers=min(self.settings.MAX_THREADS, len(graphs))) as executor:
+            extracted = list(executor.map(self._extract_entity_texts, range(len(graphs)), graphs))
+        
+        for entity_texts in extracted:
+            for node, entity_text, graph_index in entity_texts:
+                all_entities.append(entity_text)
+                entity_to_graph[node] = graph_index
         
         if not all_entities:
             logger.warning("No entities found for clustering, using simple union")
@@ -998,68 +1172,97 @@ class KnowledgeGraphService:
         
         # Use TF-IDF and cosine similarity for entity clustering
         try:
-            vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
-            entity_vectors = vectorizer.fit_transform(all_entities)
+            # The same entity text often appears in several graphs; vectorize each
+            # distinct text once and weight it by its count so DBSCAN still sees
+            # every occurrence when deciding core points
+            unique_entities, inverse, counts = np.unique(
+                np.asarray(all_entities, dtype=object), return_inverse=True, return_counts=True
+            )
             
-            # Calculate similarity matrix
-            similarity_matrix = cosine_similarity(entity_vectors)
+            # Hashing needs no vocabulary fit, so only the cheap IDF step is fitted per call
+            entity_counts = self._entity_vectorizer.transform(unique_entities)
+            entity_vectors = TfidfTransformer().fit_transform(entity_counts)
             
-            # Use DBSCAN for clustering
-            clustering = DBSCAN(eps=0.3, min_samples=2).fit(similarity_matrix)
-            cluster_labels = clustering.labels_
+            # Use DBSCAN with cosine distance directly on the sparse TF-IDF matrix so
+            # neighbourhoods are computed on demand instead of via a dense N x N matrix
+            clustering = DBSCAN(eps=0.3, min_samples=2, metric="cosine").fit(
+                entity_vectors, sample_weight=counts
+            )
+            # Expand labels back to one per entity in all_entities
+            cluster_labels = clustering.labels_[inverse]
             
             logger.info(f"Entity clustering: {len(set(cluster_labels))} clusters found")
             
             # Create clustered graph
             clustered_graph = self._create_clustered_graph(graphs, entity_to_graph, cluster_labels)
             
+            # Generate embeddings for the clustered graph, which becomes the main graph
+            logger.info("Generating embeddings for clustered graph...")
+            self.graph = clustered_graph
+            embedding_result = await self.generate_graph_embeddings()
+            if embedding_result.get("success"):
+                logger.info(f"Generated embeddings: {embedding_result['node_embeddings_count']} nodes, {embedding_result['edge_embeddings_count']} edges")
+            else:
+                logger.warning(f"Failed to generate embeddings: {embedding_result.get('error', 'Unknown error')}")
+            
             return clustered_graph
             
         except Exception as e:
             logger.error(f"Error in advanced clustering: {e}, falling back to simple union")
             return self._simple_union_graphs(graphs)
     
+    def _extract_entity_texts(self, graph_index: int, graph: nx.DiGraph) -> List[Tuple[str, str, int]]:
+        """Extract (node id, clustering text, graph index) for every named entity in a graph"""
+        entity_texts = []
+        for node, attrs in graph.nodes(data=True):
+            if attrs.get("node_type") == "entity":
+                # Whitespace-only names would only add empty rows to the TF-IDF matrix
+                entity_name = attrs.get("name", "").strip()
+                if not entity_name:
+                    continue
+                # Cap very long descriptions so they don't dominate vectorization cost
+                entity_desc = attrs.get("description", "")[:self._max_cluster_description_chars]
+                entity_texts.append((node, f"{entity_name} {entity_desc}".strip(), graph_index))
+        return entity_texts
+    
     def _create_clustered_graph(self, graphs: List[nx.DiGraph], entity_to_graph: dict, cluster_labels: List[int]) -> nx.DiGraph:
         """Create a clustered graph based on entity similarity with complete metadata preservation"""
         clustered_graph = nx.DiGraph()
         
-        # Group entities by cluster
-        cluster_entities = defaultdict(list)
-        for i, label in enumerate(cluster_labels):
-            if label >= 0:  # Skip noise points
-                cluster_entities[label].append(i)
+        # Group entity indices by cluster label in numpy, skipping noise points (label -1)
+        labels = np.asarray(cluster_labels)
+        clustered_indices = np.flatnonzero(labels >= 0)
+        sorted_indices = clustered_indices[np.argsort(labels[clustered_indices], kind="stable")]
+        unique_labels, group_starts = np.unique(labels[sorted_indices], return_index=True)
+        cluster_entities = dict(zip(unique_labels.tolist(), np.split(sorted_indices, group_starts[1:])))
         
         # Create unified entities for each cluster with merged metadata
         entity_mapping = {}  # Maps all entity IDs to their unified ID
         unified_entities = {}  # Stores unified entity data
         
+        # Materialize the entity keys once; cluster indices refer to positions in this list
+        entity_keys = list(entity_to_graph.keys())
+        
+        # Score every entity once with the importance scoring (frequency + connections + facts)
+        # so each cluster's representative is a single argmax over its members
+        entity_attrs = [graphs[entity_to_graph[entity_name]].nodes.get(entity_name) for entity_name in entity_keys]
+        missing_attrs = np.array([attrs is None for attrs in entity_attrs], dtype=bool)
+        frequencies = np.array([attrs.get('frequency', 1) if attrs is not None else 0 for attrs in entity_attrs], dtype=float)
+        connections = np.array([attrs.get('total_connections', 0) if attrs is not None else 0 for attrs in entity_attrs], dtype=float)
+        facts = np.array([attrs.get('total_facts', 0) if attrs is not None else 0 for attrs in entity_attrs], dtype=float)
+        entity_scores = (frequencies * 2) + (connections * 1.5) + (facts * 1.0)
+        entity_scores[missing_attrs] = -np.inf
+        
         for cluster_id, entity_indices in cluster_entities.items():
             # Get all entity names in this cluster
-            cluster_entity_names = [list(entity_to_graph.keys())[i] for i in entity_indices]
-            
-            # Find the best representative entity using new importance scoring
-            best_entity = None
-            best_score = -1
-            
-            for entity_name in cluster_entity_names:
-                # Find which graph contains this entity
-                graph_idx = entity_to_graph[entity_name]
-                graph = graphs[graph_idx]
-                
-                if entity_name in graph.nodes:
-                    attrs = graph.nodes[entity_name]
-                    # Use new importance scoring: frequency + connections + facts
-                    frequency = attrs.get('frequency', 1)
-                    connections = attrs.get('total_connections', 0)
-                    facts = attrs.get('total_facts', 0)
-                    score = (frequency * 2) + (connections * 1.5) + (facts * 1.0)
-                    
-                    if score > best_score:
-                        best_score = score
-                        best_entity = entity_name
+            cluster_entity_names = [entity_keys[i] for i in entity_indices]
             
-            if best_entity is None:
+            # Find the best representative entity (first one with the highest score)
+            cluster_scores = entity_scores[entity_indices]
+            best_position = int(np.argmax(cluster_scores))
+            if cluster_scores[best_position] == -np.inf:
                 continue
+            best_entity = cluster_entity_names[best_position]
                 
             # Create unified entity ID
             unified_id = f"clustered_entity_{cluster_id}"
@@ -1116,20 +1319,6 @@ class KnowledgeGraphService:
         logger.info(f"Created clustered graph with {len(clustered_graph.nodes)} nodes and {len(clustered_graph.edges)} edges")
         logger.info(f"Clustered {len(entity_mapping)} entities into {len(unified_entities)} unified entities")
         
-        # Generate embeddings for the clustered graph
-        logger.info("Generating embeddings for clustered graph...")
-        # Set the graph to generate embeddings (this will be the main graph)
-        self.graph = clustered_graph
-        
-        # Generate embeddings
-        embedding_result = self.generate_graph_embeddings()
-        if embedding_result.get("success"):
-            logger.info(f"Generated embeddings: {embedding_result['node_embeddings_count']} nodes, {embedding_result['edge_embeddings_count']} edges")
-        else:
-            logger.warning(f"Failed to generate embeddings: {embedding_result.get('error', 'Unknown error')}")
-        
-        # Note: Don't restore the original graph - the clustered graph should be the main graph
-        
         return clustered_graph
     
     def _merge_cluster_entity_attributes(self, cluster_entity_names: List[str], graphs: List[nx.DiGraph], 
@@ -1137,49 +1326,48 @@ class KnowledgeGraphService:
         """Merge attributes from all entities in a cluster"""
         merged_attrs = dict(base_attrs)
         
-        # Initialize merged collections
-        all_chunks = set(base_attrs.get('chunks', []))
-        all_filenames = set([base_attrs.get('filename', '')])
-        all_file_paths = set([base_attrs.get('file_path', '')])
-        all_types = set([base_attrs.get('type', '')])
-        all_descriptions = set([base_attrs.get('description', '')])
-        total_frequency = base_attrs.get('frequency', 1)
-        entity_count = 1
-        
-        # Collect metadata from all entities in the cluster
+        # Initialize merged collections; string values are deduplicated with dicts so the
+        # joined fields keep first-seen order without sorting every cluster
+        all_chunks = set()
+        all_filenames = {}
+        all_file_paths = {}
+        all_types = {}
+        all_descriptions = {}
+        total_frequency = 0
+        entity_count = 0
+        
+        # Collect metadata from all entities in the cluster in a single pass; the base
+        # entity is itself a cluster member, so it is counted here exactly once
         for entity_name in cluster_entity_names:
-            graph_idx = entity_to_graph[entity_name]
-            graph = graphs[graph_idx]
+            attrs = graphs[entity_to_graph[entity_name]].nodes.get(entity_name)
+            if attrs is None:
+                continue
             
-            if entity_name in graph.nodes:
-                attrs = graph.nodes[entity_name]
-                
-                # Merge chunks
-                if 'chunks' in attrs:
-                    all_chunks.update(attrs['chunks'])
-                
-                # Merge filenames and file paths
-                if 'filename' in attrs:
-                    all_filenames.add(attrs['filename'])
-                if 'file_path' in attrs:
-                    all_file_paths.add(attrs['file_path'])
-                
-                # Merge types and descriptions
-                if 'type' in attrs and attrs['type']:
-                    all_types.add(attrs['type'])
-                if 'description' in attrs and attrs['description']:
-                    all_descriptions.add(attrs['description'])
-                
-                # Accumulate frequency
-                total_frequency += attrs.get('frequency', 1)
-                entity_count += 1
+            # Merge chunks
+            all_chunks.update(attrs.get('chunks', ()))
+            
+            # Merge filenames and file paths
+            if 'filename' in attrs:
+                all_filenames[attrs['filename']] = None
+            if 'file_path' in attrs:
+                all_file_paths[attrs['file_path']] = None
+            
+            # Merge types and descriptions
+            if attrs.get('type'):
+                all_types[attrs['type']] = None
+            if attrs.get('description'):
+                all_descriptions[attrs['description']] = None
+            
+            # Accumulate frequency
+            total_frequency += attrs.get('frequency', 1)
+            entity_count += 1
         
         # Update merged attributes
         merged_attrs['chunks'] = sorted(list(all_chunks))
-        merged_attrs['filename'] = ' ||| '.join(sorted(all_filenames)) if all_filenames else ''
-        merged_attrs['file_path'] = ' ||| '.join(sorted(all_file_paths)) if all_file_paths else ''
-        merged_attrs['type'] = ' ||| '.join(sorted(all_types)) if all_types else 'unknown'
-        merged_attrs['description'] = ' ||| '.join(sorted(all_descriptions)) if all_descriptions else ''
+        merged_attrs['filename'] = ' ||| '.join(all_filenames) if all_filenames else ''
+        merged_attrs['file_path'] = ' ||| '.join(all_file_paths) if all_file_paths else ''
+        merged_attrs['type'] = ' ||| '.join(all_types) if all_types else 'unknown'
+        merged_attrs['description'] = ' ||| '.join(all_descriptions) if all_descriptions else ''
         merged_attrs['frequency'] = total_frequency
         merged_attrs['cluster_size'] = entity_count
         merged_attrs['clustered'] = True
@@ -1191,115 +1379,108 @@ class KnowledgeGraphService:
         """Simple union of all graphs when clustering fails, preserving all metadata"""
         clustered_graph = nx.DiGraph()
         
-        # Add all nodes from all graphs with their metadata
+        # Collect every copy of each node and edge in one pass over the graphs
+        node_bucket: Dict[Any, List[dict]] = defaultdict(list)
+        edge_bucket: Dict[Tuple[Any, Any], List[dict]] = defaultdict(list)
         for graph in graphs:
             for node, attrs in graph.nodes(data=True):
-                if node not in clustered_graph.nodes:
-                    # Add node with all its metadata
-                    clustered_graph.add_node(node, **attrs)
-                else:
-                    # Node already exists, merge metadata if needed
-                    existing_attrs = dict(clustered_graph.nodes[node])
-                    merged_attrs = self._merge_duplicate_node_attributes(existing_attrs, attrs)
-                    clustered_graph.nodes[node].update(merged_attrs)
-        
-        # Add all edges from all graphs with their metadata
-        for graph in graphs:
+                node_bucket[node].append(attrs)
             for source, target, attrs in graph.edges(data=True):
-                if not clustered_graph.has_edge(source, target):
-                    # Add edge with all its metadata
-                    clustered_graph.add_edge(source, target, **attrs)
-                else:
-                    # Edge already exists, merge metadata if needed
-                    existing_attrs = dict(clustered_graph.edges[source, target])
-                    merged_attrs = self._merge_duplicate_edge_attributes(existing_attrs, attrs)
-                    clustered_graph.edges[source, target].update(merged_attrs)
+                edge_bucket[(source, target)].append(attrs)
+        
+        # Add each node and edge once with the metadata of its first copy
+        clustered_graph.add_nodes_from((node, attrs_list[0]) for node, attrs_list in node_bucket.items())
+        clustered_graph.add_edges_from(
+            (source, target, attrs_list[0]) for (source, target), attrs_list in edge_bucket.items()
+        )
+        
+        # Merge the other copies straight into the graph's own attribute dicts
+        for node, attrs_list in node_bucket.items():
+            if len(attrs_list) > 1:
+                self._merge_many_node_attributes(clustered_graph.nodes[node], attrs_list)
+        for (source, target), attrs_list in edge_bucket.items():
+            if len(attrs_list) > 1:
+                self._merge_many_edge_attributes(clustered_graph[source][target], attrs_list)
         
         logger.info(f"Simple union created graph with {len(clustered_graph.nodes)} nodes and {len(clustered_graph.edges)} edges")
         return clustered_graph
     
-    def _merge_duplicate_node_attributes(self, existing_attrs: dict, new_attrs: dict) -> dict:
-        """Merge attributes when a node appears in multiple graphs"""
-        merged = dict(existing_attrs)
-        
-        # Merge chunks
-        existing_chunks = set(existing_attrs.get('chunks', []))
-        new_chunks = set(new_attrs.get('chunks', []))
-        merged['chunks'] = sorted(list(existing_chunks | new_chunks))
-        
-        # Merge filenames and file paths
-        existing_filenames = set(existing_attrs.get('filename', '').split(' ||| ') if existing_attrs.get('filename') else [])
-        new_filenames = set([new_attrs.get('filename', '')] if new_attrs.get('filename') else [])
-        merged['filename'] = ' ||| '.join(sorted(existing_filenames | new_filenames)) if (existing_filenames | new_filenames) else ''
-        
-        existing_file_paths = set(existing_attrs.get('file_path', '').split(' ||| ') if existing_attrs.get('file_path') else [])
-        new_file_paths = set([new_attrs.get('file_path', '')] if new_attrs.get('file_path') else [])
-        merged['file_path'] = ' ||| '.join(sorted(existing_file_paths | new_file_paths)) if (existing_file_paths | new_file_paths) else ''
+    @staticmethod
+    def _pipe_split(value: str):
+        """Split a ' ||| '-joined attribute into its parts"""
+        return value.split(' ||| ') if value else ()
+    
+    @staticmethod
+    def _chunk_set(attrs: dict) -> set:
+        """Chunks of a node or edge, from either the chunks or the older chunk_index attribute"""
+        if 'chunks' in attrs:
+            return set(attrs['chunks'])
+        if 'chunk_index' in attrs:
+            return set(attrs['chunk_index'])
+        return set()
+    
+    @staticmethod
+    def _join_pipe_values(first_value: str, value_sets: List[set]) -> str:
+        """Join the union of every copy's values, keeping the first copy's string if it has them all"""
+        values = set().union(*value_sets)
+        if len(values) == len(value_sets[0]):
+            return first_value
+        return ' ||| '.join(sorted(values))
+    
+    def _merge_sources(self, merged: dict, attrs_list: List[dict]):
+        """Merge chunks, filenames and file paths of every copy into merged, which starts as the first copy"""
+        first = attrs_list[0]
+        
+        # Split each copy's sources once for both the repeat check and the union
+        chunk_sets = [self._chunk_set(attrs) for attrs in attrs_list]
+        filename_sets = [set(self._pipe_split(attrs.get('filename', ''))) for attrs in attrs_list]
+        file_path_sets = [set(self._pipe_split(attrs.get('file_path', ''))) for attrs in attrs_list]
+        
+        # Repeats of the first copy's sources leave them untouched, once its chunks are sorted and unique
+        if 'chunks' in first and first['chunks'] == sorted(chunk_sets[0]) and all(
+            chunks <= chunk_sets[0] and filenames <= filename_sets[0] and file_paths <= file_path_sets[0]
+            for chunks, filenames, file_paths in zip(chunk_sets[1:], filename_sets[1:], file_path_sets[1:])
+        ):
+            return
+        
+        merged['chunks'] = sorted(set().union(*chunk_sets))
+        merged['filename'] = self._join_pipe_values(first.get('filename', ''), filename_sets)
+        merged['file_path'] = self._join_pipe_values(first.get('file_path', ''), file_path_sets)
+    
+    def _merge_many_node_attributes(self, merged: dict, attrs_list: List[dict]):
+        """Merge attributes of every copy of a node that appears in multiple graphs into merged, in place"""
+        self._merge_sources(merged, attrs_list)
         
         # Accumulate frequency
-        existing_freq = existing_attrs.get('frequency', 1)
-        new_freq = new_attrs.get('frequency', 1)
-        merged['frequency'] = existing_freq + new_freq
+        merged['frequency'] = sum(attrs.get('frequency', 1) for attrs in attrs_list)
         
         # Mark as merged
         merged['merged'] = True
-        merged['merge_count'] = existing_attrs.get('merge_count', 1) + 1
-        
-        return merged
+        merged['merge_count'] = attrs_list[0].get('merge_count', 1) + len(attrs_list) - 1
     
-    def _merge_duplicate_edge_attributes(self, existing_attrs: dict, new_attrs: dict) -> dict:
-        """Merge attributes when an edge appears in multiple graphs"""
-        merged = dict(existing_attrs)
-        
-        # Merge chunks - handle both old chunk_index and new chunks format
-        existing_chunks = set()
-        new_chunks = set()
-        
-        # Handle existing chunks
-        if 'chunks' in existing_attrs:
-            existing_chunks = set(existing_attrs['chunks'])
-        elif 'chunk_index' in existing_attrs:
-            existing_chunks = set(existing_attrs['chunk_index'])
-        
-        # Handle new chunks
-        if 'chunks' in new_attrs:
-            new_chunks = set(new_attrs['chunks'])
-        elif 'chunk_index' in new_attrs:
-            new_chunks = set(new_attrs['chunk_index'])
-        
-        merged['chunks'] = sorted(list(existing_chunks | new_chunks))
-        
-        # Merge filenames and file paths
-        existing_filenames = set(existing_attrs.get('filename', '').split(' ||| ') if existing_attrs.get('filename') else [])
-        new_filenames = set([new_attrs.get('filename', '')] if new_attrs.get('filename') else [])
-        merged['filename'] = ' ||| '.join(sorted(existing_filenames | new_filenames)) if (existing_filenames | new_filenames) else ''
-        
-        existing_file_paths = set(existing_attrs.get('file_path', '').split(' ||| ') if existing_attrs.get('file_path') else [])
-        new_file_paths = set([new_attrs.get('file_path', '')] if new_attrs.get('file_path') else [])
-        merged['file_path'] = ' ||| '.join(sorted(existing_file_paths | new_file_paths)) if (existing_file_paths | new_file_paths) else ''
-        
-        # Handle weight if present
-        if 'weight' in existing_attrs and 'weight' in new_attrs:
-            existing_weight = existing_attrs.get('weight', 1.0)
-            new_weight = new_attrs.get('weight', 1.0)
-            merged['weight'] = round((existing_weight + new_weight) / 2, 3)  # Average weight
+    def _merge_many_edge_attributes(self, merged: dict, attrs_list: List[dict]):
+        """Merge attributes of every copy of an edge that appears in multiple graphs into merged, in place"""
+        self._merge_sources(merged, attrs_list)
+        
+        # Handle weight if present, averaging it in one copy at a time
+        if 'weight' in merged:
+            weight = merged['weight']
+            for attrs in attrs_list[1:]:
+                if 'weight' in attrs:
+                    weight = round((weight + attrs['weight']) / 2, 3)
+            merged['weight'] = weight
         
         # Mark as merged
         merged['merged'] = True
-        merged['merge_count'] = existing_attrs.get('merge_count', 1) + 1
-        
-        return merged
+        merged['merge_count'] = attrs_list[0].get('merge_count', 1) + len(attrs_list) - 1
     
     async def _save_clustered_graph(self):
         """Save the clustered graph to file"""
         try:
-            output_dir = Path(self.settings.KNOWLEDGE_GRAPH_BASE_DIR) / self.client_id / "clustered_graphs"
-            output_dir.mkdir(parents=True, exist_ok=True)
+            graph_path = self._get_clustered_graph_path(self._graph_file_suffix)
+            graph_path.parent.mkdir(parents=True, exist_ok=True)
             
-            graph_filename = f"clustered_graph_{self.client_id}.gml"
-            graph_path = output_dir / graph_filename
-            
-            nx.write_gml(self.graph, str(graph_path))
+            self._write_graph_file(self.graph, graph_path)
             logger.info(f"Saved clustered graph to: {graph_path}")
             
             # Also save embeddings if they exist
@@ -1315,14 +1496,35 @@ class KnowledgeGraphService:
         except Exception as e:
             logger.error(f"Error saving clustered graph: {e}")
     
+    def export_clustered_graph_to_gml(self) -> str:
+        """Write the clustered graph as GML for use in other graph tools"""
+        try:
+            graph_path = self._get_clustered_graph_path(self._gml_file_suffix)
+            graph_path.parent.mkdir(parents=True, exist_ok=True)
+            self._write_graph_file(self.graph, graph_path)
+            logger.info(f"Exported clustered graph to: {graph_path}")
+            return str(graph_path)
+        except Exception as e:
+            logger.error(f"Error exporting clustered graph: {e}")
+            return ""
+    
+    def _get_clustered_graph_path(self, suffix: str) -> Path:
+        """Get the path of this client's clustered graph file with the given suffix"""
+        output_dir = self._client_dir / "clustered_graphs"
+        return output_dir / f"clustered_graph_{self.client_id}{suffix}"
+    
+    def _find_clustered_graph_path(self) -> Optional[Path]:
+        """Find the saved clustered graph, preferring pickles over GML saved by older versions"""
+        for suffix in self._readable_graph_suffixes():
+            graph_path = self._get_clustered_graph_path(suffix)
+            if graph_path.exists():
+                return graph_path
+        return None
+    
     def clustered_graph_exists(self) -> bool:
         """Check if a clustered graph already exists for this client"""
         try:
-            output_dir = Path(self.settings.KNOWLEDGE_GRAPH_BASE_DIR) / self.client_id / "clustered_graphs"
-            graph_filename = f"clustered_graph_{self.client_id}.gml"
-            graph_path = output_dir / graph_filename
-            
-            return graph_path.exists()
+            return self._find_clustered_graph_path() is not None
         except Exception as e:
             logger.error(f"Error checking if clustered graph exists: {e}")
             return False
@@ -1330,16 +1532,13 @@ class KnowledgeGraphService:
     async def load_existing_clustered_graph(self) -> bool:
         """Load an existing clustered graph if it exists"""
         try:
-            output_dir = Path(self.settings.KNOWLEDGE_GRAPH_BASE_DIR) / self.client_id / "clustered_graphs"
-            graph_filename = f"clustered_graph_{self.client_id}.gml"
-            graph_path = output_dir / graph_filename
-            
-            if not graph_path.exists():
+            graph_path = self._find_clustered_graph_path()
+            if graph_path is None:
                 logger.info(f"No existing clustered graph found for client {self.client_id}")
                 return False
             
             # Load the existing clustered graph
-            self.graph = nx.read_gml(str(graph_path))
+            self.graph = self._read_graph_file(graph_path)
             logger.info(f"Loaded existing clustered graph for client {self.client_id}: {len(self.graph.nodes)} nodes, {len(self.graph.edges)} edges")
             
             # Also try to load individual file graphs if they exist
@@ -1364,43 +1563,61 @@ class KnowledgeGraphService:
     async def _load_existing_file_graphs(self):
         """Load existing individual file graphs if they exist"""
         try:
-            graphs_dir = Path(self.settings.KNOWLEDGE_GRAPH_BASE_DIR) / self.client_id / "graphs"
-            graph_data_dir = Path(self.settings.KNOWLEDGE_GRAPH_BASE_DIR) / self.client_id / "graph_data"
+            graphs_dir = self._client_dir / "graphs"
+            graph_data_dir = self._client_dir / "graph_data"
             
             if not graphs_dir.exists() or not graph_data_dir.exists():
                 return
             
-            # Find all graph files
-            graph_files = list(graphs_dir.glob("*_graph.gml"))
+            # Find all graph files, keeping the most preferred format for each file
+            graph_files = {}
+            for suffix in reversed(self._readable_graph_suffixes()):
+                for graph_file in graphs_dir.glob(f"*_graph{suffix}"):
+                    graph_files[graph_file.name[:-len(f"_graph{suffix}")]] = graph_file
             
-            for graph_file in graph_files:
-                try:
-                    # Extract filename from graph file name
-                    filename = graph_file.stem.replace("_graph", "")
-                    
-                    # Load the graph
-                    graph = nx.read_gml(str(graph_file))
-                    self.file_graphs[filename] = graph
-                    
-                    # Try to load corresponding graph data
-                    graph_data_file = graph_data_dir / f"{filename}_graph_data.json"
-                    if graph_data_file.exists():
-                        import json
-                        with open(graph_data_file, 'r', encoding='utf-8') as f:
-                            graph_data = json.load(f)
-                        self.file_graph_data[filename] = graph_data
-                    
-                    logger.info(f"Loaded existing file graph for {filename}")
-                    
-                except Exception as e:
-                    logger.warning(f"Error loading file graph {graph_file}: {e}")
+            # Parse the files in worker threads, at most MAX_THREADS at a time
+            semaphore = asyncio.Semaphore(self.settings.MAX_THREADS)
+            
+            async def load_limited(filename: str, graph_file: Path):
+                async with semaphore:
+                    return await asyncio.to_thread(self._load_file_graph, filename, graph_file, graph_data_dir)
+            
+            results = await asyncio.gather(
+                *(load_limited(filename, graph_file) for filename, graph_file in graph_files.items()),
+                return_exceptions=True
+            )
+            
+            # Store the results on the event loop thread
+            for (filename, graph_file), result in zip(graph_files.items(), results):
+                if isinstance(result, Exception):
+                    logger.warning(f"Error loading file graph {graph_file}: {result}")
                     continue
+                
+                graph, graph_data = result
+                self.file_graphs[filename] = graph
+                if graph_data is not None:
+                    self.file_graph_data[filename] = graph_data
+                logger.info(f"Loaded existing file graph for {filename}")
             
             logger.info(f"Loaded {len(self.file_graphs)} existing file graphs")
             
         except Exception as e:
             logger.error(f"Error loading existing file graphs: {e}")
     
+    def _load_file_graph(self, filename: str, graph_file: Path, graph_data_dir: Path) -> Tuple[nx.DiGraph, Optional[dict]]:
+        """Load one file graph and its graph data, if saved"""
+        # Load the graph
+        graph = self._read_graph_file(graph_file)
+        
+        # Try to load corresponding graph data
+        graph_data = None
+        graph_data_file = graph_data_dir / f"{filename}_graph_data.json"
+        if graph_data_file.exists():
+            with open(graph_data_file, 'r', encoding='utf-8') as f:
+                graph_data = json.load(f)
+        
+        return graph, graph_data
+    
     def get_graph_statistics(self) -> Dict[str, Any]:
         """Get comprehensive statistics about the knowledge graph"""
         try:
@@ -1409,40 +1626,30 @@ class KnowledgeGraphService:
             
             # Basic graph statistics
             stats = {
-                "total_nodes": len(self.graph.nodes),
-                "total_edges": len(self.graph.edges),
+                "total_nodes": self.graph.number_of_nodes(),
+                "total_edges": self.graph.number_of_edges(),
                 "file_graphs_count": len(self.file_graphs),
                 "file_graph_data_count": len(self.file_graph_data)
             }
             
-            # Node type breakdown
-            node_types = {}
-            for node, attrs in self.graph.nodes(data=True):
-                node_type = attrs.get("node_type", "unknown")
-                if node_type not in node_types:
-                    node_types[node_type] = 0
-                node_types[node_type] += 1
-            stats["node_types"] = node_types
-            
-            # Edge type breakdown
-            edge_types = {}
-            for source, target, attrs in self.graph.edges(data=True):
-                edge_type = attrs.get("edge_type", "unknown")
-                if edge_type not in edge_types:
-                    edge_types[edge_type] = 0
-                edge_types[edge_type] += 1
-            stats["edge_types"] = edge_types
+            # Gather every node and edge aggregate in one pass over each
+            node_scan = self._scan_nodes()
+            edge_scan = self._scan_edges()
+            
+            # Node and edge type breakdowns
+            stats["node_types"] = dict(node_scan["node_types"])
+            stats["edge_types"] = dict(edge_scan["edge_types"])
             
             # Clustering statistics
-            clustering_stats = self._get_clustering_statistics()
+            clustering_stats = self._get_clustering_statistics(node_scan, edge_scan)
             stats["clustering"] = clustering_stats
             
             # Entity statistics
-            entity_stats = self._get_entity_statistics()
+            entity_stats = self._get_entity_statistics(node_scan)
             stats["entities"] = entity_stats
             
             # Relationship statistics
-            relationship_stats = self._get_relationship_statistics()
+            relationship_stats = self._get_relationship_statistics(edge_scan)
             stats["relationships"] = relationship_stats
             
             return stats
@@ -1451,36 +1658,86 @@ class KnowledgeGraphService:
             logger.error(f"Error getting graph statistics: {e}")
             return {"error": str(e)}
     
-    def _get_clustering_statistics(self) -> Dict[str, Any]:
+    def _scan_nodes(self) -> Dict[str, Any]:
+        """Collect the node aggregates used by the graph statistics in a single pass"""
+        node_types = Counter()
+        cluster_sizes = []
+        merged_count = 0
+        entity_count = 0
+        total_frequency = 0
+        entity_types = Counter()
+        source_files = set()
+        
+        for node, attrs in self.graph.nodes(data=True):
+            node_type = attrs.get("node_type", "unknown")
+            node_types[node_type] += 1
+            if attrs.get("clustered"):
+                cluster_sizes.append(attrs.get("cluster_size", 1))
+            if attrs.get("merged"):
+                merged_count += 1
+            
+            if node_type == "entity":
+                entity_count += 1
+                total_frequency += attrs.get("frequency", 1)
+                entity_types[attrs.get("type", "unknown")] += 1
+                if attrs.get("filename"):
+                    source_files.update(attrs["filename"].split(" ||| "))
+        
+        return {
+            "node_types": node_types,
+            "cluster_sizes": cluster_sizes,
+            "merged_count": merged_count,
+            "entity_count": entity_count,
+            "total_frequency": total_frequency,
+            "entity_types": entity_types,
+            "source_files": source_files
+        }
+    
+    def _scan_edges(self) -> Dict[str, Any]:
+        """Collect the edge aggregates used by the graph statistics in a single pass"""
+        edge_types = Counter()
+        clustered_count = 0
+        merged_count = 0
+        relationship_count = 0
+        total_weight = 0
+        relationship_types = Counter()
+        source_files = set()
+        
+        for source, target, attrs in self.graph.edges(data=True):
+            edge_type = attrs.get("edge_type", "unknown")
+            edge_types[edge_type] += 1
+            if attrs.get("clustered"):
+                clustered_count += 1
+            if attrs.get("merged"):
+                merged_count += 1
+            
+            if edge_type in ("entity_connection", "relationship"):
+                relationship_count += 1
+                total_weight += attrs.get("weight", 1.0)
+                relationship_types[attrs.get("relationship_type", "unknown")] += 1
+                if attrs.get("filename"):
+                    source_files.update(attrs["filename"].split(" ||| "))
+        
+        return {
+            "edge_types": edge_types,
+            "clustered_count": clustered_count,
+            "merged_count": merged_count,
+            "relationship_count": relationship_count,
+            "total_weight": total_weight,
+            "relationship_types": relationship_types,
+            "source_files": source_files
+        }
+    
+    def _get_clustering_statistics(self, node_scan: Dict[str, Any], edge_scan: Dict[str, Any]) -> Dict[str, Any]:
         """Get detailed clustering statistics"""
         try:
-            clustered_entities = 0
-            clustered_edges = 0
-            cluster_sizes = []
-            merged_nodes = 0
-            merged_edges = 0
-            
-            # Count clustered entities
-            for node, attrs in self.graph.nodes(data=True):
-                if attrs.get("clustered"):
-                    clustered_entities += 1
-                    cluster_size = attrs.get("cluster_size", 1)
-                    cluster_sizes.append(cluster_size)
-                if attrs.get("merged"):
-                    merged_nodes += 1
-            
-            # Count clustered edges
-            for source, target, attrs in self.graph.edges(data=True):
-                if attrs.get("clustered"):
-                    clustered_edges += 1
-                if attrs.get("merged"):
-                    merged_edges += 1
+            cluster_sizes = node_scan["cluster_sizes"]
             
             return {
-                "clustered_entities": clustered_entities,
-                "clustered_edges": clustered_edges,
-                "merged_nodes": merged_nodes,
-                "merged_edges": merged_edges,
+                "clustered_entities": len(cluster_sizes),
+                "clustered_edges": edge_scan["clustered_count"],
+                "merged_nodes": node_scan["merged_count"],
+                "merged_edges": edge_scan["merged_count"],
                 "cluster_sizes": {
                     "min": min(cluster_sizes) if cluster_sizes else 0,
                     "max": max(cluster_sizes) if cluster_sizes else 0,
@@ -1496,84 +1753,42 @@ class KnowledgeGraphService:
     def _get_cluster_size_distribution(self, cluster_sizes: List[int]) -> Dict[str, int]:
         """Get distribution of cluster sizes"""
         try:
-            distribution = {"small": 0, "medium": 0, "large": 0}
+            # Bucket 0 holds sizes up to 2, bucket 1 sizes up to 5, bucket 2 the rest
+            buckets = np.digitize(np.asarray(cluster_sizes, dtype=np.int64), [2, 5], right=True)
+            small, medium, large = np.bincount(buckets, minlength=3).tolist()
             
-            for size in cluster_sizes:
-                if size <= 2:
-                    distribution["small"] += 1
-                elif size <= 5:
-                    distribution["medium"] += 1
-                else:
-                    distribution["large"] += 1
-            
-            return distribution
+            return {"small": small, "medium": medium, "large": large}
             
         except Exception as e:
             logger.error(f"Error getting cluster size distribution: {e}")
             return {"error": str(e)}
     
-    def _get_entity_statistics(self) -> Dict[str, Any]:
+    def _get_entity_statistics(self, node_scan: Dict[str, Any]) -> Dict[str, Any]:
         """Get detailed entity statistics"""
         try:
-            entity_count = 0
-            total_frequency = 0
-            entity_types = {}
-            source_files = set()
-            
-            for node, attrs in self.graph.nodes(data=True):
-                if attrs.get("node_type") == "entity":
-                    entity_count += 1
-                    total_frequency += attrs.get("frequency", 1)
-                    
-                    # Entity types
-                    entity_type = attrs.get("type", "unknown")
-                    if entity_type not in entity_types:
-                        entity_types[entity_type] = 0
-                    entity_types[entity_type] += 1
-                    
-                    # Source files
-                    if attrs.get("filename"):
-                        source_files.update(attrs["filename"].split(" ||| "))
+            entity_count = node_scan["entity_count"]
             
             return {
                 "count": entity_count,
-                "average_frequency": round(total_frequency / entity_count, 2) if entity_count > 0 else 0,
-                "types": entity_types,
-                "source_files": len(source_files)
+                "average_frequency": round(node_scan["total_frequency"] / entity_count, 2) if entity_count > 0 else 0,
+                "types": dict(node_scan["entity_types"]),
+                "source_files": len(node_scan["source_files"])
             }
             
         except Exception as e:
             logger.error(f"Error getting entity statistics: {e}")
             return {"error": str(e)}
     
-    def _get_relationship_statistics(self) -> Dict[str, Any]:
+    def _get_relationship_statistics(self, edge_scan: Dict[str, Any]) -> Dict[str, Any]:
         """Get detailed relationship statistics"""
         try:
-            relationship_count = 0
-            total_weight = 0
-            relationship_types = {}
-            source_files = set()
-            
-            for source, target, attrs in self.graph.edges(data=True):
-                if attrs.get("edge_type") in ["entity_connection", "relationship"]:
-                    relationship_count += 1
-                    total_weight += attrs.get("weight", 1.0)
-                    
-                    # Relationship types
-                    rel_type = attrs.get("relationship_type", "unknown")
-                    if rel_type not in relationship_types:
-                        relationship_types[rel_type] = 0
-                    relationship_types[rel_type] += 1
-                    
-                    # Source files
-                    if attrs.get("filename"):
-                        source_files.update(attrs["filename"].split(" ||| "))
+            relationship_count = edge_scan["relationship_count"]
             
             return {
                 "count": relationship_count,
-                "average_weight": round(total_weight / relationship_count, 3) if relationship_count > 0 else 0,
-                "types": relationship_types,
-                "source_files": len(source_files)
+                "average_weight": round(edge_scan["total_weight"] / relationship_count, 3) if relationship_count > 0 else 0,
+                "types": dict(edge_scan["relationship_types"]),
+                "source_files": len(edge_scan["source_files"])
             }
             
         except Exception as e:
@@ -1589,10 +1804,7 @@ class KnowledgeGraphService:
     
     def _sanitize_filename(self, filename: str) -> str:
         """Sanitize filename for safe storage"""
-        unsafe_chars = ['<', '>', ':', '"', '|', '?', '*', '\\', '/']
-        safe_filename = filename
-        for char in unsafe_chars:
-            safe_filename = safe_filename.replace(char, '_')
+        safe_filename = filename.translate(_UNSAFE_FILENAME_TABLE)
         
         if len(safe_filename) > 100:
             name, ext = os.path.splitext(safe_filename)
@@ -1610,8 +1822,8 @@ class KnowledgeGraphService:
             "clustered_graph_exists": self.clustered_graph_exists(),
             "file_graphs_loaded": len(self.file_graphs),
             "file_graph_data_loaded": len(self.file_graph_data),
-            "main_graph_nodes": len(self.graph.nodes),
-            "main_graph_edges": len(self.graph.edges),
+            "main_graph_nodes": self.graph.number_of_nodes(),
+            "main_graph_edges": self.graph.number_of_edges(),
             "can_skip_processing": self.clustered_graph_exists() and len(self.file_graphs) > 0
         }
     
@@ -1621,14 +1833,21 @@ class KnowledgeGraphService:
             processed_filenames = set(self.file_graphs.keys())
             uploaded_filenames = {file.filename for file in uploaded_files}
             
-            missing_files = uploaded_filenames - processed_filenames
-            extra_files = processed_filenames - uploaded_filenames
+            # Matching sets, the usual case once processing is done, need no diffing
+            if uploaded_filenames == processed_filenames:
+                missing_files = []
+                extra_files = []
+            else:
+                # Files in only one of the two sets, split by the set they came from
+                differing_files = uploaded_filenames ^ processed_filenames
+                missing_files = [name for name in differing_files if name in uploaded_filenames]
+                extra_files = [name for name in differing_files if name in processed_filenames]
             
             return {
                 "total_uploaded": len(uploaded_filenames),
                 "total_processed": len(processed_filenames),
-                "missing_files": list(missing_files),
-                "extra_files": list(extra_files),
+                "missing_files": missing_files,
+                "extra_files": extra_files,
                 "is_complete": len(missing_files) == 0,
                 "completion_percentage": (len(processed_filenames) / len(uploaded_filenames) * 100) if uploaded_filenames else 0
             }
@@ -1645,134 +1864,160 @@ class KnowledgeGraphService:
         try:
             if self.settings.OPENAI_API_KEY:
                 logger.info(f"Initializing OpenAI client with API key: {self.settings.OPENAI_API_KEY[:20]}...")
-                self.openai_client = openai.OpenAI(api_key=self.settings.OPENAI_API_KEY)
+                # Shared with LLMService and closed by close_openai_clients() at shutdown
+                self.async_openai_client = _get_client(self.settings.OPENAI_API_KEY)
                 logger.info("OpenAI client initialized successfully")
             else:
                 logger.warning("No OpenAI API key found. Embedding features will be disabled.")
-                self.openai_client = None
+                self.async_openai_client = None
         except Exception as e:
             logger.warning(f"Could not initialize OpenAI client: {e}")
             logger.info("Embedding features will be disabled")
-            self.openai_client = None
+            self.async_openai_client = None
     
-    def _generate_node_embedding(self, node_id: str, node_attrs: dict) -> Optional[np.ndarray]:
-        """Generate embedding for a node using OpenAI API"""
-        if not self.openai_client:
-            logger.warning("No OpenAI client found")
-            return None
+    def _node_text(self, node_id: str, node_attrs: dict) -> str:
+        """Build the text that is embedded for a node"""
+        text_parts = [f"Type: {node_attrs.get('node_type', 'unknown')}"]
         
-        try:
-            # Create text representation of the node
-            text_parts = []
-            
-            # Add node type
-            node_type = node_attrs.get('node_type', 'unknown')
-            text_parts.append(f"Type: {node_type}")
-            
-            # Add name if available
-            if 'name' in node_attrs:
-                text_parts.append(f"Name: {node_attrs['name']}")
-            
-            # Add description if available
-            if 'description' in node_attrs:
-                text_parts.append(f"Description: {node_attrs['description']}")
-            
-            # Combine all text parts
-            node_text = " | ".join(text_parts)
-            
-            logger.debug(f"Generating embedding for node {node_id} with text: {node_text[:100]}...")
-            
-            # Generate embedding using OpenAI API
-            response = self.openai_client.embeddings.create(
-                model="text-embedding-3-small",
-                input=node_text
-            )
-            
-            # Extract embedding from response
-            embedding = np.array(response.data[0].embedding)
-            logger.debug(f"Successfully generated embedding for node {node_id}: {len(embedding)} dimensions")
-            return embedding
-            
-        except Exception as e:
-            logger.warning(f"Error generating embedding for node {node_id}: {e}")
-            return None
+        # Add name and description if available
+        if 'name' in node_attrs:
+            text_parts.append(f"Name: {node_attrs['name']}")
+        if 'description' in node_attrs:
+            text_parts.append(f"Description: {node_attrs['description']}")
+        
+        return " | ".join(text_parts)
     
-    def _generate_edge_embedding(self, source: str, target: str, edge_attrs: dict) -> Optional[np.ndarray]:
-        """Generate embedding for an edge using OpenAI API"""
-        if not self.openai_client:
-            return None
+    def _edge_text(self, source: str, target: str, edge_attrs: dict) -> str:
+        """Build the text that is embedded for an edge"""
+        text_parts = [f"Edge Type: {edge_attrs.get('edge_type', 'relationship')}"]
         
-        try:
-            # Create text representation of the edge
-            text_parts = []
-            
-            # Add edge type
-            edge_type = edge_attrs.get('edge_type', 'relationship')
-            text_parts.append(f"Edge Type: {edge_type}")
-            
-            # Add relationship type if available
-            if 'relationship_type' in edge_attrs:
-                text_parts.append(f"Relationship: {edge_attrs['relationship_type']}")
-            
-            # Combine all text parts
-            edge_text = " | ".join(text_parts)
-            
-            # Generate embedding using OpenAI API
-            response = self.openai_client.embeddings.create(
-                model="text-embedding-3-small",
-                input=edge_text
-            )
-            
-            # Extract embedding from response
-            embedding = np.array(response.data[0].embedding)
-            return embedding
-            
-        except Exception as e:
-            logger.warning(f"Error generating embedding for edge ({source}, {target}): {e}")
-            return None
+        # Add relationship type if available
+        if 'relationship_type' in edge_attrs:
+            text_parts.append(f"Relationship: {edge_attrs['relationship_type']}")
+        
+        return " | ".join(text_parts)
+    
+    async def _create_embeddings(self, texts: Any) -> Any:
+        """Request embeddings for one text or a batch, under the shared OpenAI rate limits and circuit breaker"""
+        return await self.llm_service._call_openai(
+            self.async_openai_client.embeddings.create,
+            {"model": "text-embedding-3-small", "input": texts}
+        )
+    
+    async def _embed_batch(self, semaphore: asyncio.Semaphore, batch: List[str]) -> Optional[Any]:
+        """Request embeddings for one batch of texts, returning None if the request fails"""
+        async with semaphore:
+            try:
+                return await self._create_embeddings(batch)
+            except Exception as e:
+                logger.warning(f"Error generating embeddings for batch of {len(batch)} items: {e}")
+                return None
+    
+    async def _embed_texts(self, keys: List[Any], texts: List[str], semaphore: asyncio.Semaphore,
+                           cache: _EmbeddingCache) -> Tuple[List[Any], np.ndarray]:
+        """Embed texts in concurrent batches, returning the embedded keys and their rows as one matrix"""
+        # Only texts missing from the cache are requested, each of them once
+        digests = [self._text_digest(text) for text in texts]
+        rows = await asyncio.to_thread(cache.get_many, digests)
+        missing = {}
+        for digest, text in zip(digests, texts):
+            if digest not in rows:
+                missing.setdefault(digest, text)
+        missing_digests = list(missing)
+        missing_texts = list(missing.values())
+        
+        offsets = range(0, len(missing_texts), self._embedding_batch_size)
+        responses = await asyncio.gather(*(
+            self._embed_batch(semaphore, missing_texts[offset:offset + self._embedding_batch_size])
+            for offset in offsets
+        ))
+        new_rows = {}
+        for offset, response in zip(offsets, responses):
+            if response is None:
+                continue
+            # The API tags each embedding with the index of its input
+            for item in response.data:
+                new_rows[missing_digests[offset + item.index]] = np.asarray(item.embedding, dtype=np.float32)
+        await asyncio.to_thread(cache.put_many, new_rows)
+        rows.update(new_rows)
+        
+        embedded = [(key, digest) for key, digest in zip(keys, digests) if digest in rows]
+        if not embedded:
+            return [], np.empty((0, 0), dtype=np.float32)
+        return [key for key, _ in embedded], np.stack([rows[digest] for _, digest in embedded])
+    
+    @staticmethod
+    def _text_digest(text: str) -> str:
+        """Key an embedded text by a short hash of its contents"""
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+    
+    def _get_embedding_cache_path(self) -> Path:
+        """Get the path of the embedding cache, which is shared by every client"""
+        return Path(self.settings.KNOWLEDGE_GRAPH_BASE_DIR) / "embedding_cache.npz"
+    
+    def _set_node_embeddings(self, node_ids: List[str], matrix: np.ndarray):
+        """Store node embeddings as one matrix whose rows follow node_ids"""
+        # Embeddings in memory no longer match any file on disk
+        self._loaded_embeddings_signature: Optional[Tuple[str, int, int]] = None
+        self._node_ids = node_ids
+        self._node_id_index = {node_id: row for row, node_id in enumerate(node_ids)}
+        self._node_embed_matrix = matrix
+        # Normalized on the first similarity query, then reused until the embeddings change
+        self._node_norm_matrix: Optional[np.ndarray] = None
+        self.node_embeddings: Mapping[str, np.ndarray] = _EmbeddingRows(self._node_id_index, matrix)
+    
+    def _set_edge_embeddings(self, edge_keys: List[Tuple[str, str]], matrix: np.ndarray):
+        """Store edge embeddings as one matrix whose rows follow edge_keys"""
+        self._loaded_embeddings_signature = None
+        self._edge_keys = edge_keys
+        self._edge_index = {edge_key: row for row, edge_key in enumerate(edge_keys)}
+        self._edge_embed_matrix = matrix
+        self._edge_norm_matrix: Optional[np.ndarray] = None
+        self.edge_embeddings: Mapping[Tuple[str, str], np.ndarray] = _EmbeddingRows(self._edge_index, matrix)
     
-    def generate_graph_embeddings(self) -> Dict[str, Any]:
+    async def generate_graph_embeddings(self) -> Dict[str, Any]:
         """Generate embeddings for all nodes and edges in the current graph"""
-        if not self.graph or not self.openai_client:
+        if not self.graph or not self.async_openai_client:
             logger.warning("No graph available or OpenAI client not initialized")
-            logger.warning(f"Graph exists: {self.graph is not None}, OpenAI client exists: {self.openai_client is not None}")
+            logger.warning(f"Graph exists: {self.graph is not None}, OpenAI client exists: {self.async_openai_client is not None}")
             return {"error": "No graph available or OpenAI client not initialized"}
         
         try:
             logger.info(f"Generating embeddings for graph with {len(self.graph.nodes)} nodes and {len(self.graph.edges)} edges...")
             
             # Clear existing embeddings
-            self.node_embeddings.clear()
-            self.edge_embeddings.clear()
-            
-            # Generate node embeddings
-            node_count = 0
-            for node_id, node_attrs in self.graph.nodes(data=True):
-                embedding = self._generate_node_embedding(node_id, node_attrs)
-                if embedding is not None:
-                    self.node_embeddings[node_id] = embedding
-                    node_count += 1
-                else:
-                    logger.warning(f"Failed to generate embedding for node {node_id}")
-            
-            # Generate edge embeddings
-            edge_count = 0
-            for source, target, edge_attrs in self.graph.edges(data=True):
-                embedding = self._generate_edge_embedding(source, target, edge_attrs)
-                if embedding is not None:
-                    self.edge_embeddings[(source, target)] = embedding
-                    edge_count += 1
-                else:
-                    logger.warning(f"Failed to generate embedding for edge ({source}, {target})")
-            
+            self.clear_embeddings()
+            cache = _get_embedding_cache(self._get_embedding_cache_path().resolve())
+            await asyncio.to_thread(cache.load, self.settings.EMBEDDING_CACHE_MAX_ENTRIES)
+            
+            # Build the text for every node and edge
+            node_ids = list(self.graph.nodes)
+            node_texts = [self._node_text(node_id, node_attrs) for node_id, node_attrs in self.graph.nodes(data=True)]
+            edge_keys = list(self.graph.edges)
+            edge_texts = [self._edge_text(source, target, edge_attrs) for source, target, edge_attrs in self.graph.edges(data=True)]
+            
+            # Node and edge batches share one limit on requests in flight
+            semaphore = asyncio.Semaphore(self._embedding_concurrency)
+            (embedded_node_ids, node_matrix), (embedded_edge_keys, edge_matrix) = await asyncio.gather(
+                self._embed_texts(node_ids, node_texts, semaphore, cache),
+                self._embed_texts(edge_keys, edge_texts, semaphore, cache)
+            )
+            self._set_node_embeddings(embedded_node_ids, node_matrix)
+            self._set_edge_embeddings(embedded_edge_keys, edge_matrix)
+            node_count = len(embedded_node_ids)
+            edge_count = len(embedded_edge_keys)
+            await asyncio.to_thread(cache.save, self.settings.EMBEDDING_CACHE_MAX_ENTRIES)
+            
+            if node_count < len(node_ids) or edge_count < len(edge_keys):
+                logger.warning(f"Failed to generate embeddings for {len(node_ids) - node_count} nodes and {len(edge_keys) - edge_count} edges")
             logger.info(f"Generated embeddings for {node_count} nodes and {edge_count} edges")
             
             return {
                 "success": True,
                 "node_embeddings_count": node_count,
                 "edge_embeddings_count": edge_count,
-                "total_nodes": len(self.graph.nodes),
-                "total_edges": len(self.graph.edges)
+                "total_nodes": self.graph.number_of_nodes(),
+                "total_edges": self.graph.number_of_edges()
             }
             
         except Exception as e:
@@ -1781,140 +2026,248 @@ class KnowledgeGraphService:
     
     def get_node_embedding(self, node_id: str) -> Optional[np.ndarray]:
         """Get embedding for a specific node"""
-        return self.node_embeddings.get(node_id)
+        row = self._node_id_index.get(node_id)
+        return None if row is None else self._node_embed_matrix[row]
     
     def get_edge_embedding(self, source: str, target: str) -> Optional[np.ndarray]:
         """Get embedding for a specific edge"""
-        return self.edge_embeddings.get((source, target))
+        row = self._edge_index.get((source, target))
+        return None if row is None else self._edge_embed_matrix[row]
     
     def get_similar_nodes(self, node_id: str, top_k: int = 5) -> List[Tuple[str, float]]:
         """Find nodes similar to the given node based on embedding similarity"""
-        if not self.openai_client or node_id not in self.node_embeddings:
+        if not self.async_openai_client or node_id not in self._node_id_index:
             return []
         
         try:
-            query_embedding = self.node_embeddings[node_id]
-            similarities = []
-            
-            for other_node, other_embedding in self.node_embeddings.items():
-                if other_node != node_id:
-                    similarity = cosine_similarity(
-                        query_embedding.reshape(1, -1), 
-                        other_embedding.reshape(1, -1)
-                    )[0][0]
-                    similarities.append((other_node, similarity))
-            
-            # Sort by similarity (descending) and return top_k
-            similarities.sort(key=lambda x: x[1], reverse=True)
-            return similarities[:top_k]
+            top_rows = self._top_similar_rows(self._get_node_norm_matrix(), self._node_id_index[node_id], top_k)
+            return [(self._node_ids[row], similarity) for row, similarity in top_rows]
             
         except Exception as e:
             logger.error(f"Error finding similar nodes for {node_id}: {e}")
             return []
     
+    def get_node_similarities(self, query_vector: np.ndarray) -> Dict[str, float]:
+        """Cosine similarity of a query vector to every embedded node, keyed by node id"""
+        if not self._node_ids:
+            return {}
+        
+        query = np.asarray(query_vector, dtype=np.float32).ravel()
+        query_norm = np.linalg.norm(query)
+        if query_norm == 0:
+            return dict.fromkeys(self._node_ids, 0.0)
+        
+        # One matrix-vector product scores every node at once
+        similarities = self._get_node_norm_matrix() @ (query / query_norm)
+        return dict(zip(self._node_ids, similarities.tolist()))
+    
+    def _get_node_norm_matrix(self) -> np.ndarray:
+        """Row-normalized node embeddings, built on first use and reused until the embeddings change"""
+        if self._node_norm_matrix is None:
+            self._node_norm_matrix = self._normalize_rows(self._node_embed_matrix)
+        return self._node_norm_matrix
+    
     def get_similar_edges(self, source: str, target: str, top_k: int = 5) -> List[Tuple[Tuple[str, str], float]]:
         """Find edges similar to the given edge based on embedding similarity"""
-        if not self.openai_client or (source, target) not in self.edge_embeddings:
+        if not self.async_openai_client or (source, target) not in self._edge_index:
             return []
         
         try:
-            query_embedding = self.edge_embeddings[(source, target)]
-            similarities = []
-            
-            for other_edge, other_embedding in self.edge_embeddings.items():
-                if other_edge != (source, target):
-                    similarity = cosine_similarity(
-                        query_embedding.reshape(1, -1), 
-                        other_embedding.reshape(1, -1)
-                    )[0][0]
-                    similarities.append((other_edge, similarity))
-            
-            # Sort by similarity (descending) and return top_k
-            similarities.sort(key=lambda x: x[1], reverse=True)
-            return similarities[:top_k]
+            if self._edge_norm_matrix is None:
+                self._edge_norm_matrix = self._normalize_rows(self._edge_embed_matrix)
+            top_rows = self._top_similar_rows(self._edge_norm_matrix, self._edge_index[(source, target)], top_k)
+            return [(self._edge_keys[row], similarity) for row, similarity in top_rows]
             
         except Exception as e:
             logger.error(f"Error finding similar edges for ({source}, {target}): {e}")
             return []
     
-    def _embeddings_to_json_serializable(self) -> Dict[str, Any]:
-        """Convert embeddings to JSON-serializable format"""
-        serializable_embeddings = {
-            "node_embeddings": {},
-            "edge_embeddings": {},
-            "metadata": {
-                "embedding_model": "text-embedding-3-small",
-                "embedding_dimension": None,
-                "total_nodes": len(self.node_embeddings),
-                "total_edges": len(self.edge_embeddings),
-                "generated_at": self._get_current_timestamp()
-            }
+    @staticmethod
+    def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+        """Scale each row to unit length so dot products are cosine similarities"""
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        # Zero vectors stay zero, giving them a similarity of 0 to everything
+        norms[norms == 0] = 1
+        return matrix / norms
+    
+    @staticmethod
+    def _top_similar_rows(norm_matrix: np.ndarray, query_row: int, top_k: int) -> List[Tuple[int, float]]:
+        """Rank the rows of a normalized matrix by cosine similarity to one of its rows, excluding itself"""
+        similarities = norm_matrix @ norm_matrix[query_row]
+        similarities[query_row] = -np.inf
+        
+        top_k = min(top_k, len(similarities) - 1)
+        if top_k <= 0:
+            return []
+        
+        # Partition out the top_k rows in linear time, then sort only those
+        top_rows = np.argpartition(-similarities, top_k - 1)[:top_k]
+        top_rows = top_rows[np.argsort(-similarities[top_rows], kind="stable")]
+        return [(int(row), float(similarities[row])) for row in top_rows]
+    
+    def _get_embeddings_path(self, suffix: str) -> Path:
+        """Get the path of one of this client's embedding files"""
+        embeddings_dir = self._client_dir / "embeddings"
+        return embeddings_dir / f"embeddings_{self.client_id}{suffix}"
+    
+    def _embeddings_metadata(self) -> Dict[str, Any]:
+        """Describe the stored embeddings for the metadata file saved next to them"""
+        dimension = self._node_embed_matrix.shape[1] or self._edge_embed_matrix.shape[1]
+        return {
+            "embedding_model": "text-embedding-3-small",
+            "embedding_dimension": int(dimension) if dimension else None,
+            "storage_dtype": "int8" if self.settings.EMBEDDINGS_QUANTIZATION else "float32",
+            "total_nodes": len(self._node_ids),
+            "total_edges": len(self._edge_keys),
+            "generated_at": self._get_current_timestamp()
         }
+    
+    @staticmethod
+    def _embedding_arrays_from_json(embeddings_data: Dict[str, Any]) -> Tuple[List[str], np.ndarray, List[Tuple[str, str]], np.ndarray]:
+        """Build embedding matrices from the JSON format used before they were saved as matrices"""
+        # Load node embeddings
+        node_data = embeddings_data.get("node_embeddings", {})
+        node_ids = list(node_data)
+        node_matrix = np.array(list(node_data.values()), dtype=np.float32)
+        
+        # Load edge embeddings
+        edge_keys = []
+        edge_rows = []
+        for edge_str, embedding_list in embeddings_data.get("edge_embeddings", {}).items():
+            # Convert string key back to tuple, splitting at the first separator in one scan
+            source, separator, target = edge_str.partition("__")
+            if separator:
+                edge_keys.append((source, target))
+                edge_rows.append(embedding_list)
+        edge_matrix = np.array(edge_rows, dtype=np.float32)
+        
+        return node_ids, node_matrix, edge_keys, edge_matrix
+    
+    @staticmethod
+    def _stream_embedding_arrays_from_json(legacy_path: Path) -> Tuple[List[str], np.ndarray, List[Tuple[str, str]], np.ndarray]:
+        """Build embedding matrices from the legacy JSON format one vector at a time, so the
+        file's float lists are never all parsed into memory at once"""
+        # Load node embeddings, converting each vector as soon as it is parsed
+        node_ids = []
+        node_rows = []
+        with open(legacy_path, 'rb') as f:
+            for node_id, embedding_list in ijson.kvitems(f, "node_embeddings", use_float=True):
+                node_ids.append(node_id)
+                node_rows.append(np.asarray(embedding_list, dtype=np.float32))
+        node_matrix = np.stack(node_rows) if node_rows else np.empty((0, 0), dtype=np.float32)
+        del node_rows
+        
+        # Load edge embeddings in a second pass over the file
+        edge_keys = []
+        edge_rows = []
+        with open(legacy_path, 'rb') as f:
+            for edge_str, embedding_list in ijson.kvitems(f, "edge_embeddings", use_float=True):
+                # Convert string key back to tuple, splitting at the first separator in one scan
+                source, separator, target = edge_str.partition("__")
+                if separator:
+                    edge_keys.append((source, target))
+                    edge_rows.append(np.asarray(embedding_list, dtype=np.float32))
+        edge_matrix = np.stack(edge_rows) if edge_rows else np.empty((0, 0), dtype=np.float32)
+        
+        return node_ids, node_matrix, edge_keys, edge_matrix
+    
+    def _embeddings_file_signature(self) -> Optional[Tuple[str, int, int]]:
+        """Path, modification time and size of the embeddings file to load, preferring the
+        .npz file over a legacy JSON file, or None if neither exists"""
+        for suffix in (".npz", ".json"):
+            embeddings_path = self._get_embeddings_path(suffix)
+            try:
+                stat = embeddings_path.stat()
+            except FileNotFoundError:
+                continue
+            return str(embeddings_path), stat.st_mtime_ns, stat.st_size
+        return None
+    
+    def _read_embeddings_file(self, embeddings_path: Path) -> Tuple[List[str], np.ndarray, List[Tuple[str, str]], np.ndarray]:
+        """Read embedding ids and matrices from an .npz file or a legacy JSON file"""
+        if embeddings_path.suffix == ".npz":
+            with np.load(embeddings_path) as data:
+                # Quantized archives store int8 rows alongside a scale per row
+                if "node_scales" in data:
+                    node_matrix = self._dequantize_rows(data["node_matrix"], data["node_scales"])
+                    edge_matrix = self._dequantize_rows(data["edge_matrix"], data["edge_scales"])
+                else:
+                    node_matrix = data["node_matrix"]
+                    edge_matrix = data["edge_matrix"]
+                return (
+                    data["node_ids"].tolist(),
+                    node_matrix,
+                    list(zip(data["edge_sources"].tolist(), data["edge_targets"].tolist())),
+                    edge_matrix
+                )
         
-        # Convert node embeddings
-        for node_id, embedding in self.node_embeddings.items():
-            if embedding is not None:
-                serializable_embeddings["node_embeddings"][node_id] = embedding.tolist()
-                if serializable_embeddings["metadata"]["embedding_dimension"] is None:
-                    serializable_embeddings["metadata"]["embedding_dimension"] = len(embedding)
-        
-        # Convert edge embeddings
-        for edge_key, embedding in self.edge_embeddings.items():
-            if embedding is not None:
-                # Convert tuple key to string for JSON serialization
-                edge_str = f"{edge_key[0]}__{edge_key[1]}"
-                serializable_embeddings["edge_embeddings"][edge_str] = embedding.tolist()
-                if serializable_embeddings["metadata"]["embedding_dimension"] is None:
-                    serializable_embeddings["metadata"]["embedding_dimension"] = len(embedding)
-        
-        return serializable_embeddings
-    
-    def _embeddings_from_json_serializable(self, embeddings_data: Dict[str, Any]) -> bool:
-        """Load embeddings from JSON-serializable format"""
-        try:
-            # Clear existing embeddings
-            self.node_embeddings.clear()
-            self.edge_embeddings.clear()
-            
-            # Load node embeddings
-            if "node_embeddings" in embeddings_data:
-                for node_id, embedding_list in embeddings_data["node_embeddings"].items():
-                    self.node_embeddings[node_id] = np.array(embedding_list)
-            
-            # Load edge embeddings
-            if "edge_embeddings" in embeddings_data:
-                for edge_str, embedding_list in embeddings_data["edge_embeddings"].items():
-                    # Convert string key back to tuple
-                    if "__" in edge_str:
-                        source, target = edge_str.split("__", 1)
-                        edge_key = (source, target)
-                        self.edge_embeddings[edge_key] = np.array(embedding_list)
-            
-            logger.info(f"Loaded embeddings for {len(self.node_embeddings)} nodes and {len(self.edge_embeddings)} edges")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error loading embeddings from JSON: {e}")
-            return False
+        if IJSON_AVAILABLE:
+            return self._stream_embedding_arrays_from_json(embeddings_path)
+        if ORJSON_AVAILABLE:
+            embeddings_data = orjson.loads(embeddings_path.read_bytes())
+        else:
+            with open(embeddings_path, 'r', encoding='utf-8') as f:
+                embeddings_data = json.load(f)
+        return self._embedding_arrays_from_json(embeddings_data)
+    
+    @staticmethod
+    def _quantize_rows(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Quantize each row to int8 with its own scale, so the largest magnitude maps to 127"""
+        scales = np.abs(matrix).max(axis=1, keepdims=True, initial=0) / 127
+        # Zero rows quantize to zero under any scale
+        scales[scales == 0] = 1
+        return np.round(matrix / scales).astype(np.int8), scales.astype(np.float32)
+    
+    @staticmethod
+    def _dequantize_rows(quantized: np.ndarray, scales: np.ndarray) -> np.ndarray:
+        """Rebuild float32 rows from int8 rows and their scales"""
+        return quantized.astype(np.float32) * scales
+    
+    @staticmethod
+    def _write_embeddings_files(embeddings_path: Path, metadata_path: Path, arrays: Dict[str, np.ndarray], metadata: Dict[str, Any]):
+        """Write the embeddings archive and its metadata file"""
+        embeddings_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # Rows are written as binary float32 next to the ids they belong to. Embeddings
+        # barely compress, so the archive is stored uncompressed to keep saves and loads fast
+        np.savez(embeddings_path, **arrays)
+        
+        if ORJSON_AVAILABLE:
+            metadata_path.write_bytes(orjson.dumps(metadata, option=orjson.OPT_INDENT_2))
+        else:
+            with open(metadata_path, 'w', encoding='utf-8') as f:
+                json.dump(metadata, f, indent=2, ensure_ascii=False)
     
     async def save_embeddings(self) -> str:
-        """Save embeddings to a JSON file"""
+        """Save embedding matrices to an .npz file with a JSON metadata file beside it"""
         try:
             if not self.node_embeddings and not self.edge_embeddings:
                 logger.warning("No embeddings to save")
                 return ""
             
-            output_dir = Path(self.settings.KNOWLEDGE_GRAPH_BASE_DIR) / self.client_id / "embeddings"
-            output_dir.mkdir(parents=True, exist_ok=True)
-            
-            embeddings_filename = f"embeddings_{self.client_id}.json"
-            embeddings_path = output_dir / embeddings_filename
+            embeddings_path = self._get_embeddings_path(".npz")
             
-            # Convert embeddings to JSON-serializable format
-            serializable_embeddings = self._embeddings_to_json_serializable()
-            
-            with open(embeddings_path, 'w', encoding='utf-8') as f:
-                json.dump(serializable_embeddings, f, indent=2, ensure_ascii=False)
+            # Matrices are replaced rather than modified, so the worker thread can write this
+            # snapshot while the event loop keeps serving other requests
+            arrays = {
+                "node_ids": np.array(self._node_ids, dtype=str),
+                "node_matrix": self._node_embed_matrix,
+                "edge_sources": np.array([source for source, _ in self._edge_keys], dtype=str),
+                "edge_targets": np.array([target for _, target in self._edge_keys], dtype=str),
+                "edge_matrix": self._edge_embed_matrix
+            }
+            if self.settings.EMBEDDINGS_QUANTIZATION:
+                arrays["node_matrix"], arrays["node_scales"] = self._quantize_rows(self._node_embed_matrix)
+                arrays["edge_matrix"], arrays["edge_scales"] = self._quantize_rows(self._edge_embed_matrix)
+            node_matrix, edge_matrix = self._node_embed_matrix, self._edge_embed_matrix
+            await asyncio.to_thread(
+                self._write_embeddings_files, embeddings_path, self._get_embeddings_path("_metadata.json"),
+                arrays, self._embeddings_metadata()
+            )
+            # Unless embeddings were replaced during the write, the file now holds what is in
+            # memory and loading it again can be skipped
+            if node_matrix is self._node_embed_matrix and edge_matrix is self._edge_embed_matrix:
+                self._loaded_embeddings_signature = self._embeddings_file_signature()
             
             logger.info(f"Saved embeddings to: {embeddings_path}")
             return str(embeddings_path)
@@ -1924,75 +2277,79 @@ class KnowledgeGraphService:
             return ""
     
     async def load_embeddings(self) -> bool:
-        """Load embeddings from JSON file"""
+        """Load embeddings from the .npz file, or from a JSON file saved by older versions"""
         try:
-            embeddings_dir = Path(self.settings.KNOWLEDGE_GRAPH_BASE_DIR) / self.client_id / "embeddings"
-            embeddings_filename = f"embeddings_{self.client_id}.json"
-            embeddings_path = embeddings_dir / embeddings_filename
-            
-            if not embeddings_path.exists():
+            signature = self._embeddings_file_signature()
+            if signature is None:
                 logger.info(f"No embeddings file found for client {self.client_id}")
                 return False
             
-            with open(embeddings_path, 'r', encoding='utf-8') as f:
-                embeddings_data = json.load(f)
+            # The file is unchanged since it was loaded or saved, so memory already matches it
+            if signature == self._loaded_embeddings_signature:
+                logger.info(f"Embeddings for client {self.client_id} are already loaded")
+                return True
             
-            # Load embeddings from the data
-            success = self._embeddings_from_json_serializable(embeddings_data)
+            # Read and parse the file in a worker thread so the event loop is not blocked
+            node_ids, node_matrix, edge_keys, edge_matrix = await asyncio.to_thread(
+                self._read_embeddings_file, Path(signature[0])
+            )
             
-            if success:
-                logger.info(f"Successfully loaded embeddings for client {self.client_id}")
-                return True
-            else:
-                logger.error(f"Failed to load embeddings for client {self.client_id}")
-                return False
+            # Swap the embeddings in on the event loop thread
+            self.clear_embeddings()
+            if node_ids:
+                self._set_node_embeddings(node_ids, node_matrix)
+            if edge_keys:
+                self._set_edge_embeddings(edge_keys, edge_matrix)
+            self._loaded_embeddings_signature = signature
+            
+            logger.info(f"Loaded embeddings for {len(self.node_embeddings)} nodes and {len(self.edge_embeddings)} edges")
+            logger.info(f"Successfully loaded embeddings for client {self.client_id}")
+            return True
                 
         except Exception as e:
-            logger.error(f"Error loading embeddings: {e}")
+            logger.error(f"Error loading embeddings for client {self.client_id}: {e}")
             return False
     
     def embeddings_exist(self) -> bool:
         """Check if embeddings exist for this client"""
         try:
-            embeddings_dir = Path(self.settings.KNOWLEDGE_GRAPH_BASE_DIR) / self.client_id / "embeddings"
-            embeddings_filename = f"embeddings_{self.client_id}.json"
-            embeddings_path = embeddings_dir / embeddings_filename
-            
-            return embeddings_path.exists()
+            return self._embeddings_file_signature() is not None
         except Exception as e:
             logger.error(f"Error checking if embeddings exist: {e}")
             return False
     
-    def merge_embeddings_with_graph(self, graph: nx.DiGraph) -> nx.DiGraph:
-        """Merge embeddings with a graph by adding embedding data as node/edge attributes"""
+    def merge_embeddings_with_graph(self, graph: nx.DiGraph, inplace: bool = False) -> nx.DiGraph:
+        """Merge embeddings with a graph by adding embedding data as node/edge attributes,
+        annotating the graph itself when inplace is set instead of copying it first"""
         if not self.node_embeddings and not self.edge_embeddings:
             logger.warning("No embeddings available to merge")
             return graph
         
         try:
-            # Create a copy of the graph to avoid modifying the original
-            merged_graph = graph.copy()
+            # Copy the graph to avoid modifying the original unless the caller opts out
+            merged_graph = graph if inplace else graph.copy()
+            
+            # Every row of an embedding matrix has the same dimension
+            node_dimension = int(self._node_embed_matrix.shape[1])
+            edge_dimension = int(self._edge_embed_matrix.shape[1])
             
             # Add embedding information to nodes
-            for node_id in merged_graph.nodes():
-                if node_id in self.node_embeddings:
-                    embedding = self.node_embeddings[node_id]
-                    merged_graph.nodes[node_id]['has_embedding'] = True
-                    merged_graph.nodes[node_id]['embedding_dimension'] = len(embedding)
+            for node_id, node_attrs in merged_graph.nodes(data=True):
+                if node_id in self._node_id_index:
+                    node_attrs['has_embedding'] = True
+                    node_attrs['embedding_dimension'] = node_dimension
                     # Note: We don't store the actual embedding in the graph as it's too large
                     # The embedding can be accessed via get_node_embedding() method
                 else:
-                    merged_graph.nodes[node_id]['has_embedding'] = False
+                    node_attrs['has_embedding'] = False
             
             # Add embedding information to edges
-            for source, target in merged_graph.edges():
-                edge_key = (source, target)
-                if edge_key in self.edge_embeddings:
-                    embedding = self.edge_embeddings[edge_key]
-                    merged_graph.edges[source, target]['has_embedding'] = True
-                    merged_graph.edges[source, target]['embedding_dimension'] = len(embedding)
+            for source, target, edge_attrs in merged_graph.edges(data=True):
+                if (source, target) in self._edge_index:
+                    edge_attrs['has_embedding'] = True
+                    edge_attrs['embedding_dimension'] = edge_dimension
                 else:
-                    merged_graph.edges[source, target]['has_embedding'] = False
+                    edge_attrs['has_embedding'] = False
             
             logger.info(f"Merged embedding information with graph: {len(merged_graph.nodes)} nodes, {len(merged_graph.edges)} edges")
             return merged_graph
@@ -2004,24 +2361,28 @@ class KnowledgeGraphService:
     def get_embedding_statistics(self) -> Dict[str, Any]:
         """Get statistics about the current embeddings"""
         try:
+            # Count graph items once; counting edges walks every node's adjacency
+            node_count = self.graph.number_of_nodes() if self.graph else 0
+            edge_count = self.graph.number_of_edges() if self.graph else 0
+            node_embedding_count = len(self.node_embeddings)
+            edge_embedding_count = len(self.edge_embeddings)
+            
             stats = {
-                "embedding_model_available": self.openai_client is not None,
-                "embedding_model": "text-embedding-3-small" if self.openai_client else "none",
-                "node_embeddings_count": len(self.node_embeddings),
-                "edge_embeddings_count": len(self.edge_embeddings),
-                "total_nodes_in_graph": len(self.graph.nodes) if self.graph else 0,
-                "total_edges_in_graph": len(self.graph.edges) if self.graph else 0,
+                "embedding_model_available": self.async_openai_client is not None,
+                "embedding_model": "text-embedding-3-small" if self.async_openai_client else "none",
+                "node_embeddings_count": node_embedding_count,
+                "edge_embeddings_count": edge_embedding_count,
+                "total_nodes_in_graph": node_count,
+                "total_edges_in_graph": edge_count,
                 "embedding_coverage": {
-                    "nodes": f"{(len(self.node_embeddings) / len(self.graph.nodes) * 100):.1f}%" if self.graph and self.graph.nodes else "0%",
-                    "edges": f"{(len(self.edge_embeddings) / len(self.graph.edges) * 100):.1f}%" if self.graph and self.graph.edges else "0%"
+                    "nodes": f"{(node_embedding_count / node_count * 100):.1f}%" if node_count else "0%",
+                    "edges": f"{(edge_embedding_count / edge_count * 100):.1f}%" if edge_count else "0%"
                 }
             }
             
             # Add embedding dimension information if available
-            if self.node_embeddings:
-                sample_embedding = next(iter(self.node_embeddings.values()))
-                if sample_embedding is not None:
-                    stats["embedding_dimension"] = len(sample_embedding)
+            if node_embedding_count:
+                stats["embedding_dimension"] = int(self._node_embed_matrix.shape[1])
             
             return stats
             
@@ -2031,8 +2392,8 @@ class KnowledgeGraphService:
     
     def clear_embeddings(self):
         """Clear all stored embeddings"""
-        self.node_embeddings.clear()
-        self.edge_embeddings.clear()
+        self._set_node_embeddings([], np.empty((0, 0), dtype=np.float32))
+        self._set_edge_embeddings([], np.empty((0, 0), dtype=np.float32))
         logger.info("Cleared all embeddings")
     
     async def regenerate_embeddings(self) -> Dict[str, Any]:
@@ -2042,7 +2403,7 @@ class KnowledgeGraphService:
         
         try:
             logger.info("Regenerating embeddings for current graph...")
-            result = self.generate_graph_embeddings()
+            result = await self.generate_graph_embeddings()
             
             if result.get("success"):
                 # Save the new embeddings
@@ -2077,32 +2438,9 @@ class KnowledgeGraphService:
             
             for file_key in search_files:
                 if file_key in self.file_graph_data:
-                    graph_data = self.file_graph_data[file_key]
-                    
-                    # Check entities for this chunk
-                    if "entities" in graph_data:
-                        for entity_info in graph_data["entities"]:
-                            if chunk_index in entity_info.get("chunks", []):
-                                # Find the content for this specific chunk index
-                                chunk_contents = entity_info.get("chunk_content", [])
-                                chunk_indices = entity_info.get("chunks", [])
-                                
-                                for i, content in enumerate(chunk_contents):
-                                    if i < len(chunk_indices) and chunk_indices[i] == chunk_index:
-                                        if content and content.strip():
-                                            return content.strip()
-                    
-                    # Check facts for this chunk
-                    if "facts" in graph_data:
-                        for fact in graph_data["facts"]:
-                            if chunk_index in fact.get("chunks", []):
-                                chunk_contents = fact.get("chunk_content", [])
-                                chunk_indices = fact.get("chunks", [])
-                                
-                                for i, content in enumerate(chunk_contents):
-                                    if i < len(chunk_indices) and chunk_indices[i] == chunk_index:
-                                        if content and content.strip():
-                                            return content.strip()
+                    chunk_contents, _ = self._chunk_content_index(file_key)
+                    if chunk_index in chunk_contents:
+                        return chunk_contents[chunk_index]
             
             # If not found in file graph data, try to find in the main graph
             if self.graph:
@@ -2120,6 +2458,36 @@ class KnowledgeGraphService:
             logger.error(f"Error retrieving chunk content for index {chunk_index}: {e}")
             return ""
 
+    def _chunk_content_index(self, filename: str) -> Tuple[Dict[int, str], Dict[Tuple[str, int], str]]:
+        """
+        Index a file's chunk contents by chunk index, and by lowercased entity name and chunk index
+        
+        Each key keeps the first non-blank content found, searching entities before facts, so a
+        lookup returns what a scan of the file's graph data would. The indexes are cached until
+        the file's graph data is replaced.
+        """
+        graph_data = self.file_graph_data[filename]
+        cached = self._chunk_content_indexes.get(filename)
+        if cached is not None and cached[0] is graph_data:
+            return cached[1], cached[2]
+        
+        chunk_contents = {}
+        entity_chunk_contents = {}
+        for entity_info in graph_data.get("entities", []):
+            entity_key = entity_info.get("name", "").lower()
+            for chunk_index, content in zip(entity_info.get("chunks", []), entity_info.get("chunk_content", [])):
+                if content and content.strip():
+                    chunk_contents.setdefault(chunk_index, content.strip())
+                    entity_chunk_contents.setdefault((entity_key, chunk_index), content.strip())
+        
+        for fact in graph_data.get("facts", []):
+            for chunk_index, content in zip(fact.get("chunks", []), fact.get("chunk_content", [])):
+                if content and content.strip():
+                    chunk_contents.setdefault(chunk_index, content.strip())
+        
+        self._chunk_content_indexes[filename] = (graph_data, chunk_contents, entity_chunk_contents)
+        return chunk_contents, entity_chunk_contents
+    
     def get_chunk_content_by_entity(self, entity_name: str, chunk_index: int) -> str:
         """
         Get chunk content for a specific entity and chunk index
@@ -2133,19 +2501,11 @@ class KnowledgeGraphService:
         """
         try:
             # Search in file graph data
-            for filename, graph_data in self.file_graph_data.items():
-                if "entities" in graph_data:
-                    for entity_info in graph_data["entities"]:
-                        if entity_info.get("name", "").lower() == entity_name.lower():
-                            if chunk_index in entity_info.get("chunks", []):
-                                # Find the content for this specific chunk index
-                                chunk_contents = entity_info.get("chunk_content", [])
-                                chunk_indices = entity_info.get("chunks", [])
-
-                                for i, content in enumerate(chunk_contents):
-                                    if i < len(chunk_indices) and chunk_indices[i] == chunk_index:
-                                        if content and content.strip():
-                                            return content.strip()
+            entity_chunk_key = (entity_name.lower(), chunk_index)
+            for filename in self.file_graph_data:
+                _, entity_chunk_contents = self._chunk_content_index(filename)
+                if entity_chunk_key in entity_chunk_contents:
+                    return entity_chunk_contents[entity_chunk_key]
             
             return ""
             
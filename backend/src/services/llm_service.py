@@ -2,19 +2,591 @@
 LLM service for slide generation using OpenAI GPT
 """
 
+import asyncio
+import copy
+import hashlib
+import io
 import logging
 import json
-from typing import Dict, List, Optional, Any
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Any
+import numpy as np
 import openai
+import tiktoken
+from pydantic import TypeAdapter
 from src.core.config import Settings
+from src.models.llm_models import SectionContent, SlideLayout
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logging.warning("orjson not available. LLM responses will be parsed with the standard json module.")
 
 logger = logging.getLogger(__name__)
 
+# Prompt fragments shared by the separate and fused slide generation calls
+_LAYOUT_SCHEMA = """{
+    "layout_type": "title_slide|content_slide|image_slide|mixed|key_insights|comparison|timeline|process",
+    "title": "Compelling, action-oriented slide title",
+    "sections": [
+        {
+            "type": "text|bullet_list|image|chart|quote|highlight_box|timeline|process_step",
+            "content": "Brief description of what this section will contain",
+            "position": {"x": 5, "y": 25, "width": 45, "height": 35},
+            "style": {"font_size": "18px", "color": "#2c3e50", "alignment": "left", "font_weight": "bold"}
+        },
+        {
+            "type": "text|bullet_list|image|chart|quote|highlight_box|timeline|process_step", 
+            "content": "Brief description of what this section will contain",
+            "position": {"x": 55, "y": 25, "width": 40, "height": 35},
+            "style": {"font_size": "16px", "color": "#34495e", "alignment": "left"}
+        }
+    ],
+    "background_style": "gradient|solid|image|pattern",
+    "color_scheme": "professional|creative|minimal|colorful|corporate|academic|modern"
+}"""
+
+_LAYOUT_GUIDELINES = """LAYOUT GUIDELINES:
+- Use 2-4 sections for optimal content distribution
+- Position sections to create visual flow (left to right, top to bottom)
+- Vary section types to maintain interest (text, bullet lists, highlights)
+- Ensure adequate spacing between sections (at least 5% gap)
+- Make title prominent and engaging
+- Consider the content type and create appropriate sections"""
+
+_CONTENT_SCHEMA = """{
+    "section_0": {
+        "content": "Engaging, well-formatted content for the first section",
+        "style_notes": "Any specific styling or formatting notes"
+    },
+    "section_1": {
+        "content": "Engaging, well-formatted content for the second section", 
+        "style_notes": "Any specific styling or formatting notes"
+    }
+}"""
+
+_CONTENT_GUIDELINES = """CONTENT GUIDELINES:
+- Keep bullet points to 3-5 items maximum
+- Use clear, action-oriented language
+- Include key insights and takeaways
+- Make content scannable and memorable
+- Ensure proper hierarchy and flow"""
+
+# Static system prompts lead every request so OpenAI can reuse their cached prefix;
+# per-request theme details follow them in a separate message
+_SLIDE_SYSTEM_PROMPT = f"""You are an expert presentation designer and content strategist with 15+ years of experience creating compelling slides for Fortune 500 companies, TED talks, and academic conferences. Your task is to design an optimal, professional slide layout for the user's content and write engaging copy for every section of that layout.
+
+CRITICAL REQUIREMENTS:
+- Create layouts that tell a story and guide the audience's attention
+- Design for visual hierarchy and readability
+- Ensure content is well-distributed across the slide
+- Consider the theme and make it cohesive with the design
+- Create content that is concise, impactful, and easy to read
+- Maintain professional tone while being engaging
+- Use active voice and action-oriented language
+
+Return ONLY a JSON object with two top-level keys:
+- "layout": the slide layout, with the following structure:
+{_LAYOUT_SCHEMA}
+- "content": the content for each layout section, keyed "section_<index>" in the same order as "layout.sections", with the following structure:
+{_CONTENT_SCHEMA}
+
+{_LAYOUT_GUIDELINES}
+
+{_CONTENT_GUIDELINES}
+"""
+
+_LAYOUT_SYSTEM_PROMPT = f"""You are an expert presentation designer with 15+ years of experience creating compelling slides for Fortune 500 companies, TED talks, and academic conferences. Your task is to analyze content and user requirements to design an optimal, professional slide layout that maximizes impact and engagement.
+
+CRITICAL REQUIREMENTS:
+- Create layouts that tell a story and guide the audience's attention
+- Design for visual hierarchy and readability
+- Ensure content is well-distributed across the slide
+- Consider the theme and make it cohesive with the design
+- Create multiple sections that work together to present the information effectively
+
+Return ONLY a JSON object with the following structure (no markdown formatting, no code blocks):
+{_LAYOUT_SCHEMA}
+
+{_LAYOUT_GUIDELINES}
+"""
+
+_CONTENT_SYSTEM_PROMPT = f"""You are a senior content strategist and copywriter with 10+ years of experience creating compelling presentation content for Fortune 500 companies, TED talks, and high-profile events. Your task is to transform raw content into engaging, well-structured slide content that tells a compelling story.
+
+CRITICAL REQUIREMENTS:
+- Create content that is concise, impactful, and easy to read
+- Maintain professional tone while being engaging
+- Ensure content fits the specified layout structure
+- Make information scannable and memorable
+- Use active voice and action-oriented language
+
+Return ONLY a JSON object with content for each section (no markdown formatting, no code blocks):
+{_CONTENT_SCHEMA}
+
+{_CONTENT_GUIDELINES}
+"""
+
+_KNOWLEDGE_GRAPH_SYSTEM_PROMPT = """You are an expert knowledge graph extraction specialist. Your task is to analyze text content and extract ONLY three types of information:
+
+1. ENTITIES: Named entities, concepts, organizations, people, places, etc.
+2. RELATIONSHIPS: Connections between entities (subject-verb-object relationships)
+3. FACTS: Key factual information, statistics, claims, or assertions
+
+CRITICAL REQUIREMENTS:
+- Return ONLY a JSON object with the exact structure specified
+- Do not include any explanations, markdown, or additional text
+- Focus on factual, extractable information
+- Be precise and accurate
+- Do not generate or invent information not present in the text
+
+Return ONLY this JSON structure (no other text):
+{
+    "entities": [
+        {
+            "id": "unique_entity_id",
+            "name": "entity_name",
+            "type": "entity_type",
+            "description": "brief_description",
+        }
+    ],
+    "relationships": [
+        {
+            "id": "unique_relationship_id",
+            "source_entity": "source_entity_id",
+            "target_entity": "target_entity_id",
+            "relationship_type": "relationship_label",
+        }
+    ],
+    "facts": [
+        {
+            "id": "unique_fact_id",
+            "content": "factual_statement",
+            "source_entities": ["entity_id1", "entity_id2"],
+        }
+    ]
+}"""
+
+def _strict_object(**properties: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON schema for an object with exactly these properties, as strict structured outputs require"""
+    return {"type": "object", "properties": properties, "required": list(properties), "additionalProperties": False}
+
+_STRING_SCHEMA = {"type": "string"}
+
+# Structured output format matching the JSON structure in the graph extraction prompt
+_KNOWLEDGE_GRAPH_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "knowledge_graph_extraction",
+        "strict": True,
+        "schema": _strict_object(
+            entities={"type": "array", "items": _strict_object(
+                id=_STRING_SCHEMA, name=_STRING_SCHEMA, type=_STRING_SCHEMA, description=_STRING_SCHEMA
+            )},
+            relationships={"type": "array", "items": _strict_object(
+                id=_STRING_SCHEMA, source_entity=_STRING_SCHEMA, target_entity=_STRING_SCHEMA,
+                relationship_type=_STRING_SCHEMA
+            )},
+            facts={"type": "array", "items": _strict_object(
+                id=_STRING_SCHEMA, content=_STRING_SCHEMA,
+                source_entities={"type": "array", "items": _STRING_SCHEMA}
+            )}
+        )
+    }
+}
+
+# Example slide included in every generate_slide_html prompt
+_HTML_TEMPLATE_EXAMPLES = """EXAMPLE TEMPLATES TO FOLLOW:
+Here are examples of well-designed slides that you should use as inspiration for structure, styling, and layout:
+
+<!DOCTYPE html>
+<html>
+<head>
+<style>
+.slide-main { 
+  width: 100%; 
+  height: 100%; 
+  background: white; 
+  padding: 40px; 
+  box-sizing: border-box; 
+  font-family: Arial, sans-serif;
+  display: flex;
+  flex-direction: column;
+  justify-content: center;
+}
+.slide-main h1 { color: #1a1a1a; font-size: 2.5rem; margin-bottom: 1rem; }
+.slide-main p { color: #333333; font-size: 1.1rem; line-height: 1.6; }
+</style>
+</head>
+<body>
+<div class="slide-main">
+  <!-- Your slide content here -->
+</div>
+</body>
+</html>
+
+Please create a slide that follows similar structural patterns, CSS scoping practices, and professional styling as shown in the example above.
+
+"""
+
+# Styling guidance added to generate_slide_html prompts for the built-in themes
+_HTML_THEME_GUIDANCE = {
+    "professional": """
+THEME-SPECIFIC GUIDANCE (Professional):
+- Use clean, corporate style with blue/gray color schemes
+- Prefer structured layouts with clear hierarchy
+- Use conservative fonts and spacing
+- Include subtle gradients and shadows
+- Maintain business-appropriate color palette
+""",
+    "creative": """
+THEME-SPECIFIC GUIDANCE (Creative):
+- Use vibrant colors with artistic gradients and patterns
+- Embrace bold typography and creative layouts
+- Include dynamic visual elements
+- Use energetic color combinations
+- Allow for more expressive design choices
+""",
+    "minimal": """
+THEME-SPECIFIC GUIDANCE (Minimal):
+- Clean, simple design with lots of white space
+- Use minimal color palette (primarily black, white, gray)
+- Focus on typography and spacing
+- Avoid unnecessary decorative elements
+- Emphasize content over visual flourishes
+""",
+    "modern": """
+THEME-SPECIFIC GUIDANCE (Modern):
+- Contemporary design with bold typography
+- Use current design trends and techniques
+- Include geometric shapes and clean lines
+- Use modern color schemes and gradients
+- Emphasize sleek, cutting-edge appearance
+"""
+}
+
+# System message for generate_slide_html
+_HTML_SYSTEM_PROMPT = "You are an expert presentation designer who creates professional, visually appealing PowerPoint slides with excellent accessibility and readability. You NEVER use light grey text on light backgrounds and always ensure high contrast ratios. You ALWAYS create complete, working HTML slides that render properly when embedded. You ALWAYS scope ALL CSS to prevent affecting parent page styles. You specialize in incorporating research data and creating clean, modern slide layouts with proper typography contrast. You return valid HTML that displays immediately without errors."
+
+# Closing line of the theme block in each slide prompt
+_SLIDE_THEME_GUIDANCE = "Please incorporate this theme's visual style, color palette, and design philosophy into the layout, and match its tone in the content."
+_LAYOUT_THEME_GUIDANCE = "Please incorporate this theme's visual style, color palette, and design philosophy into the layout."
+_CONTENT_THEME_GUIDANCE = "Please ensure the content style and tone match this theme's characteristics."
+
+# Validates the "section_<index>" entries of generated slide content
+_SECTION_CONTENT_ADAPTER = TypeAdapter(Dict[str, SectionContent])
+
+# Markdown code blocks OpenAI sometimes wraps generated slide HTML in
+_HTML_FENCE_RE = re.compile(r'```html\n([\s\S]*?)\n```')
+_CODE_FENCE_RE = re.compile(r'```[a-zA-Z]*\n([\s\S]*?)\n```')
+
+# Whitespace-delimited words of three or more characters starting with a capital letter,
+# the fallback graph extraction's entity candidates
+_CAPITALIZED_WORD_RE = re.compile(r"(?<!\S)[A-Z]\S{2,}")
+
+# Seconds a streamed completion may go without a chunk before it is abandoned
+_STREAM_STALL_TIMEOUT = 10
+
+# Parsed slide responses shared by every LLMService instance, least recently used first
+_SLIDE_RESPONSE_CACHE_SIZE = 128
+_slide_response_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_slide_requests_in_flight: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+
+# Embeds requests for the semantic response cache, the same model the knowledge graph uses
+_EMBEDDING_MODEL = "text-embedding-3-small"
+
+def _parse_json(text: str) -> Any:
+    """Parse JSON text with orjson when available; decode errors subclass json.JSONDecodeError either way"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(text)
+    return json.loads(text)
+
+def _format_json(data: Any) -> str:
+    """Render data as JSON indented by two spaces for use in a prompt"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode("utf-8")
+    return json.dumps(data, indent=2)
+
+
+class _IncrementalJsonParser:
+    """
+    Best-effort parser for a JSON document that arrives in streamed fragments
+    
+    Each fragment is appended to one buffer and scanned once to track string, escape and
+    nesting state. Whenever a top-level value or an element of a top-level array (a layout
+    section) completes, the text up to it is closed with the pending brackets and parsed,
+    so partial documents only ever contain finished values. Values nested deeper complete
+    along with their section, which keeps the number of parses proportional to sections
+    rather than to every comma in the document. Each parse still reads the text up to its
+    value, so a document costs about its length times its number of sections to parse.
+    """
+    
+    # Nesting depth, after a value completes, at which the document is parsed again
+    _max_boundary_depth = 2
+    
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._length = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escaped = False
+        # Whether part of a value arrived since the last parse point
+        self._unparsed = False
+    
+    @property
+    def text(self) -> str:
+        """All text fed so far"""
+        return self._buffer.getvalue()
+    
+    def feed(self, fragment: str) -> Optional[Any]:
+        """Add a fragment, returning a partial document if a value completed within it"""
+        boundary = None
+        for offset, char in enumerate(fragment, start=self._length):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char.isspace():
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._stack.append(char)
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                # A bracket closing right after a parse point adds no new value
+                if self._unparsed and len(self._stack) <= self._max_boundary_depth:
+                    boundary = (offset + 1, "".join(self._stack))
+                    self._unparsed = False
+                    continue
+            elif char == ",":
+                if self._unparsed and len(self._stack) <= self._max_boundary_depth:
+                    boundary = (offset, "".join(self._stack))
+                    self._unparsed = False
+                continue
+            self._unparsed = True
+        
+        self._buffer.write(fragment)
+        self._length += len(fragment)
+        if boundary is None:
+            return None
+        
+        end, open_brackets = boundary
+        closers = "".join("}" if bracket == "{" else "]" for bracket in reversed(open_brackets))
+        # Read back only the text up to the value, leaving the buffer positioned for the next write
+        self._buffer.seek(0)
+        prefix = self._buffer.read(end)
+        self._buffer.seek(0, io.SEEK_END)
+        try:
+            return _parse_json(prefix + closers)
+        except json.JSONDecodeError:
+            return None
+
+
+class _CircuitBreaker:
+    """
+    Fails calls fast while a dependency is down
+    
+    After fail_max consecutive failures the breaker opens and rejects calls for
+    reset_timeout seconds, then lets one trial call through. A success closes it.
+    """
+    
+    def __init__(self, fail_max: int, reset_timeout: float):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+    
+    def allow(self) -> bool:
+        """Whether a call may be attempted now"""
+        if self._opened_at is None:
+            return True
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return False
+        # Re-arm the timeout so only one trial call goes through per window
+        self._opened_at = time.monotonic()
+        return True
+    
+    def record_success(self):
+        self._failures = 0
+        self._opened_at = None
+    
+    def record_failure(self):
+        self._failures += 1
+        if self._failures >= self.fail_max:
+            self._opened_at = time.monotonic()
+
+class _SemanticIndex:
+    """
+    Request embeddings of cached slide responses, searched by cosine similarity
+    
+    Each embedding is stored unit-normalized under a scope (a hash of the request
+    inputs that must match exactly) and the response cache key it resolves to.
+    The oldest entries are dropped beyond max_size.
+    """
+    
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: List[Tuple[str, str]] = []
+    
+    def add(self, scope: str, cache_key: str, embedding: np.ndarray):
+        if (scope, cache_key) in self._entries:
+            return
+        vector = (embedding / np.linalg.norm(embedding)).astype(np.float32)[np.newaxis]
+        self._vectors = vector if self._vectors is None else np.vstack((self._vectors, vector))[-self.max_size:]
+        self._entries = (self._entries + [(scope, cache_key)])[-self.max_size:]
+    
+    def find(self, scope: str, embedding: np.ndarray, threshold: float) -> Optional[str]:
+        """Cache key of the most similar request in the same scope, if it reaches threshold"""
+        if self._vectors is None:
+            return None
+        similarities = self._vectors @ (embedding / np.linalg.norm(embedding)).astype(np.float32)
+        in_scope = np.fromiter((entry_scope == scope for entry_scope, _ in self._entries), dtype=bool)
+        similarities[~in_scope] = -1.0
+        best = int(np.argmax(similarities))
+        return self._entries[best][1] if similarities[best] >= threshold else None
+
+_slide_response_index = _SemanticIndex(_SLIDE_RESPONSE_CACHE_SIZE)
+
+class _TokenBucket:
+    """
+    Spaces out calls to stay under a rate limit
+    
+    The bucket holds up to rate units and refills at rate units per period seconds.
+    acquire waits until enough units are available, so bursts up to rate go
+    through at once and the sustained rate never exceeds the limit.
+    """
+    
+    def __init__(self, rate: float, period: float = 60.0):
+        self.rate = rate
+        self.period = period
+        self._level = rate
+        self._updated = time.monotonic()
+    
+    async def acquire(self, amount: float = 1):
+        # A request larger than the whole bucket waits for a full bucket rather than forever
+        amount = min(amount, self.rate)
+        while True:
+            now = time.monotonic()
+            self._level = min(self.rate, self._level + (now - self._updated) * self.rate / self.period)
+            self._updated = now
+            if self._level >= amount:
+                self._level -= amount
+                return
+            await asyncio.sleep((amount - self._level) * self.period / self.rate)
+
+# Errors that mean OpenAI is unreachable or overloaded, as opposed to a bad request
+_OPENAI_OUTAGE_ERRORS = (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+
+# Shared by every LLMService instance since they share one client
+_openai_breaker = _CircuitBreaker(fail_max=5, reset_timeout=30)
+
+@lru_cache(maxsize=1)
+def _get_settings() -> Settings:
+    """Settings shared by every LLMService instance, parsed from the environment once"""
+    return Settings()
+
+@lru_cache(maxsize=1)
+def _get_rate_limiters(requests_per_minute: int, tokens_per_minute: int) -> Tuple[Optional[_TokenBucket], Optional[_TokenBucket]]:
+    """Request and token buckets shared by every LLMService instance; a limit of 0 disables its bucket"""
+    return (
+        _TokenBucket(requests_per_minute) if requests_per_minute > 0 else None,
+        _TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+    )
+
+@lru_cache(maxsize=1)
+def _get_tokenizer() -> Optional[tiktoken.Encoding]:
+    """gpt-4o tokenizer shared by every LLMService instance, or None if it cannot be loaded"""
+    try:
+        return tiktoken.encoding_for_model("gpt-4o")
+    except Exception as e:
+        logger.warning(f"Failed to load tiktoken tokenizer: {e}. Truncating prompt content by characters.")
+        return None
+
+@lru_cache(maxsize=64)
+def _render_theme_context(theme_name: str, theme_description: str, color_palette: tuple,
+                          preview_text: str, guidance: str) -> str:
+    """Theme block for a slide prompt, rendered once per distinct theme"""
+    return f"""
+THEME INFORMATION:
+- Theme Name: {theme_name}
+- Theme Description: {theme_description}
+- Color Palette: {', '.join(color_palette)}
+- Preview Text: {preview_text}
+
+{guidance}
+"""
+
+def _theme_context(theme_info: Optional[Dict], default_name: str, guidance: str) -> str:
+    """Theme block for a slide prompt, or an empty string without theme information"""
+    if not theme_info:
+        return ""
+    return _render_theme_context(
+        theme_info.get('theme_name', default_name),
+        theme_info.get('theme_description', ''),
+        tuple(theme_info.get('color_palette', [])),
+        theme_info.get('preview_text', ''),
+        guidance
+    )
+
+@lru_cache(maxsize=32)
+def _truncate_prompt_content(content: str, max_tokens: int) -> str:
+    """
+    Cut source content to a prompt token budget, ending it with an ellipsis when cut
+    
+    Cached because one slide request puts the same content in its layout and
+    content prompts and its semantic cache embedding.
+    """
+    tokenizer = _get_tokenizer()
+    if tokenizer is None:
+        # Fall back to roughly four characters per token
+        max_chars = max_tokens * 4
+        return content if len(content) <= max_chars else content[:max_chars] + "..."
+    
+    # Tokens rarely cover more than a few characters, so only a bounded prefix is encoded
+    max_chars = max_tokens * 16
+    tokens = tokenizer.encode(content[:max_chars], disallowed_special=())
+    if len(tokens) <= max_tokens and len(content) <= max_chars:
+        return content
+    # A cut through a multi-byte character decodes to a replacement character
+    return tokenizer.decode(tokens[:max_tokens]).rstrip("\ufffd") + "..."
+
+# Clients by API key, kept until close_openai_clients() runs at application shutdown
+_openai_clients: Dict[str, openai.AsyncOpenAI] = {}
+
+
+def _get_client(api_key: str) -> openai.AsyncOpenAI:
+    """OpenAI client shared by every LLMService instance so its connection pool stays warm"""
+    client = _openai_clients.get(api_key)
+    if client is None:
+        # The SDK retries rate limits and server errors with exponential backoff, honoring Retry-After
+        client = _openai_clients[api_key] = openai.AsyncOpenAI(api_key=api_key, max_retries=3)
+    return client
+
+
+async def close_openai_clients() -> None:
+    """Close the shared OpenAI clients and their connection pools"""
+    while _openai_clients:
+        _, client = _openai_clients.popitem()
+        await client.close()
+
+
 class LLMService:
     """Service for LLM-based slide generation and knowledge graph extraction"""
     
     def __init__(self):
-        self.settings = Settings()
+        self.settings = _get_settings()
         self.client = None
         self._initialize_client()
     
@@ -24,7 +596,7 @@ class LLMService:
             # Check if API key is available
             api_key = self.settings.OPENAI_API_KEY
             if api_key:
-                self.client = openai.OpenAI(api_key=api_key)
+                self.client = _get_client(api_key)
                 logger.info("OpenAI client initialized successfully")
             else:
                 logger.warning("OpenAI API key not found. LLM features will be disabled.")
@@ -37,7 +609,7 @@ class LLMService:
             logger.error(f"Error initializing OpenAI client: {e}")
             self.client = None
     
-    async def generate_slide_layout(
+    async def generate_slide(
         self, 
         content: str, 
         description: str, 
@@ -46,7 +618,7 @@ class LLMService:
         theme_info: Optional[Dict] = None
     ) -> Dict[str, Any]:
         """
-        Generate slide layout using LLM
+        Generate slide layout and section content together in a single LLM call
         
         Args:
             content: Extracted text content from files
@@ -56,68 +628,181 @@ class LLMService:
             theme_info: Detailed theme information including colors and description
             
         Returns:
-            Dict containing layout information
+            Dict with the generated "layout" and the "content" for each of its sections
         """
         if not self.client:
-            return self._generate_fallback_layout(content, description, theme)
+            layout = self._generate_fallback_layout(content, description, theme)
+            return {"layout": layout, "content": self._generate_fallback_content(content, description, layout)}
+        
+        cache_key = self._slide_cache_key("slide", content, description, theme, has_images, theme_info)
+        scope = self._slide_cache_key("slide", theme, has_images, theme_info)
+        cached, embedding = await self._find_cached_slide_response(cache_key, scope, content, description)
+        if cached is not None:
+            return cached
         
+        slide = await self._share_in_flight(
+            cache_key,
+            lambda: self._request_slide(content, description, theme, has_images, theme_info, cache_key)
+        )
+        self._index_slide_response(scope, cache_key, embedding)
+        return slide
+    
+    async def _request_slide(
+        self,
+        content: str,
+        description: str,
+        theme: str,
+        has_images: bool,
+        theme_info: Optional[Dict],
+        cache_key: Optional[str]
+    ) -> Dict[str, Any]:
+        """Make the fused slide completion and parse it, falling back on any failure"""
         try:
             # Build theme context for the prompt
-            theme_context = ""
-            if theme_info:
-                theme_context = f"""
-THEME INFORMATION:
-- Theme Name: {theme_info.get('theme_name', theme)}
-- Theme Description: {theme_info.get('theme_description', '')}
-- Color Palette: {', '.join(theme_info.get('color_palette', []))}
-- Preview Text: {theme_info.get('preview_text', '')}
-
-Please incorporate this theme's visual style, color palette, and design philosophy into the layout.
-"""
+            theme_context = _theme_context(theme_info, theme, _SLIDE_THEME_GUIDANCE)
             
-            system_prompt = f"""You are an expert presentation designer with 15+ years of experience creating compelling slides for Fortune 500 companies, TED talks, and academic conferences. Your task is to analyze content and user requirements to design an optimal, professional slide layout that maximizes impact and engagement.
+            user_prompt = f"""CONTENT ANALYSIS:
+{_truncate_prompt_content(content, self.settings.PROMPT_CONTENT_TOKENS)}
 
-CRITICAL REQUIREMENTS:
-- Create layouts that tell a story and guide the audience's attention
-- Design for visual hierarchy and readability
-- Ensure content is well-distributed across the slide
-- Consider the theme and make it cohesive with the design
-- Create multiple sections that work together to present the information effectively
-{theme_context}
+DESIGN REQUIREMENTS:
+- User Description: {description}
+- Theme: {theme}
+- Available Media: {'Images available' if has_images else 'Text content only'}
 
-Return ONLY a JSON object with the following structure (no markdown formatting, no code blocks):
-{{
-    "layout_type": "title_slide|content_slide|image_slide|mixed|key_insights|comparison|timeline|process",
-    "title": "Compelling, action-oriented slide title",
-    "sections": [
-        {{
-            "type": "text|bullet_list|image|chart|quote|highlight_box|timeline|process_step",
-            "content": "Brief description of what this section will contain",
-            "position": {{"x": 5, "y": 25, "width": 45, "height": 35}},
-            "style": {{"font_size": "18px", "color": "#2c3e50", "alignment": "left", "font_weight": "bold"}}
-        }},
-        {{
-            "type": "text|bullet_list|image|chart|quote|highlight_box|timeline|process_step", 
-            "content": "Brief description of what this section will contain",
-            "position": {{"x": 55, "y": 25, "width": 40, "height": 35}},
-            "style": {{"font_size": "16px", "color": "#34495e", "alignment": "left"}}
-        }}
-    ],
-    "background_style": "gradient|solid|image|pattern",
-    "color_scheme": "professional|creative|minimal|colorful|corporate|academic|modern"
-}}
+SLIDE GENERATION TASK:
+Design a professional, engaging slide layout that:
+1. Effectively presents the key information from the content
+2. Uses visual hierarchy to guide audience attention
+3. Creates a compelling narrative flow
+4. Works well with the specified theme
+5. Distributes content optimally across the slide
 
-LAYOUT GUIDELINES:
-- Use 2-4 sections for optimal content distribution
-- Position sections to create visual flow (left to right, top to bottom)
-- Vary section types to maintain interest (text, bullet lists, highlights)
-- Ensure adequate spacing between sections (at least 5% gap)
-- Make title prominent and engaging
-- Consider the content type and create appropriate sections
-"""
+Then, for each section in that layout, write comprehensive content that:
+- Extracts the most important insights and key messages
+- Includes specific data points, statistics, and examples from the source material
+- Flows coherently from one section to the next
+- Uses professional business language appropriate for executive audiences
+- Includes actionable insights and recommendations where relevant
 
+Design the layout and its content together so they form one compelling, professional presentation slide."""
+
+            response = await self._create_completion(
+                model=self.settings.CONTENT_MODEL,
+                max_tokens=4000,
+                temperature=0.8,
+                response_format={"type": "json_object"},
+                messages=self._slide_messages(_SLIDE_SYSTEM_PROMPT, theme_context, user_prompt)
+            )
+            
+            self._log_prompt_cache_usage(response)
+            slide_text = response.choices[0].message.content.strip()
+            
+            # Log the raw response for debugging
+            logger.info("LLM Slide Response (first 500 chars): %.500s...", slide_text)
+            
+            try:
+                slide_data = _parse_json(slide_text)
+                if not isinstance(slide_data, dict):
+                    raise ValueError("Slide data must be a dictionary")
+                layout_data = slide_data.get("layout")
+                self._validate_layout(layout_data)
+            except (json.JSONDecodeError, ValueError) as e:
+                logger.warning(f"❌ Failed to parse/validate slide response: {e}")
+                logger.warning(f"Raw response: {slide_text}")
+                logger.info("Using fallback layout generation")
+                layout_data = self._generate_fallback_layout(content, description, theme)
+                return {"layout": layout_data, "content": self._generate_fallback_content(content, description, layout_data)}
+            
+            content_data = slide_data.get("content")
+            try:
+                section_keys = self._validate_content(content_data)
+            except ValueError as e:
+                # The layout is still usable, so only the content falls back
+                logger.warning(f"❌ Failed to validate slide content: {e}")
+                content_data = self._generate_fallback_content(content, description, layout_data)
+                section_keys = list(content_data)
+            else:
+                self._cache_slide_response(cache_key, {"layout": layout_data, "content": content_data})
+            
+            logger.info("✅ Successfully parsed slide JSON: %s", layout_data.get('layout_type', 'unknown'))
+            logger.info("   Layout sections: %s, content sections: %s", len(layout_data['sections']), len(section_keys))
+            logger.info("   Title: %s", layout_data.get('title', 'No title'))
+            return {"layout": layout_data, "content": content_data}
+                
+        except Exception as e:
+            logger.error(f"Error generating slide: {e}")
+            layout = self._generate_fallback_layout(content, description, theme)
+            return {"layout": layout, "content": self._generate_fallback_content(content, description, layout)}
+    
+    async def generate_slide_layout(
+        self, 
+        content: str, 
+        description: str, 
+        theme: str = "default",
+        has_images: bool = False,
+        theme_info: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate slide layout using LLM
+        
+        Args:
+            content: Extracted text content from files
+            description: User's slide description
+            theme: Slide theme
+            has_images: Whether images are available
+            theme_info: Detailed theme information including colors and description
+            
+        Returns:
+            Dict containing layout information
+        """
+        async def last_streamed_layout() -> Dict[str, Any]:
+            layout = None
+            async for layout in self.generate_slide_layout_stream(content, description, theme, has_images, theme_info):
+                pass
+            return layout
+        
+        cache_key = self._slide_cache_key("layout", content, description, theme, has_images, theme_info)
+        return await self._share_in_flight(cache_key, last_streamed_layout)
+    
+    async def generate_slide_layout_stream(
+        self, 
+        content: str, 
+        description: str, 
+        theme: str = "default",
+        has_images: bool = False,
+        theme_info: Optional[Dict] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate slide layout using LLM, streaming partial layouts as tokens arrive
+        
+        Args:
+            content: Extracted text content from files
+            description: User's slide description
+            theme: Slide theme
+            has_images: Whether images are available
+            theme_info: Detailed theme information including colors and description
+            
+        Yields:
+            Partial layouts holding the fields completed so far, then the validated
+            layout (or the fallback layout) as the last item
+        """
+        if not self.client:
+            yield self._generate_fallback_layout(content, description, theme)
+            return
+        
+        cache_key = self._slide_cache_key("layout", content, description, theme, has_images, theme_info)
+        scope = self._slide_cache_key("layout", theme, has_images, theme_info)
+        cached, embedding = await self._find_cached_slide_response(cache_key, scope, content, description)
+        if cached is not None:
+            yield cached
+            return
+        
+        try:
+            # Build theme context for the prompt
+            theme_context = _theme_context(theme_info, theme, _LAYOUT_THEME_GUIDANCE)
+            
             user_prompt = f"""CONTENT ANALYSIS:
-{content[:3000]}...
+{_truncate_prompt_content(content, self.settings.PROMPT_CONTENT_TOKENS)}
 
 DESIGN REQUIREMENTS:
 - User Description: {description}
@@ -142,60 +827,53 @@ Consider the content type and create appropriate sections:
 
 Design a layout that transforms this content into a compelling, professional presentation slide."""
 
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
+            stream = await self._create_completion(
+                model=self.settings.LAYOUT_MODEL,
                 max_tokens=2000,
                 temperature=0.8,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ]
+                response_format={"type": "json_object"},
+                messages=self._slide_messages(_LAYOUT_SYSTEM_PROMPT, theme_context, user_prompt),
+                stream=True,
+                stream_options={"include_usage": True}
             )
             
-            layout_text = response.choices[0].message.content.strip()
-            
-            # Log the raw response for debugging
-            logger.info(f"LLM Layout Response (first 500 chars): {layout_text[:500]}...")
-            
-            # Clean up markdown code blocks if present
-            if layout_text.startswith("```json"):
-                layout_text = layout_text[7:]  # Remove ```json
-            elif layout_text.startswith("```"):
-                layout_text = layout_text[3:]   # Remove ```
-            
-            if layout_text.endswith("```"):
-                layout_text = layout_text[:-3]  # Remove trailing ```
+            parser = _IncrementalJsonParser()
+            async for chunk in stream:
+                # Usage arrives on a final chunk without choices
+                self._log_prompt_cache_usage(chunk)
+                if not chunk.choices:
+                    continue
+                partial_layout = parser.feed(chunk.choices[0].delta.content or "")
+                if isinstance(partial_layout, dict):
+                    yield partial_layout
             
-            layout_text = layout_text.strip()
-            
-            # Try to parse JSON response
-            try:
-                layout_data = json.loads(layout_text)
-                
-                # Validate the layout structure
-                if not isinstance(layout_data, dict):
-                    raise ValueError("Layout data must be a dictionary")
-                
-                if "sections" not in layout_data:
-                    raise ValueError("Layout data must contain 'sections' field")
-                
-                if not isinstance(layout_data["sections"], list):
-                    raise ValueError("Layout sections must be a list")
-                
-                logger.info(f"✅ Successfully parsed layout JSON: {layout_data.get('layout_type', 'unknown')}")
-                logger.info(f"   Sections: {len(layout_data['sections'])}")
-                logger.info(f"   Title: {layout_data.get('title', 'No title')}")
-                return layout_data
-                
-            except (json.JSONDecodeError, ValueError) as e:
-                logger.warning(f"❌ Failed to parse/validate LLM response: {e}")
-                logger.warning(f"Raw response: {layout_text}")
-                logger.info("Using fallback layout generation")
-                return self._generate_fallback_layout(content, description, theme)
+            layout_text = parser.text.strip()
                 
         except Exception as e:
             logger.error(f"Error generating slide layout: {e}")
-            return self._generate_fallback_layout(content, description, theme)
+            yield self._generate_fallback_layout(content, description, theme)
+            return
+        
+        # Log the raw response for debugging
+        logger.info("LLM Layout Response (first 500 chars): %.500s...", layout_text)
+        
+        # Try to parse JSON response
+        try:
+            layout_data = _parse_json(layout_text)
+            self._validate_layout(layout_data)
+            
+            logger.info("✅ Successfully parsed layout JSON: %s", layout_data.get('layout_type', 'unknown'))
+            logger.info("   Sections: %s", len(layout_data['sections']))
+            logger.info("   Title: %s", layout_data.get('title', 'No title'))
+            self._cache_slide_response(cache_key, layout_data)
+            self._index_slide_response(scope, cache_key, embedding)
+            yield layout_data
+            
+        except (json.JSONDecodeError, ValueError) as e:
+            logger.warning(f"❌ Failed to parse/validate LLM response: {e}")
+            logger.warning(f"Raw response: {layout_text}")
+            logger.info("Using fallback layout generation")
+            yield self._generate_fallback_layout(content, description, theme)
     
     async def generate_slide_content(
         self, 
@@ -219,56 +897,38 @@ Design a layout that transforms this content into a compelling, professional pre
         if not self.client:
             return self._generate_fallback_content(content, description, layout)
         
+        cache_key = self._slide_cache_key("content", content, description, layout, theme_info)
+        scope = self._slide_cache_key("content", layout, theme_info)
+        cached, embedding = await self._find_cached_slide_response(cache_key, scope, content, description)
+        if cached is not None:
+            return cached
+        
+        content_data = await self._share_in_flight(
+            cache_key,
+            lambda: self._request_slide_content(content, description, layout, theme_info, cache_key)
+        )
+        self._index_slide_response(scope, cache_key, embedding)
+        return content_data
+    
+    async def _request_slide_content(
+        self,
+        content: str,
+        description: str,
+        layout: Dict[str, Any],
+        theme_info: Optional[Dict],
+        cache_key: Optional[str]
+    ) -> Dict[str, Any]:
+        """Make the section content completion and parse it, falling back on any failure"""
         try:
             # Build theme context for the prompt
-            theme_context = ""
-            if theme_info:
-                theme_context = f"""
-THEME INFORMATION:
-- Theme Name: {theme_info.get('theme_name', 'default')}
-- Theme Description: {theme_info.get('theme_description', '')}
-- Color Palette: {', '.join(theme_info.get('color_palette', []))}
-- Preview Text: {theme_info.get('preview_text', '')}
-
-Please ensure the content style and tone match this theme's characteristics.
-"""
+            theme_context = _theme_context(theme_info, 'default', _CONTENT_THEME_GUIDANCE)
             
-            system_prompt = f"""You are a senior content strategist and copywriter with 10+ years of experience creating compelling presentation content for Fortune 500 companies, TED talks, and high-profile events. Your task is to transform raw content into engaging, well-structured slide content that tells a compelling story.
-
-CRITICAL REQUIREMENTS:
-- Create content that is concise, impactful, and easy to read
-- Maintain professional tone while being engaging
-- Ensure content fits the specified layout structure
-- Make information scannable and memorable
-- Use active voice and action-oriented language
-{theme_context}
-
-Return ONLY a JSON object with content for each section (no markdown formatting, no code blocks):
-{{
-    "section_0": {{
-        "content": "Engaging, well-formatted content for the first section",
-        "style_notes": "Any specific styling or formatting notes"
-    }},
-    "section_1": {{
-        "content": "Engaging, well-formatted content for the second section", 
-        "style_notes": "Any specific styling or formatting notes"
-    }}
-}}
-
-CONTENT GUIDELINES:
-- Keep bullet points to 3-5 items maximum
-- Use clear, action-oriented language
-- Include key insights and takeaways
-- Make content scannable and memorable
-- Ensure proper hierarchy and flow
-"""
-
             user_prompt = f"""SOURCE CONTENT ANALYSIS:
-{content[:3000]}...
+{_truncate_prompt_content(content, self.settings.PROMPT_CONTENT_TOKENS)}
 
 USER REQUIREMENTS:
 - Description: {description}
-- Layout Structure: {json.dumps(layout, indent=2)}
+- Layout Structure: {_format_json(layout)}
 
 CONTENT GENERATION TASK:
 Transform the source content into compelling, professional slide content that:
@@ -288,46 +948,27 @@ For each section in the layout, create comprehensive content that:
 
 Generate detailed, comprehensive content for each section."""
 
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
+            response = await self._create_completion(
+                model=self.settings.CONTENT_MODEL,
                 max_tokens=2500,
                 temperature=0.8,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ]
+                response_format={"type": "json_object"},
+                messages=self._slide_messages(_CONTENT_SYSTEM_PROMPT, theme_context, user_prompt)
             )
             
+            self._log_prompt_cache_usage(response)
             content_text = response.choices[0].message.content.strip()
             
             # Log the raw response for debugging
-            logger.info(f"LLM Content Response (first 500 chars): {content_text[:500]}...")
-            
-            # Clean up markdown code blocks if present
-            if content_text.startswith("```json"):
-                content_text = content_text[7:]  # Remove ```json
-            elif content_text.startswith("```"):
-                content_text = content_text[3:]   # Remove ```
-            
-            if content_text.endswith("```"):
-                content_text = content_text[:-3]  # Remove trailing ```
-            
-            content_text = content_text.strip()
+            logger.info("LLM Content Response (first 500 chars): %.500s...", content_text)
             
             try:
-                content_data = json.loads(content_text)
-                
-                # Validate the content structure
-                if not isinstance(content_data, dict):
-                    raise ValueError("Content data must be a dictionary")
-                
-                # Check if we have at least one section
-                section_keys = [key for key in content_data.keys() if key.startswith("section_")]
-                if not section_keys:
-                    raise ValueError("Content data must contain at least one section")
+                content_data = _parse_json(content_text)
+                section_keys = self._validate_content(content_data)
                 
                 logger.info("✅ Successfully parsed content JSON")
-                logger.info(f"   Sections: {len(section_keys)}")
+                logger.info("   Sections: %s", len(section_keys))
+                self._cache_slide_response(cache_key, content_data)
                 return content_data
                 
             except (json.JSONDecodeError, ValueError) as e:
@@ -363,24 +1004,28 @@ Generate detailed, comprehensive content for each section."""
         
         try:
             # Use default system prompt if none provided
+            model = "gpt-4o"
             if not system_prompt:
                 system_prompt = """You are a helpful AI assistant that provides clear, concise, and accurate responses. 
                 Follow the user's instructions carefully and format your response appropriately."""
+                # Generic requests without a tailored system prompt do not need the larger model
+                model = self.settings.GENERAL_MODEL
             
-            # Create the message request
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
+            # Create the message request, streamed so a stalled generation fails fast
+            stream = await self._create_completion(
+                model=model,
                 max_tokens=max_tokens,
                 temperature=0.7,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": prompt}
-                ]
+                ],
+                stream=True
             )
             
-            # Extract the generated content
-            generated_content = response.choices[0].message.content.strip()
-            logger.info(f"Successfully generated content with {len(generated_content)} characters")
+            # Assemble the generated content
+            generated_content = "".join([text async for text in self._stream_text(stream)]).strip()
+            logger.info("Successfully generated content with %s characters", len(generated_content))
             
             return generated_content
             
@@ -406,52 +1051,12 @@ Generate detailed, comprehensive content for each section."""
             
         Returns:
             Dictionary containing extracted entities, relationships, and facts
-        """
-        if not self.client:
-            logger.warning("LLM client not available, returning empty knowledge graph data")
-            return self._generate_empty_knowledge_graph_data(chunk_index, filename, file_path)
-        
-        try:
-            system_prompt = """You are an expert knowledge graph extraction specialist. Your task is to analyze text content and extract ONLY three types of information:
-
-1. ENTITIES: Named entities, concepts, organizations, people, places, etc.
-2. RELATIONSHIPS: Connections between entities (subject-verb-object relationships)
-3. FACTS: Key factual information, statistics, claims, or assertions
-
-CRITICAL REQUIREMENTS:
-- Return ONLY a JSON object with the exact structure specified
-- Do not include any explanations, markdown, or additional text
-- Focus on factual, extractable information
-- Be precise and accurate
-- Do not generate or invent information not present in the text
-
-Return ONLY this JSON structure (no other text):
-{
-    "entities": [
-        {
-            "id": "unique_entity_id",
-            "name": "entity_name",
-            "type": "entity_type",
-            "description": "brief_description",
-        }
-    ],
-    "relationships": [
-        {
-            "id": "unique_relationship_id",
-            "source_entity": "source_entity_id",
-            "target_entity": "target_entity_id",
-            "relationship_type": "relationship_label",
-        }
-    ],
-    "facts": [
-        {
-            "id": "unique_fact_id",
-            "content": "factual_statement",
-            "source_entities": ["entity_id1", "entity_id2"],
-        }
-    ]
-}"""
-
+        """
+        if not self.client:
+            logger.warning("LLM client not available, returning empty knowledge graph data")
+            return self._generate_empty_knowledge_graph_data(chunk_index, filename, file_path)
+        
+        try:
             user_prompt = f"""Analyze the following text content and extract entities, relationships, and facts:
 
 TEXT CONTENT:
@@ -465,31 +1070,25 @@ Extract ONLY:
 
 Return the JSON structure as specified in the system prompt. Be thorough but accurate."""
 
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
+            response = await self._create_completion(
+                model=self.settings.KG_MODEL,
                 max_tokens=2000,
                 temperature=0.1,  # Low temperature for more consistent extraction
+                response_format=(
+                    _KNOWLEDGE_GRAPH_RESPONSE_FORMAT if self.settings.ENABLE_STRUCTURED_OUTPUTS
+                    else {"type": "json_object"}
+                ),
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    {"role": "system", "content": _KNOWLEDGE_GRAPH_SYSTEM_PROMPT},
                     {"role": "user", "content": user_prompt}
                 ]
             )
             
+            self._log_prompt_cache_usage(response)
             extraction_text = response.choices[0].message.content.strip()
             
-            # Clean up markdown code blocks if present
-            if extraction_text.startswith("```json"):
-                extraction_text = extraction_text[7:]
-            elif extraction_text.startswith("```"):
-                extraction_text = extraction_text[3:]
-            
-            if extraction_text.endswith("```"):
-                extraction_text = extraction_text[:-3]
-            
-            extraction_text = extraction_text.strip()
-            
             try:
-                extraction_data = json.loads(extraction_text)
+                extraction_data = _parse_json(extraction_text)
                 
                 # Validate the structure
                 required_fields = ["entities", "relationships", "facts"]
@@ -508,12 +1107,12 @@ Return the JSON structure as specified in the system prompt. Be thorough but acc
                     "extraction_timestamp": self._get_current_timestamp()
                 }
 
-                logger.info(f"Extraction data: {extraction_data}")
+                logger.debug("Extraction data: %s", extraction_data)
                 
-                logger.info(f"Successfully extracted knowledge graph data from chunk {chunk_index}")
-                logger.info(f"  Entities: {len(extraction_data['entities'])}")
-                logger.info(f"  Relationships: {len(extraction_data['relationships'])}")
-                logger.info(f"  Facts: {len(extraction_data['facts'])}")
+                logger.info("Successfully extracted knowledge graph data from chunk %s", chunk_index)
+                logger.info("  Entities: %s", len(extraction_data['entities']))
+                logger.info("  Relationships: %s", len(extraction_data['relationships']))
+                logger.info("  Facts: %s", len(extraction_data['facts']))
                 
                 return extraction_data
                 
@@ -527,6 +1126,43 @@ Return the JSON structure as specified in the system prompt. Be thorough but acc
             logger.error(f"Error extracting knowledge graph from chunk: {e}")
             return self._generate_fallback_knowledge_graph_data(content, chunk_index, filename, file_path)
 
+    async def extract_knowledge_graph_from_chunks(
+        self,
+        chunks: List[str],
+        filename: str,
+        file_path: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Extract knowledge graph data from all chunks of a file concurrently
+        
+        At most OPENAI_MAX_CONCURRENCY extractions run at once, so large files do not
+        burst past the OpenAI rate limits.
+        
+        Args:
+            chunks: Text content chunks of the file, in order
+            filename: Name of the source file
+            file_path: Path to the source file
+            
+        Returns:
+            Extraction data for each chunk, in chunk order
+        """
+        semaphore = asyncio.Semaphore(self.settings.OPENAI_MAX_CONCURRENCY)
+        
+        async def extract(chunk: str, chunk_index: int) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.extract_knowledge_graph_from_chunk(chunk, chunk_index, filename, file_path)
+        
+        results = await asyncio.gather(
+            *(extract(chunk, i) for i, chunk in enumerate(chunks)),
+            return_exceptions=True
+        )
+        
+        for i, result in enumerate(results):
+            if isinstance(result, Exception):
+                logger.error(f"Chunk {i} extraction failed: {result}")
+                results[i] = self._generate_fallback_knowledge_graph_data(chunks[i], i, filename, file_path)
+        return results
+
     def _generate_fallback_layout(self, content: str, description: str, theme: str) -> Dict[str, Any]:
         """Generate a fallback layout when LLM is not available"""
         logger.info("Using fallback layout generation")
@@ -558,19 +1194,20 @@ Return the JSON structure as specified in the system prompt. Be thorough but acc
         sections = layout.get("sections", [])
         content_data = {}
         
+        # Every section of a type shows the same text, so build it once:
+        # the first 200 characters, and bullet points from the first five lines
+        section_content = content[:200] + "..." if len(content) > 200 else content
+        lines = content.split('\n', 5)[:5]
+        bullet_content = "\n".join([f"• {line.strip()}" for line in lines if line.strip()])
+        
         for i, section in enumerate(sections):
             if section["type"] == "text":
-                # Use first 200 characters of content
-                section_content = content[:200] + "..." if len(content) > 200 else content
                 content_data[f"section_{i}"] = {
                     "type": "text",
                     "content": section_content,
                     "style": section.get("style", {})
                 }
             elif section["type"] == "bullet_list":
-                # Create bullet points from content
-                lines = content.split('\n')[:5]
-                bullet_content = "\n".join([f"• {line.strip()}" for line in lines if line.strip()])
                 content_data[f"section_{i}"] = {
                     "type": "bullet_list",
                     "content": bullet_content,
@@ -579,6 +1216,205 @@ Return the JSON structure as specified in the system prompt. Be thorough but acc
         
         return content_data
 
+    async def _share_in_flight(
+        self,
+        cache_key: Optional[str],
+        request: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """Run a slide request, or join an identical one that is already waiting on the model"""
+        if cache_key is None:
+            return await request()
+        
+        in_flight = _slide_requests_in_flight.get(cache_key)
+        if in_flight is None:
+            in_flight = asyncio.ensure_future(request())
+            _slide_requests_in_flight[cache_key] = in_flight
+            in_flight.add_done_callback(lambda _: _slide_requests_in_flight.pop(cache_key, None))
+        else:
+            logger.info("Joining identical in-flight slide request")
+        # Shielded so one caller giving up does not cancel the request for the others
+        return copy.deepcopy(await asyncio.shield(in_flight))
+
+    async def generate_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "gpt-4o",
+        max_tokens: int = 2000,
+        temperature: float = 0.7
+    ) -> str:
+        """
+        Run a caller-built chat prompt through the shared rate limits and circuit breaker
+        
+        Args:
+            messages: Chat messages to send
+            model: OpenAI model name
+            max_tokens: Maximum tokens for the response
+            temperature: Sampling temperature
+            
+        Returns:
+            The generated message text
+        """
+        response = await self._create_completion(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        return response.choices[0].message.content
+
+    async def _create_completion(self, **request) -> Any:
+        """Create a chat completion, failing fast while the circuit breaker is open"""
+        return await self._call_openai(self.client.chat.completions.create, request)
+
+    async def _create_embedding(self, **request) -> Any:
+        """Create an embedding, failing fast while the circuit breaker is open"""
+        return await self._call_openai(self.client.embeddings.create, request)
+
+    async def _call_openai(self, create: Callable[..., Awaitable[Any]], request: Dict[str, Any]) -> Any:
+        """Send an OpenAI request under the shared rate limits, recording outages on the circuit breaker"""
+        if not _openai_breaker.allow():
+            raise ConnectionError("OpenAI circuit breaker is open after repeated failures")
+        await self._wait_for_rate_limit(request)
+        try:
+            response = await create(**request)
+        except _OPENAI_OUTAGE_ERRORS:
+            _openai_breaker.record_failure()
+            raise
+        _openai_breaker.record_success()
+        return response
+
+    async def _wait_for_rate_limit(self, request: Dict[str, Any]):
+        """Wait until the request fits under the configured OpenAI request and token rate limits"""
+        request_bucket, token_bucket = _get_rate_limiters(self.settings.OPENAI_RPM, self.settings.OPENAI_TPM)
+        if request_bucket is not None:
+            await request_bucket.acquire()
+        if token_bucket is not None:
+            # OpenAI counts the prompt plus max_tokens against the limit when the request arrives
+            if "input" in request:
+                # Embedding requests take one text or a batch of them
+                prompt = request["input"] if isinstance(request["input"], str) else "".join(request["input"])
+            else:
+                prompt = "".join(message["content"] for message in request["messages"])
+            tokenizer = _get_tokenizer()
+            prompt_tokens = len(tokenizer.encode(prompt, disallowed_special=())) if tokenizer else len(prompt) // 4
+            await token_bucket.acquire(prompt_tokens + request.get("max_tokens", 0))
+
+    @staticmethod
+    async def _stream_text(stream: AsyncIterator[Any]) -> AsyncIterator[str]:
+        """Text deltas of a streamed completion, raising TimeoutError if the model stalls between chunks"""
+        chunks = aiter(stream)
+        while True:
+            try:
+                chunk = await asyncio.wait_for(anext(chunks), _STREAM_STALL_TIMEOUT)
+            except StopAsyncIteration:
+                return
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    @staticmethod
+    def _slide_messages(system_prompt: str, theme_context: str, user_prompt: str) -> List[Dict[str, str]]:
+        """Chat messages with the static system prompt first and any theme details after it"""
+        messages = [{"role": "system", "content": system_prompt}]
+        if theme_context:
+            messages.append({"role": "system", "content": theme_context.strip()})
+        messages.append({"role": "user", "content": user_prompt})
+        return messages
+
+    @staticmethod
+    def _log_prompt_cache_usage(response: Any):
+        """Log how many prompt tokens OpenAI served from its prompt cache"""
+        usage = getattr(response, "usage", None)
+        cached_tokens = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", None)
+        if cached_tokens is not None:
+            logger.debug("Prompt cache: %s of %s prompt tokens cached", cached_tokens, usage.prompt_tokens)
+
+    def _slide_cache_key(self, *request: Any) -> Optional[str]:
+        """Key a slide generation request by a hash of its inputs, or None when response caching is off"""
+        if not self.settings.ENABLE_LLM_CACHE:
+            return None
+        payload = json.dumps(request, sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+    @staticmethod
+    def _get_cached_slide_response(cache_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Return a copy of a cached slide response, marking it as recently used"""
+        if cache_key is None or cache_key not in _slide_response_cache:
+            return None
+        _slide_response_cache.move_to_end(cache_key)
+        logger.info("Using cached LLM slide response")
+        return copy.deepcopy(_slide_response_cache[cache_key])
+
+    @staticmethod
+    def _cache_slide_response(cache_key: Optional[str], response: Dict[str, Any]):
+        """Store a copy of a parsed slide response, evicting the least recently used ones"""
+        if cache_key is None:
+            return
+        _slide_response_cache[cache_key] = copy.deepcopy(response)
+        _slide_response_cache.move_to_end(cache_key)
+        while len(_slide_response_cache) > _SLIDE_RESPONSE_CACHE_SIZE:
+            _slide_response_cache.popitem(last=False)
+
+    async def _find_cached_slide_response(
+        self,
+        cache_key: Optional[str],
+        scope: Optional[str],
+        content: str,
+        description: str
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[np.ndarray]]:
+        """
+        Look up a slide response by its exact inputs, then by similarity to earlier requests
+        
+        Returns:
+            The cached response, or None and the request embedding (if the semantic
+            cache is on) to index the new response under once it has been cached
+        """
+        cached = self._get_cached_slide_response(cache_key)
+        if cached is not None or cache_key is None or not self.settings.ENABLE_SEMANTIC_LLM_CACHE:
+            return cached, None
+        
+        try:
+            response = await self._create_embedding(
+                model=_EMBEDDING_MODEL,
+                input=f"{description}\n\n{_truncate_prompt_content(content, self.settings.PROMPT_CONTENT_TOKENS)}"
+            )
+        except Exception as e:
+            logger.warning(f"Could not embed slide request for the semantic cache: {e}")
+            return None, None
+        embedding = np.asarray(response.data[0].embedding, dtype=np.float32)
+        
+        similar_key = _slide_response_index.find(scope, embedding, self.settings.SEMANTIC_LLM_CACHE_THRESHOLD)
+        if similar_key is not None:
+            cached = self._get_cached_slide_response(similar_key)
+            if cached is not None:
+                logger.info("Using LLM slide response of a similar request")
+                return cached, None
+        return None, embedding
+
+    @staticmethod
+    def _index_slide_response(scope: Optional[str], cache_key: Optional[str], embedding: Optional[np.ndarray]):
+        """Make a cached slide response findable by similarity to its request embedding"""
+        if embedding is not None and cache_key in _slide_response_cache:
+            _slide_response_index.add(scope, cache_key, embedding)
+
+    @staticmethod
+    def _validate_layout(layout_data: Any) -> None:
+        """Raise ValueError if the LLM layout does not match the SlideLayout model"""
+        # pydantic's ValidationError is a ValueError
+        SlideLayout.model_validate(layout_data)
+
+    @staticmethod
+    def _validate_content(content_data: Any) -> List[str]:
+        """Return the section keys of the LLM content, raising ValueError if there are none"""
+        if not isinstance(content_data, dict):
+            raise ValueError("Content data must be a dictionary")
+        
+        # Check if we have at least one section, and that each one matches the SectionContent model
+        section_keys = [key for key in content_data.keys() if key.startswith("section_")]
+        if not section_keys:
+            raise ValueError("Content data must contain at least one section")
+        _SECTION_CONTENT_ADAPTER.validate_python({key: content_data[key] for key in section_keys})
+        return section_keys
+
     def _generate_empty_knowledge_graph_data(self, chunk_index: int, filename: str, file_path: str) -> Dict[str, Any]:
         """Generate empty knowledge graph data when LLM is not available"""
         return {
@@ -604,17 +1440,15 @@ Return the JSON structure as specified in the system prompt. Be thorough but acc
         facts = []
         
         # Extract basic entities (capitalized words that might be entities)
-        words = content.split()
-        for i, word in enumerate(words):
-            if word and word[0].isupper() and len(word) > 2:
-                # Simple heuristic for entity detection
-                entity_id = f"entity_{chunk_index}_{i}"
-                entities.append({
-                    "id": entity_id,
-                    "name": word,
-                    "type": "unknown",
-                    "description": f"Extracted from chunk {chunk_index}",
-                })
+        for match in _CAPITALIZED_WORD_RE.finditer(content):
+            # Simple heuristic for entity detection, keyed by the word's offset in the chunk
+            entity_id = f"entity_{chunk_index}_{match.start()}"
+            entities.append({
+                "id": entity_id,
+                "name": match.group(),
+                "type": "unknown",
+                "description": f"Extracted from chunk {chunk_index}",
+            })
         
         return {
             "entities": entities,
@@ -632,7 +1466,6 @@ Return the JSON structure as specified in the system prompt. Be thorough but acc
 
     def _get_current_timestamp(self) -> str:
         """Get current timestamp as string"""
-        from datetime import datetime
         return datetime.now().isoformat()
     
     def is_available(self) -> bool:
@@ -658,140 +1491,148 @@ Return the JSON structure as specified in the system prompt. Be thorough but acc
             raise Exception("LLM service not available")
         
         try:
-            # PROMPT CONSTRUCTION: Build the comprehensive prompt for OpenAI GPT based on available data
-            # This prompt engineering approach ensures consistent, high-quality slide generation
-            # by providing clear requirements, examples, and constraints to the AI model
-            prompt = f"""Create a professional PowerPoint slide in HTML format based on the following requirements:
+            # Streamed so a stalled generation fails fast instead of holding the request open
+            slide_html = "".join([
+                text async for text in self.generate_slide_html_stream(
+                    description, theme, researchData, contentPlan, userFeedback, documents, model
+                )
+            ])
+
+            # Validate that content was actually generated
+            if not slide_html:
+                raise Exception('No slide content generated')
+
+            # Clean up the response by extracting HTML from markdown code blocks
+            # OpenAI sometimes wraps HTML in markdown formatting that needs removal
+            if '```' in slide_html:
+                # Prefer HTML-specific code blocks, then generic ones
+                fence_re = _HTML_FENCE_RE if '```html' in slide_html else _CODE_FENCE_RE
+                fence_match = fence_re.search(slide_html)
+                if fence_match:
+                    slide_html = fence_match.group(1)
+
+            # RESPONSE VALIDATION: Debug logging to monitor OpenAI output quality and format
+            # These logs help troubleshoot issues with slide generation and ensure we receive valid HTML
+            logger.info('Generated slide HTML length: %s', len(slide_html))
+            logger.info('Generated slide HTML preview: %.200s...', slide_html)
+
+            # CONTENT VALIDATION: Verify that OpenAI returned actual HTML markup
+            # Check for common HTML elements to ensure the response contains valid slide content
+            # This helps catch cases where OpenAI might return plain text or malformed responses
+            if not ('<div' in slide_html or '<html' in slide_html):
+                logger.warning('Warning: Generated content may not be valid HTML')
+
+            return slide_html.strip()  # Remove any leading/trailing whitespace
+
+        except Exception as e:
+            logger.error(f"Error generating slide HTML: {e}")
+            raise Exception(f"Failed to generate slide: {str(e)}")
+
+    async def generate_slide_html_stream(
+        self,
+        description: str,
+        theme: str = "Professional",
+        researchData: Optional[str] = None,
+        contentPlan: Optional[str] = None,
+        userFeedback: Optional[str] = None,
+        documents: Optional[List[Dict[str, Any]]] = None,
+        model: str = "gpt-4o"
+    ) -> AsyncIterator[str]:
+        """
+        Generate a slide in HTML format, yielding the raw HTML text as it arrives
+        
+        Takes the same arguments as generate_slide_html. Markdown code fences the model
+        wraps the HTML in are passed through; generate_slide_html strips them.
+        """
+        if not self.client:
+            raise Exception("LLM service not available")
+        
+        # Make API call to OpenAI GPT for slide generation
+        # Using specific model, temperature, and token limits for optimal results
+        stream = await self._create_completion(
+            model=model,
+            max_tokens=2000,  # Sufficient tokens for complete HTML slide generation
+            temperature=0.7,  # Balanced creativity while maintaining consistency
+            messages=self._slide_html_messages(description, theme, researchData, contentPlan, userFeedback, documents),
+            stream=True
+        )
+        async for text in self._stream_text(stream):
+            yield text
+
+    @staticmethod
+    def _slide_html_messages(
+        description: str,
+        theme: str,
+        researchData: Optional[str],
+        contentPlan: Optional[str],
+        userFeedback: Optional[str],
+        documents: Optional[List[Dict[str, Any]]]
+    ) -> List[Dict[str, str]]:
+        """Chat messages asking for a slide in HTML format"""
+        # PROMPT CONSTRUCTION: Build the comprehensive prompt for OpenAI GPT based on available data
+        # This prompt engineering approach ensures consistent, high-quality slide generation
+        # by providing clear requirements, examples, and constraints to the AI model
+        parts = [f"""Create a professional PowerPoint slide in HTML format based on the following requirements:
 
 SLIDE DESCRIPTION: {description}
 
 THEME: {theme}
 
-"""
+"""]
 
-            # Add content plan from content planning step if available
-            # This provides structured guidance for what should be included on the slide
-            if contentPlan:
-                prompt += f"""CONTENT PLAN:
+        # Add content plan from content planning step if available
+        # This provides structured guidance for what should be included on the slide
+        if contentPlan:
+            parts.append(f"""CONTENT PLAN:
 {contentPlan}
 
-"""
+""")
 
-            # Add user feedback and additional requirements if provided
-            # This allows for iterative improvements and specific user requests
-            if userFeedback:
-                prompt += f"""USER FEEDBACK & ADDITIONAL REQUIREMENTS:
+        # Add user feedback and additional requirements if provided
+        # This allows for iterative improvements and specific user requests
+        if userFeedback:
+            parts.append(f"""USER FEEDBACK & ADDITIONAL REQUIREMENTS:
 {userFeedback}
 
-"""
+""")
 
-            # Append research data to prompt if provided by user
-            # This allows AI to incorporate relevant insights and statistics
-            if researchData:
-                prompt += f"""RESEARCH DATA TO INCORPORATE:
+        # Append research data to prompt if provided by user
+        # This allows AI to incorporate relevant insights and statistics
+        if researchData:
+            parts.append(f"""RESEARCH DATA TO INCORPORATE:
 {researchData}
 
-"""
-
-            # Add parsed document content if available
-            # This provides the actual content from uploaded documents for AI to use
-            if documents and len(documents) > 0:
-                prompt += "DOCUMENT CONTENT:\n"
-
-                # If we have parsed document content, include the actual text
-                if len(documents) > 0 and isinstance(documents[0], dict) and 'content' in documents[0]:
-                    # documents contains parsed content
-                    for index, doc in enumerate(documents):
-                        if doc.get('success') and doc.get('content'):
-                            prompt += f"Document {index + 1} ({doc.get('filename', 'unknown')}):\n{doc['content']}\n\n"
-                        else:
-                            prompt += f"Document {index + 1} ({doc.get('filename', 'unknown')}): [Content extraction failed]\n\n"
-                else:
-                    # Fallback: just mention document count if no parsed content available
-                    prompt += f"User has uploaded {len(documents)} document(s) for reference.\n\n"
-
-            # TEMPLATE EXAMPLES: Provide example templates for consistency
-            templatesContent = """EXAMPLE TEMPLATES TO FOLLOW:
-Here are examples of well-designed slides that you should use as inspiration for structure, styling, and layout:
-
-<!DOCTYPE html>
-<html>
-<head>
-<style>
-.slide-main { 
-  width: 100%; 
-  height: 100%; 
-  background: white; 
-  padding: 40px; 
-  box-sizing: border-box; 
-  font-family: Arial, sans-serif;
-  display: flex;
-  flex-direction: column;
-  justify-content: center;
-}
-.slide-main h1 { color: #1a1a1a; font-size: 2.5rem; margin-bottom: 1rem; }
-.slide-main p { color: #333333; font-size: 1.1rem; line-height: 1.6; }
-</style>
-</head>
-<body>
-<div class="slide-main">
-  <!-- Your slide content here -->
-</div>
-</body>
-</html>
-
-Please create a slide that follows similar structural patterns, CSS scoping practices, and professional styling as shown in the example above.
-
-"""
+""")
+
+        # Add parsed document content if available
+        # This provides the actual content from uploaded documents for AI to use
+        if documents and len(documents) > 0:
+            parts.append("DOCUMENT CONTENT:\n")
+
+            # If we have parsed document content, include the actual text
+            if len(documents) > 0 and isinstance(documents[0], dict) and 'content' in documents[0]:
+                # documents contains parsed content
+                for index, doc in enumerate(documents):
+                    if doc.get('success') and doc.get('content'):
+                        parts.append(f"Document {index + 1} ({doc.get('filename', 'unknown')}):\n{doc['content']}\n\n")
+                    else:
+                        parts.append(f"Document {index + 1} ({doc.get('filename', 'unknown')}): [Content extraction failed]\n\n")
+            else:
+                # Fallback: just mention document count if no parsed content available
+                parts.append(f"User has uploaded {len(documents)} document(s) for reference.\n\n")
 
-            prompt += templatesContent
+        # TEMPLATE EXAMPLES: Provide example templates for consistency
+        parts.append(_HTML_TEMPLATE_EXAMPLES)
 
-            # Add theme-specific styling guidance
-            theme_guidance = ""
-            if theme.lower() == "professional":
-                theme_guidance = """
-THEME-SPECIFIC GUIDANCE (Professional):
-- Use clean, corporate style with blue/gray color schemes
-- Prefer structured layouts with clear hierarchy
-- Use conservative fonts and spacing
-- Include subtle gradients and shadows
-- Maintain business-appropriate color palette
-"""
-            elif theme.lower() == "creative":
-                theme_guidance = """
-THEME-SPECIFIC GUIDANCE (Creative):
-- Use vibrant colors with artistic gradients and patterns
-- Embrace bold typography and creative layouts
-- Include dynamic visual elements
-- Use energetic color combinations
-- Allow for more expressive design choices
-"""
-            elif theme.lower() == "minimal":
-                theme_guidance = """
-THEME-SPECIFIC GUIDANCE (Minimal):
-- Clean, simple design with lots of white space
-- Use minimal color palette (primarily black, white, gray)
-- Focus on typography and spacing
-- Avoid unnecessary decorative elements
-- Emphasize content over visual flourishes
-"""
-            elif theme.lower() == "modern":
-                theme_guidance = """
-THEME-SPECIFIC GUIDANCE (Modern):
-- Contemporary design with bold typography
-- Use current design trends and techniques
-- Include geometric shapes and clean lines
-- Use modern color schemes and gradients
-- Emphasize sleek, cutting-edge appearance
-"""
-            
-            if theme_guidance:
-                prompt += theme_guidance
+        # Add theme-specific styling guidance
+        theme_guidance = _HTML_THEME_GUIDANCE.get(theme.lower())
+        if theme_guidance:
+            parts.append(theme_guidance)
 
-            # SLIDE GENERATION REQUIREMENTS: Complete the prompt with detailed requirements and style guidelines
-            # This section emphasizes accessibility, readability, and professional appearance
-            # Key focus areas: CSS scoping, accessibility compliance, and embeddable HTML output
-            prompt += f"""REQUIREMENTS:
+        # SLIDE GENERATION REQUIREMENTS: Complete the prompt with detailed requirements and style guidelines
+        # This section emphasizes accessibility, readability, and professional appearance
+        # Key focus areas: CSS scoping, accessibility compliance, and embeddable HTML output
+        parts.append(f"""REQUIREMENTS:
 1. Create a complete HTML slide that looks professional and presentation-ready
 2. Use modern CSS styling with the {theme} theme
 3. Incorporate the research data naturally into the slide content
@@ -873,134 +1714,21 @@ ALTERNATIVE STRUCTURE (Option 2 - Container div):
     .slide-container p {{ color: #333333; font-size: 1.1rem; line-height: 1.6; }}
   </style>
   <!-- Your slide content here -->
-</div>"""
-
-ASPECT RATIO REQUIREMENTS:
-// ============================================================================
-// 16:9 ASPECT RATIO OPTIMIZATION: Critical design constraints for slide display
-// ============================================================================
-// The generated slide must work perfectly within a 16:9 aspect ratio container
-// This ensures consistency between web preview and PowerPoint export formats
-- Design the slide content to work optimally in a 16:9 aspect ratio container
-- This matches standard PowerPoint slide dimensions (1920x1080, 1280x720, etc.)
-- Content should be well-proportioned and not cramped when displayed in this format
-- Use appropriate font sizes and spacing that work well in the 16:9 format
-- Consider that the slide will be viewed at various sizes but always maintain 16:9 proportions
-
-OUTPUT FORMAT:
-Return a complete, self-contained HTML slide that can be embedded safely. You can choose either:
-1. A complete HTML document with scoped CSS in the <head> (recommended for complex layouts)
-2. A single container div with inline <style> tag containing scoped CSS (simpler embedding)
-
-CRITICAL CSS SCOPING REQUIREMENTS:
-- ALL CSS must be scoped to prevent affecting the parent page
-- If using a complete HTML document, scope all styles to a main container class
-- If using a div container, scope all styles to that container class
-- NEVER use global selectors like body, html, *, or unscoped element selectors
-- Example: Use ".slide-container h1" instead of just "h1"
-- Example: Use ".slide-container .title" instead of just ".title"
-
-STYLE GUIDELINES:
-- Use professional fonts (Arial, Helvetica, or similar)
-- CRITICAL: Ensure high contrast text - use dark text (#333333 or darker) on light backgrounds, never light grey text
-- Main headings should be #1a1a1a or #000000 for maximum readability
-- Body text should be #333333 minimum, never lighter than #555555
-- Background colors should provide strong contrast with text
-- Include appropriate margins, padding, and spacing optimized for 16:9 viewing
-- Use bullet points, headings, and visual hierarchy effectively
-- Incorporate any statistics or data points from the research prominently
-- Make the layout clean and uncluttered, suitable for 16:9 presentation format
-- Test color combinations for WCAG accessibility standards
-
-PREFERRED STRUCTURE (Option 1 - Complete HTML):
-<!DOCTYPE html>
-<html>
-<head>
-<style>
-.slide-main {{ 
-  width: 100%; 
-  height: 100%; 
-  background: white; 
-  padding: 40px; 
-  box-sizing: border-box; 
-  font-family: Arial, sans-serif;
-  display: flex;                    /* Enable flexbox layout for vertical centering */
-  flex-direction: column;           /* Stack content vertically */
-  justify-content: center;          /* Center content vertically in 16:9 container */
-}}
-.slide-main h1 {{ color: #1a1a1a; font-size: 2.5rem; margin-bottom: 1rem; }}
-.slide-main p {{ color: #333333; font-size: 1.1rem; line-height: 1.6; }}
-</style>
-</head>
-<body>
-<div class="slide-main">
-  <!-- Your slide content here -->
-</div>
-</body>
-</html>
-
-ALTERNATIVE STRUCTURE (Option 2 - Container div):
-<div class="slide-container" style="width: 100%; height: 100%; background: white; padding: 40px; box-sizing: border-box; font-family: Arial, sans-serif; display: flex; flex-direction: column; justify-content: center;">
-  <style>
-    .slide-container h1 {{ color: #1a1a1a; font-size: 2.5rem; margin-bottom: 1rem; }}
-    .slide-container p {{ color: #333333; font-size: 1.1rem; line-height: 1.6; }}
-  </style>
-  <!-- Your slide content here -->
-</div>"""
-
-            # Make API call to OpenAI GPT for slide generation
-            # Using specific model, temperature, and token limits for optimal results
-            completion = self.client.chat.completions.create(
-                model=model,
-                max_tokens=2000,  # Sufficient tokens for complete HTML slide generation
-                temperature=0.7,  # Balanced creativity while maintaining consistency
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert presentation designer who creates professional, visually appealing PowerPoint slides with excellent accessibility and readability. You NEVER use light grey text on light backgrounds and always ensure high contrast ratios. You ALWAYS create complete, working HTML slides that render properly when embedded. You ALWAYS scope ALL CSS to prevent affecting parent page styles. You specialize in incorporating research data and creating clean, modern slide layouts with proper typography contrast. You return valid HTML that displays immediately without errors."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
-            )
-
-            # Extract the generated slide HTML content from OpenAI response
-            slide_html = completion.choices[0].message.content
-
-            # Validate that content was actually generated
-            if not slide_html:
-                raise Exception('No slide content generated')
-
-            # Clean up the response by extracting HTML from markdown code blocks
-            # OpenAI sometimes wraps HTML in markdown formatting that needs removal
-            if '```html' in slide_html:
-                # Extract content from HTML-specific code blocks
-                import re
-                html_match = re.search(r'```html\n([\s\S]*?)\n```', slide_html)
-                if html_match:
-                    slide_html = html_match.group(1)
-            elif '```' in slide_html:
-                # Extract content from generic code blocks
-                import re
-                code_match = re.search(r'```[a-zA-Z]*\n([\s\S]*?)\n```', slide_html)
-                if code_match:
-                    slide_html = code_match.group(1)
-
-            # RESPONSE VALIDATION: Debug logging to monitor OpenAI output quality and format
-            # These logs help troubleshoot issues with slide generation and ensure we receive valid HTML
-            logger.info(f'Generated slide HTML length: {len(slide_html)}')
-            logger.info(f'Generated slide HTML preview: {slide_html[:200]}...')
-
-            # CONTENT VALIDATION: Verify that OpenAI returned actual HTML markup
-            # Check for common HTML elements to ensure the response contains valid slide content
-            # This helps catch cases where OpenAI might return plain text or malformed responses
-            if not ('<div' in slide_html or '<html' in slide_html):
-                logger.warning('Warning: Generated content may not be valid HTML')
+</div>""")
+
+        return [
+            {
+                "role": "system",
+                "content": _HTML_SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": "".join(parts)
+            }
+        ]
 
-            return slide_html.strip()  # Remove any leading/trailing whitespace
 
-        except Exception as e:
-            logger.error(f"Error generating slide HTML: {e}")
-            raise Exception(f"Failed to generate slide: {str(e)}") 
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_llm_service() -> LLMService:
+    """LLMService shared by the routers and services instead of one per request"""
+    return LLMService()
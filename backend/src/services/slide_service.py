@@ -25,14 +25,31 @@ import re
 
 from src.models.message_models import FileInfo, SlideData, ProcessingResult, ProcessingStatus
 from src.services.file_service import FileService
-from src.services.llm_service import LLMService
+from src.services.llm_service import get_llm_service
 from src.services.ppt_service import PPTService
 from src.services.ai_service import AIService
 from src.services.research_service import ResearchService
 from src.services.theme_service import ThemeService
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logging.warning("orjson not available. Slide HTML prompts will be serialized with the standard json module.")
+
 logger = logging.getLogger(__name__)
 
+# Optional ```html opening and ``` closing fences around an AI-generated slide
+_HTML_RESPONSE_FENCE_RE = re.compile(r"(?:```html)?(.*?)(?:```)?", re.DOTALL)
+
+
+def _format_prompt_json(data: Any) -> str:
+    """Render layout or content data as JSON indented by two spaces for the HTML prompt"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode("utf-8")
+    return json.dumps(data, indent=2)
+
 
 class SlideService:
     """
@@ -48,7 +65,7 @@ class SlideService:
     def __init__(self):
         # Initialize all service dependencies
         self.file_service = FileService()
-        self.llm_service = LLMService()
+        self.llm_service = get_llm_service()
         self.ppt_service = PPTService()
         self.ai_service = AIService()
         self.research_service = ResearchService()
@@ -579,41 +596,28 @@ class SlideService:
                 else:
                     combined_content += f"--- Content ---\n{str(content)}\n\n"
 
-            # AI layout generation
+            # AI layout and content generation
             if status_callback:
                 logger.info(
-                    f"Calling status callback: Generating slide layout with AI... (50%)")
-                await status_callback("Generating slide layout with AI...", 50)
-            logger.info("Generating slide layout using LLM...")
+                    f"Calling status callback: Generating slide layout and content with AI... (50%)")
+                await status_callback("Generating slide layout and content with AI...", 50)
+            logger.info("Generating slide layout and content using LLM...")
 
             # Get theme information for consistent styling
             theme_info = None
             if client_id:
                 theme_info = await self.get_theme_selection(client_id)
 
-            # Generate structured layout using AI
-            layout = await self.llm_service.generate_slide_layout(
+            # Generate the structured layout and the content for each of its sections in one call
+            slide = await self.llm_service.generate_slide(
                 combined_content,
                 description,
                 theme,
                 has_images,
                 theme_info
             )
-
-            # AI content generation
-            if status_callback:
-                logger.info(
-                    f"Calling status callback: Creating slide content with AI... (60%)")
-                await status_callback("Creating slide content with AI...", 60)
-            logger.info("Generating slide content using LLM...")
-            
-            # Generate detailed content for each layout section
-            content = await self.llm_service.generate_slide_content(
-                combined_content,
-                description,
-                layout,
-                theme_info
-            )
+            layout = slide["layout"]
+            content = slide["content"]
 
             # PowerPoint file generation
             if status_callback:
@@ -787,10 +791,10 @@ Return only the complete HTML code with embedded CSS, no explanations or markdow
             user_prompt = f"""SLIDE DESIGN SPECIFICATIONS:
 
 LAYOUT STRUCTURE:
-{json.dumps(layout, indent=2)}
+{_format_prompt_json(layout)}
 
 CONTENT DATA:
-{json.dumps(content, indent=2)}
+{_format_prompt_json(content)}
 
 DESIGN PARAMETERS:
 - Theme: {theme}
@@ -819,7 +823,7 @@ CONTENT FORMATTING REQUIREMENTS:
 Generate a complete, production-ready HTML slide that transforms this layout and content into a beautiful, professional presentation."""
 
             # Generate HTML using AI
-            response = self.llm_service.client.chat.completions.create(
+            html_content = await self.llm_service.generate_chat_completion(
                 model="gpt-4o",
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -828,8 +832,7 @@ Generate a complete, production-ready HTML slide that transforms this layout and
                 max_tokens=4000,
                 temperature=0.8
             )
-
-            html_content = response.choices[0].message.content.strip()
+            html_content = html_content.strip()
 
             # Log response for debugging
             logger.info(
@@ -837,10 +840,7 @@ Generate a complete, production-ready HTML slide that transforms this layout and
             logger.info(f"HTML content size: {len(html_content)} characters")
 
             # Clean up AI response to extract pure HTML
-            if html_content.startswith("```html"):
-                html_content = html_content[7:]
-            if html_content.endswith("```"):
-                html_content = html_content[:-3]
+            html_content = _HTML_RESPONSE_FENCE_RE.fullmatch(html_content).group(1)
 
             # Validate and sanitize HTML for frontend security
             if len(html_content) > 50000:  # 50KB limit for performance
@@ -1299,21 +1299,16 @@ Generate a complete, production-ready HTML slide that transforms this layout and
                 else:
                     combined_content += f"--- Content ---\n{str(content)}\n\n"
 
-            # Generate slide structure using AI
-            logger.info("Generating slide layout using LLM...")
-            layout = await self.llm_service.generate_slide_layout(
+            # Generate slide structure and content using AI
+            logger.info("Generating slide layout and content using LLM...")
+            slide = await self.llm_service.generate_slide(
                 combined_content,
                 description,
                 theme,
                 has_images
             )
-
-            logger.info("Generating slide content using LLM...")
-            content = await self.llm_service.generate_slide_content(
-                combined_content,
-                description,
-                layout
-            )
+            layout = slide["layout"]
+            content = slide["content"]
 
             # Create file path with timestamp and safe filename
             from datetime import datetime
@@ -0,0 +1,600 @@
+"""
+Tests for KnowledgeGraphService graph data merging and summaries
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+from pathlib import Path
+
+import networkx as nx
+import numpy as np
+import pytest
+from sklearn.metrics.pairwise import cosine_similarity
+
+from src.services import llm_service as llm_service_module
+from src.services.knowledge_graph_service import KnowledgeGraphService, _EmbeddingCache, _get_embedding_cache
+from src.services.llm_service import _CircuitBreaker
+
+
+def build_large_chunk_data(chunk_count: int = 10, entities_per_chunk: int = 50) -> list:
+    """Build synthetic chunk extraction data with entities, relationships and facts"""
+    large_chunk_data = []
+
+    for chunk_idx in range(chunk_count):
+        chunk_entities = []
+        chunk_relationships = []
+        chunk_facts = []
+
+        for entity_idx in range(entities_per_chunk):
+            entity_name = f"Entity_{chunk_idx}_{entity_idx}"
+
+            chunk_entities.append({
+                "id": f"entity_{chunk_idx}_{entity_idx}",
+                "name": entity_name,
+                "type": f"type_{entity_idx % 5}",
+                "description": f"Description for {entity_name}"
+            })
+
+            # Chain each entity to the previous one in the chunk
+            if entity_idx > 0:
+                chunk_relationships.append({
+                    "source": entity_name,
+                    "target": f"Entity_{chunk_idx}_{entity_idx-1}",
+                    "type": "related_to"
+                })
+
+            chunk_facts.append({"text": f"Fact about {entity_name}"})
+
+        large_chunk_data.append({
+            "entities": chunk_entities,
+            "relationships": chunk_relationships,
+            "facts": chunk_facts,
+            "metadata": {
+                "chunk_index": chunk_idx,
+                "filename": f"chunk_{chunk_idx}.txt",
+                "file_path": f"/path/to/chunk_{chunk_idx}.txt",
+                "chunk_content": f"Content of chunk {chunk_idx}",
+                "extraction_timestamp": "2024-01-01T10:00:00"
+            }
+        })
+
+    return large_chunk_data
+
+
+@pytest.fixture
+def kg_service(tmp_path, monkeypatch):
+    """Knowledge graph service writing its output directories under a temp dir"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    return KnowledgeGraphService("test-client")
+
+
+@pytest.fixture
+def large_chunk_data():
+    return build_large_chunk_data()
+
+
+class TestMergeGraphData:
+    def test_merge_counts(self, kg_service, large_chunk_data):
+        """Every distinct entity, relationship and fact survives the merge"""
+        merged = kg_service._merge_graph_data_with_weights(large_chunk_data)
+
+        assert merged["total_entities"] == 500
+        assert merged["total_relationships"] == 490
+        assert merged["total_facts"] == 500
+        assert merged["metadata"]["chunk_count"] == 10
+
+    def test_duplicate_entities_are_merged(self, kg_service):
+        """The same entity name across chunks becomes one entity with merged metadata"""
+        chunk_data = build_large_chunk_data(chunk_count=1, entities_per_chunk=3)
+        repeated = build_large_chunk_data(chunk_count=1, entities_per_chunk=3)
+        repeated[0]["metadata"]["chunk_index"] = 1
+
+        merged = kg_service._merge_graph_data_with_weights(chunk_data + repeated)
+
+        assert merged["total_entities"] == 3
+        assert merged["entities"][0]["chunks"] == [0, 1]
+        assert merged["entities"][0]["frequency"] == 2
+
+
+class TestClusteredDataSummary:
+    def test_summary_distributions(self, kg_service, large_chunk_data):
+        merged = kg_service._merge_graph_data_with_weights(large_chunk_data)
+
+        summary = kg_service.get_clustered_data_summary(merged)
+
+        assert summary["total_entities"] == 500
+        assert summary["total_connections"] == 490
+        assert summary["total_facts"] == 500
+        assert summary["entity_type_distribution"] == {f"type_{i}": 100 for i in range(5)}
+        assert summary["connection_type_distribution"] == {"related_to": 490}
+
+    def test_most_connected_entities(self, kg_service, large_chunk_data):
+        merged = kg_service._merge_graph_data_with_weights(large_chunk_data)
+
+        most_connected = kg_service.get_clustered_data_summary(merged)["most_connected_entities"]
+
+        assert len(most_connected) == 10
+        assert all(entity["connections"] == 2 for entity in most_connected)
+
+
+class TestNetworkxGraphGeneration:
+    def test_facts_connect_to_mentioned_entities(self, kg_service):
+        graph_data = {
+            "entities": [
+                {"id": "entity_0", "name": "Acme", "type": ["org"], "description": ["Cloud company"]},
+                {"id": "entity_1", "name": "Globex", "type": ["org"], "description": []}
+            ],
+            "relationships": [
+                {"source": "entity_0", "target": "entity_1", "type": "partners_with"}
+            ],
+            "facts": [
+                {"text": "ACME revenue grew 20%"},
+                {"text": "Nothing to see here"}
+            ]
+        }
+
+        graph = kg_service._generate_networkx_graph_from_graph_data(graph_data, "a.txt", "/p/a.txt")
+
+        mentions = [(source, target) for source, target, attrs in graph.edges(data=True)
+                    if attrs["edge_type"] == "fact_entity"]
+        assert mentions == [(f"fact_{hash('ACME revenue grew 20%')}", "entity_0")]
+        assert graph.edges["entity_0", "entity_1"]["relationship_type"] == "partners_with"
+        assert graph.nodes["entity_1"]["type"] == "org"
+
+
+class FakeEmbeddingsClient:
+    """Stands in for the async OpenAI client, embedding each text as a deterministic vector"""
+
+    def __init__(self, dimension: int = 8):
+        self.dimension = dimension
+        self.requests = []
+        self.embeddings = self
+
+    async def create(self, model, input):
+        self.requests.append(list(input))
+        data = [
+            SimpleNamespace(index=index, embedding=self.embed(text))
+            for index, text in enumerate(input)
+        ]
+        # The API does not promise to return embeddings in input order
+        return SimpleNamespace(data=data[::-1])
+
+    def embed(self, text: str) -> list:
+        rng = np.random.default_rng(sum(text.encode()))
+        return rng.standard_normal(self.dimension).tolist()
+
+
+@pytest.fixture
+def embedding_service(kg_service):
+    """Knowledge graph service with a small graph and a fake embeddings client"""
+    graph = nx.DiGraph()
+    for index in range(5):
+        graph.add_node(f"entity_{index}", node_type="entity", name=f"Entity {index}", description="An entity")
+    for index in range(4):
+        graph.add_edge(f"entity_{index}", f"entity_{index + 1}", edge_type="relationship", relationship_type="related_to")
+    kg_service.graph = graph
+    kg_service.async_openai_client = FakeEmbeddingsClient()
+    return kg_service
+
+
+class TestGraphEmbeddings:
+    def test_embeddings_are_batched(self, embedding_service, monkeypatch):
+        monkeypatch.setattr(KnowledgeGraphService, "_embedding_batch_size", 2)
+
+        result = asyncio.run(embedding_service.generate_graph_embeddings())
+
+        assert result["node_embeddings_count"] == 5
+        assert result["edge_embeddings_count"] == 4
+        # The four edges share one text, so it is only requested once
+        assert [len(batch) for batch in embedding_service.async_openai_client.requests] == [2, 2, 1, 1]
+
+    def test_embeddings_map_back_to_their_items(self, embedding_service):
+        asyncio.run(embedding_service.generate_graph_embeddings())
+
+        client = embedding_service.async_openai_client
+        node_attrs = embedding_service.graph.nodes["entity_3"]
+        edge_attrs = embedding_service.graph.edges["entity_1", "entity_2"]
+        np.testing.assert_allclose(
+            embedding_service.get_node_embedding("entity_3"),
+            client.embed(embedding_service._node_text("entity_3", node_attrs)),
+            rtol=1e-6
+        )
+        np.testing.assert_allclose(
+            embedding_service.get_edge_embedding("entity_1", "entity_2"),
+            client.embed(embedding_service._edge_text("entity_1", "entity_2", edge_attrs)),
+            rtol=1e-6
+        )
+
+    def test_cached_texts_are_not_requested_again(self, embedding_service):
+        asyncio.run(embedding_service.generate_graph_embeddings())
+        embedding_service.graph.add_node("entity_5", node_type="entity", name="Entity 5", description="An entity")
+
+        fresh_service = KnowledgeGraphService("test-client")
+        fresh_service.graph = embedding_service.graph
+        fresh_service.async_openai_client = FakeEmbeddingsClient()
+        result = asyncio.run(fresh_service.generate_graph_embeddings())
+
+        assert result["node_embeddings_count"] == 6
+        assert result["edge_embeddings_count"] == 4
+        assert fresh_service.async_openai_client.requests == [
+            [fresh_service._node_text("entity_5", fresh_service.graph.nodes["entity_5"])]
+        ]
+        np.testing.assert_array_equal(fresh_service._node_embed_matrix[:5], embedding_service._node_embed_matrix)
+
+    def test_services_share_one_cache_without_rereading_the_file(self, embedding_service, monkeypatch):
+        asyncio.run(embedding_service.generate_graph_embeddings())
+        loads = []
+        monkeypatch.setattr(np, "load", lambda *args, **kwargs: loads.append(args))
+
+        fresh_service = KnowledgeGraphService("other-client")
+        fresh_service.graph = embedding_service.graph
+        fresh_service.async_openai_client = FakeEmbeddingsClient()
+        result = asyncio.run(fresh_service.generate_graph_embeddings())
+
+        assert result["node_embeddings_count"] == 5
+        assert fresh_service.async_openai_client.requests == []
+        assert loads == []
+
+    def test_cache_file_keeps_entries_from_other_processes(self, embedding_service):
+        asyncio.run(embedding_service.generate_graph_embeddings())
+        cache_path = embedding_service._get_embedding_cache_path().resolve()
+        other_process_cache = _EmbeddingCache(cache_path)
+        other_process_cache.put_many({"other-digest": np.ones(8, dtype=np.float32)})
+        other_process_cache.save(max_entries=100)
+
+        embedding_service.graph.add_node("entity_5", node_type="entity", name="Entity 5", description="An entity")
+        asyncio.run(embedding_service.generate_graph_embeddings())
+
+        saved = _EmbeddingCache(cache_path)
+        saved.load(max_entries=100)
+        # Five nodes and one shared edge text, the other process's entry, then the new node
+        assert len(saved) == 8
+        assert saved.get_many(["other-digest"])
+        assert [path.name for path in cache_path.parent.iterdir() if "embedding_cache" in path.name] == [cache_path.name]
+
+    def test_cache_keeps_most_recent_entries(self, embedding_service):
+        embedding_service.settings = embedding_service.settings.model_copy(update={"EMBEDDING_CACHE_MAX_ENTRIES": 3})
+
+        asyncio.run(embedding_service.generate_graph_embeddings())
+
+        cache_path = embedding_service._get_embedding_cache_path().resolve()
+        saved = _EmbeddingCache(cache_path)
+        saved.load(max_entries=100)
+        assert len(saved) == 3
+        assert len(_get_embedding_cache(cache_path)) == 3
+
+    def test_embeddings_share_one_matrix(self, embedding_service):
+        asyncio.run(embedding_service.generate_graph_embeddings())
+
+        matrix = embedding_service._node_embed_matrix
+        assert matrix.shape == (5, 8)
+        assert matrix.dtype == np.float32
+        assert all(np.shares_memory(row, matrix) for row in embedding_service.node_embeddings.values())
+        assert embedding_service._edge_embed_matrix.shape == (4, 8)
+
+    def test_failed_batches_are_skipped(self, embedding_service, monkeypatch):
+        monkeypatch.setattr(KnowledgeGraphService, "_embedding_batch_size", 2)
+        create = embedding_service.async_openai_client.create
+
+        async def fail_second_request(model, input):
+            if len(embedding_service.async_openai_client.requests) == 1:
+                embedding_service.async_openai_client.requests.append(list(input))
+                raise RuntimeError("rate limited")
+            return await create(model, input)
+
+        monkeypatch.setattr(embedding_service.async_openai_client, "create", fail_second_request)
+
+        result = asyncio.run(embedding_service.generate_graph_embeddings())
+
+        assert result["node_embeddings_count"] == 3
+        assert embedding_service.get_node_embedding("entity_2") is None
+        assert embedding_service.get_node_embedding("entity_4") is not None
+
+    def test_embeddings_fail_fast_while_breaker_is_open(self, embedding_service, monkeypatch):
+        breaker = _CircuitBreaker(fail_max=1, reset_timeout=30)
+        breaker.record_failure()
+        monkeypatch.setattr(llm_service_module, "_openai_breaker", breaker)
+
+        result = asyncio.run(embedding_service.generate_graph_embeddings())
+
+        assert result["node_embeddings_count"] == 0
+        assert embedding_service.async_openai_client.requests == []
+
+    def test_service_uses_the_shared_openai_client(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        monkeypatch.setattr(llm_service_module, "_openai_clients", {})
+
+        service = KnowledgeGraphService("test-client")
+
+        assert service.async_openai_client is llm_service_module._get_client("sk-test")
+        assert KnowledgeGraphService("other-client").async_openai_client is service.async_openai_client
+
+    def test_similar_nodes_match_pairwise_cosine(self, embedding_service):
+        asyncio.run(embedding_service.generate_graph_embeddings())
+
+        similar = embedding_service.get_similar_nodes("entity_0", top_k=3)
+
+        others = [node for node in embedding_service.node_embeddings if node != "entity_0"]
+        expected = sorted(
+            ((node, float(cosine_similarity([embedding_service.node_embeddings["entity_0"]],
+                                            [embedding_service.node_embeddings[node]])[0][0]))
+             for node in others),
+            key=lambda pair: pair[1], reverse=True
+        )[:3]
+        assert [node for node, _ in similar] == [node for node, _ in expected]
+        np.testing.assert_allclose([score for _, score in similar], [score for _, score in expected], rtol=1e-5)
+
+    def test_node_similarities_match_pairwise_cosine(self, embedding_service):
+        asyncio.run(embedding_service.generate_graph_embeddings())
+        query = np.arange(1, 9, dtype=np.float32)
+
+        similarities = embedding_service.get_node_similarities(query)
+
+        nodes = list(embedding_service.node_embeddings)
+        expected = cosine_similarity([query], [embedding_service.node_embeddings[node] for node in nodes])[0]
+        assert list(similarities) == nodes
+        np.testing.assert_allclose([similarities[node] for node in nodes], expected, rtol=1e-5)
+        assert set(embedding_service.get_node_similarities(np.zeros(8)).values()) == {0.0}
+
+    def test_similar_edges_exclude_query_edge(self, embedding_service):
+        asyncio.run(embedding_service.generate_graph_embeddings())
+
+        similar = embedding_service.get_similar_edges("entity_0", "entity_1", top_k=10)
+
+        assert len(similar) == 3
+        assert ("entity_0", "entity_1") not in [edge for edge, _ in similar]
+
+    def test_merge_embeddings_with_graph_flags_items(self, embedding_service):
+        asyncio.run(embedding_service.generate_graph_embeddings())
+        graph = embedding_service.graph.copy()
+        graph.add_edge("entity_4", "entity_5")
+
+        merged = embedding_service.merge_embeddings_with_graph(graph)
+
+        assert merged.nodes["entity_0"]["has_embedding"] is True
+        assert merged.nodes["entity_0"]["embedding_dimension"] == 8
+        assert merged.nodes["entity_5"]["has_embedding"] is False
+        assert merged.edges["entity_0", "entity_1"]["embedding_dimension"] == 8
+        assert merged.edges["entity_4", "entity_5"]["has_embedding"] is False
+        assert "has_embedding" not in graph.nodes["entity_0"]
+
+    def test_embedding_statistics(self, embedding_service):
+        asyncio.run(embedding_service.generate_graph_embeddings())
+        embedding_service.graph.add_node("entity_5")
+
+        stats = embedding_service.get_embedding_statistics()
+
+        assert stats["total_nodes_in_graph"] == 6
+        assert stats["total_edges_in_graph"] == 4
+        assert stats["embedding_coverage"] == {"nodes": "83.3%", "edges": "100.0%"}
+        assert stats["embedding_dimension"] == 8
+
+    def test_merge_embeddings_in_place(self, embedding_service):
+        asyncio.run(embedding_service.generate_graph_embeddings())
+        graph = embedding_service.graph
+
+        merged = embedding_service.merge_embeddings_with_graph(graph, inplace=True)
+
+        assert merged is graph
+        assert graph.nodes["entity_0"]["has_embedding"] is True
+
+
+def build_file_graph(filename: str, chunks: list) -> nx.DiGraph:
+    """Build a small per-file graph whose node and edge ids collide with other files"""
+    graph = nx.DiGraph()
+    for node in ("entity_0", "entity_1"):
+        graph.add_node(node, node_type="entity", filename=filename, file_path=f"/p/{filename}",
+                       chunks=list(chunks), frequency=1)
+    graph.add_edge("entity_0", "entity_1", edge_type="relationship", filename=filename,
+                   file_path=f"/p/{filename}", chunks=list(chunks), weight=1.0)
+    return graph
+
+
+class TestSimpleUnion:
+    def test_duplicate_nodes_and_edges_are_merged(self, kg_service):
+        graphs = [build_file_graph("b.txt", [1]), build_file_graph("a.txt", [0, 1]), build_file_graph("a.txt", [2])]
+
+        union = kg_service._simple_union_graphs(graphs)
+
+        node = union.nodes["entity_0"]
+        assert node["filename"] == "a.txt ||| b.txt"
+        assert node["file_path"] == "/p/a.txt ||| /p/b.txt"
+        assert node["chunks"] == [0, 1, 2]
+        assert node["frequency"] == 3
+        assert node["merge_count"] == 3
+        edge = union.edges["entity_0", "entity_1"]
+        assert edge["filename"] == "a.txt ||| b.txt"
+        assert edge["chunks"] == [0, 1, 2]
+        assert edge["merge_count"] == 3
+
+    def test_repeated_source_only_updates_counters(self, kg_service):
+        graphs = [build_file_graph("a.txt", [0, 1]), build_file_graph("a.txt", [1])]
+
+        union = kg_service._simple_union_graphs(graphs)
+
+        node = union.nodes["entity_0"]
+        assert node["chunks"] == [0, 1]
+        assert node["filename"] == "a.txt"
+        assert node["frequency"] == 2
+        assert node["merge_count"] == 2
+        assert union.edges["entity_0", "entity_1"]["merge_count"] == 2
+
+    def test_repeated_source_normalizes_first_copy_chunks(self, kg_service):
+        graphs = [build_file_graph("a.txt", [1, 0, 1]), build_file_graph("a.txt", [0])]
+
+        union = kg_service._simple_union_graphs(graphs)
+
+        assert union.nodes["entity_0"]["chunks"] == [0, 1]
+        assert union.edges["entity_0", "entity_1"]["chunks"] == [0, 1]
+
+
+class TestGraphStatistics:
+    def test_statistics_from_merged_graph(self, kg_service):
+        kg_service.graph = kg_service._simple_union_graphs([build_file_graph("a.txt", [0]), build_file_graph("b.txt", [1])])
+
+        stats = kg_service.get_graph_statistics()
+
+        assert stats["node_types"] == {"entity": 2}
+        assert stats["edge_types"] == {"relationship": 1}
+        assert stats["clustering"]["merged_nodes"] == 2
+        assert stats["clustering"]["merged_edges"] == 1
+        assert stats["entities"] == {"count": 2, "average_frequency": 2.0, "types": {"unknown": 2}, "source_files": 2}
+        assert stats["relationships"] == {"count": 1, "average_weight": 1.0, "types": {"unknown": 1}, "source_files": 2}
+
+
+class TestEmbeddingPersistence:
+    def test_embeddings_round_trip_through_disk(self, embedding_service):
+        asyncio.run(embedding_service.generate_graph_embeddings())
+        path = asyncio.run(embedding_service.save_embeddings())
+
+        loaded = KnowledgeGraphService("test-client")
+        assert path.endswith(".npz")
+        assert loaded.embeddings_exist()
+        assert asyncio.run(loaded.load_embeddings())
+        np.testing.assert_array_equal(loaded._node_embed_matrix, embedding_service._node_embed_matrix)
+        assert loaded._node_ids == embedding_service._node_ids
+        assert loaded._edge_keys == embedding_service._edge_keys
+
+    def test_unchanged_embeddings_file_is_not_reread(self, embedding_service, monkeypatch):
+        asyncio.run(embedding_service.generate_graph_embeddings())
+        path = Path(asyncio.run(embedding_service.save_embeddings()))
+        loaded = KnowledgeGraphService("test-client")
+        assert asyncio.run(loaded.load_embeddings())
+
+        reads = []
+        original_read = KnowledgeGraphService._read_embeddings_file
+        monkeypatch.setattr(KnowledgeGraphService, "_read_embeddings_file",
+                            lambda self, *args: reads.append(args) or original_read(self, *args))
+        assert asyncio.run(embedding_service.load_embeddings())
+        assert asyncio.run(loaded.load_embeddings())
+        assert reads == []
+
+        loaded.clear_embeddings()
+        assert asyncio.run(loaded.load_embeddings())
+        assert reads == [(path,)]
+        assert len(loaded.node_embeddings) == 5
+
+    def test_quantized_embeddings_round_trip(self, embedding_service):
+        asyncio.run(embedding_service.generate_graph_embeddings())
+        embedding_service.settings = embedding_service.settings.model_copy(update={"EMBEDDINGS_QUANTIZATION": True})
+
+        path = asyncio.run(embedding_service.save_embeddings())
+
+        with np.load(path) as data:
+            assert data["node_matrix"].dtype == np.int8
+        loaded = KnowledgeGraphService("test-client")
+        assert asyncio.run(loaded.load_embeddings())
+        original = embedding_service._node_embed_matrix
+        row_steps = np.abs(original).max(axis=1, keepdims=True) / 127
+        assert loaded._node_embed_matrix.dtype == np.float32
+        assert np.all(np.abs(loaded._node_embed_matrix - original) <= row_steps / 2 + 1e-6)
+
+    @pytest.mark.parametrize("streamed", [True, False])
+    def test_legacy_json_embeddings_still_load(self, kg_service, tmp_path, monkeypatch, streamed):
+        monkeypatch.setattr("src.services.knowledge_graph_service.IJSON_AVAILABLE", streamed)
+        legacy_path = tmp_path / "kg" / "test-client" / "embeddings" / "embeddings_test-client.json"
+        legacy_path.parent.mkdir(parents=True)
+        legacy_path.write_text(json.dumps({
+            "node_embeddings": {"entity_0": [1.0, 0.0], "entity_1": [0.0, 1.0]},
+            "edge_embeddings": {"entity_0__entity_1": [0.5, 0.5]}
+        }))
+
+        assert asyncio.run(kg_service.load_embeddings())
+        np.testing.assert_array_equal(kg_service.get_node_embedding("entity_1"), [0.0, 1.0])
+        np.testing.assert_array_equal(kg_service.get_edge_embedding("entity_0", "entity_1"), [0.5, 0.5])
+
+
+class TestGraphPersistence:
+    def test_file_graphs_reload_with_their_graph_data(self, kg_service):
+        for filename in ("a.txt", "b.txt"):
+            kg_service._save_graph(build_file_graph(filename, [0]), kg_service._get_graph_file_path(filename))
+            asyncio.run(kg_service._save_graph_data_to_json(filename, {"facts": [], "source": filename}))
+
+        reloaded = KnowledgeGraphService("test-client")
+        asyncio.run(reloaded._load_existing_file_graphs())
+
+        assert sorted(reloaded.file_graphs) == ["a.txt", "b.txt"]
+        assert set(reloaded.file_graphs["a.txt"].nodes) == {"entity_0", "entity_1"}
+        assert reloaded.file_graphs["b.txt"].nodes["entity_0"]["filename"] == "b.txt"
+        assert reloaded.file_graph_data["b.txt"] == {"facts": [], "source": "b.txt"}
+
+    def test_clustered_graph_round_trip(self, kg_service):
+        kg_service.graph = build_file_graph("a.txt", [0, 1])
+        asyncio.run(kg_service._save_clustered_graph())
+
+        reloaded = KnowledgeGraphService("test-client")
+        assert reloaded.clustered_graph_exists()
+        assert asyncio.run(reloaded.load_existing_clustered_graph())
+        assert dict(reloaded.graph.nodes(data=True)) == dict(kg_service.graph.nodes(data=True))
+        assert reloaded.graph.edges["entity_0", "entity_1"]["chunks"] == [0, 1]
+
+    def test_legacy_gml_clustered_graph_loads(self, kg_service):
+        gml_path = kg_service._get_clustered_graph_path(".gml")
+        gml_path.parent.mkdir(parents=True, exist_ok=True)
+        nx.write_gml(build_file_graph("a.txt", [0, 1]), str(gml_path))
+
+        assert kg_service.clustered_graph_exists()
+        assert asyncio.run(kg_service.load_existing_clustered_graph())
+        assert set(kg_service.graph.nodes) == {"entity_0", "entity_1"}
+
+    def test_gml_export_round_trip(self, kg_service):
+        kg_service.graph = build_file_graph("a.txt", [0, 1])
+
+        gml_path = Path(kg_service.export_clustered_graph_to_gml())
+
+        assert gml_path.name.endswith(kg_service._gml_file_suffix)
+        exported = kg_service._read_graph_file(gml_path)
+        assert dict(exported.nodes(data=True)) == dict(kg_service.graph.nodes(data=True))
+        assert exported.edges["entity_0", "entity_1"]["chunks"] == [0, 1]
+
+
+class TestProcessingCompleteness:
+    def test_missing_and_extra_files(self, kg_service):
+        kg_service.file_graphs = {"a.txt": nx.DiGraph(), "c.txt": nx.DiGraph()}
+        uploaded = [SimpleNamespace(filename="a.txt"), SimpleNamespace(filename="b.txt")]
+
+        status = kg_service.get_processing_completeness_status(uploaded)
+
+        assert status["missing_files"] == ["b.txt"]
+        assert status["extra_files"] == ["c.txt"]
+        assert status["is_complete"] is False
+
+    def test_all_files_processed(self, kg_service):
+        kg_service.file_graphs = {"a.txt": nx.DiGraph()}
+
+        status = kg_service.get_processing_completeness_status([SimpleNamespace(filename="a.txt")])
+
+        assert status["missing_files"] == []
+        assert status["extra_files"] == []
+        assert status["is_complete"] is True
+        assert status["completion_percentage"] == 100
+
+
+class TestChunkContent:
+    def test_first_non_blank_content_wins(self, kg_service):
+        kg_service.file_graph_data = {
+            "a.txt": {
+                "entities": [
+                    {"name": "Acme", "chunks": [0, 1], "chunk_content": ["  ", "Acme chunk one"]},
+                    {"name": "Globex", "chunks": [0], "chunk_content": [" Globex chunk zero "]}
+                ],
+                "facts": [{"chunks": [2], "chunk_content": ["Fact chunk two"]}]
+            }
+        }
+
+        assert kg_service.get_chunk_content(0) == "Globex chunk zero"
+        assert kg_service.get_chunk_content(2) == "Fact chunk two"
+        assert kg_service.get_chunk_content(2, filename="b.txt") == ""
+        assert kg_service.get_chunk_content_by_entity("ACME", 1) == "Acme chunk one"
+        assert kg_service.get_chunk_content_by_entity("acme", 0) == ""
+
+    def test_replaced_graph_data_is_reindexed(self, kg_service):
+        kg_service.file_graph_data["a.txt"] = {"facts": [{"chunks": [0], "chunk_content": ["old"]}]}
+        assert kg_service.get_chunk_content(0) == "old"
+
+        kg_service.file_graph_data["a.txt"] = {"facts": [{"chunks": [0], "chunk_content": ["new"]}]}
+
+        assert kg_service.get_chunk_content(0) == "new"
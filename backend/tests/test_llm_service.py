@@ -0,0 +1,565 @@
+"""
+Tests for LLMService slide generation with a fake chat completions client
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import numpy as np
+import openai
+import pytest
+from pydantic import ValidationError
+
+from src.services import llm_service as llm_service_module
+from src.services.llm_service import LLMService, _CircuitBreaker, _IncrementalJsonParser, _SemanticIndex, _TokenBucket
+from src.services.slide_service import SlideService
+
+
+LAYOUT = {
+    "layout_type": "content_slide",
+    "title": "Quarterly Results",
+    "sections": [
+        {"type": "text", "content": "Summary"},
+        {"type": "bullet_list", "content": "Highlights"},
+    ],
+}
+
+
+class FakeChatClient:
+    """Stands in for the async OpenAI client, replying to every completion with a fixed message"""
+
+    def __init__(self, reply: str, fragment_size: int = 7):
+        self.reply = reply
+        self.fragment_size = fragment_size
+        self.requests = []
+        self.chat = SimpleNamespace(completions=self)
+        self.embeddings = SimpleNamespace(create=self.embed)
+
+    async def create(self, **kwargs):
+        self.requests.append(kwargs)
+        if kwargs.get("stream"):
+            return self.stream()
+        message = SimpleNamespace(content=self.reply)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    async def embed(self, model, input):
+        # Letter counts, so near-identical texts get near-identical embeddings
+        letters = input.lower()
+        embedding = [float(letters.count(letter)) for letter in "abcdefghijklmnopqrstuvwxyz"]
+        return SimpleNamespace(data=[SimpleNamespace(embedding=embedding)])
+
+    async def stream(self):
+        for start in range(0, len(self.reply), self.fragment_size):
+            delta = SimpleNamespace(content=self.reply[start:start + self.fragment_size])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+        usage = SimpleNamespace(prompt_tokens=1200, prompt_tokens_details=SimpleNamespace(cached_tokens=1024))
+        yield SimpleNamespace(choices=[], usage=usage)
+
+
+@pytest.fixture
+def llm_service(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setattr(llm_service_module, "_slide_response_cache", OrderedDict())
+    monkeypatch.setattr(llm_service_module, "_slide_response_index", _SemanticIndex(max_size=128))
+    monkeypatch.setattr(llm_service_module, "_openai_breaker", _CircuitBreaker(fail_max=2, reset_timeout=30))
+    return LLMService()
+
+
+def override_settings(service, monkeypatch, **overrides):
+    monkeypatch.setattr(service, "settings", service.settings.model_copy(update=overrides))
+
+
+class TestGenerateSlide:
+    def test_layout_and_content_come_from_one_call(self, llm_service):
+        content = {"section_0": {"content": "Revenue grew 12%"}, "section_1": {"content": "• New markets"}}
+        llm_service.client = FakeChatClient(json.dumps({"layout": LAYOUT, "content": content}))
+
+        slide = asyncio.run(llm_service.generate_slide("Revenue grew 12% this quarter", "Quarterly results"))
+
+        assert slide == {"layout": LAYOUT, "content": content}
+        assert len(llm_service.client.requests) == 1
+        assert llm_service.client.requests[0]["response_format"] == {"type": "json_object"}
+
+    def test_invalid_content_keeps_generated_layout(self, llm_service):
+        llm_service.client = FakeChatClient(json.dumps({"layout": LAYOUT, "content": {}}))
+
+        slide = asyncio.run(llm_service.generate_slide("Revenue grew 12% this quarter", "Quarterly results"))
+
+        assert slide["layout"] == LAYOUT
+        assert set(slide["content"]) == {"section_0", "section_1"}
+
+    def test_mistyped_sections_are_rejected(self, llm_service):
+        bad_layout = {**LAYOUT, "sections": [{"type": "text", "position": {"x": "5", "y": 25}}]}
+        bad_content = {"section_0": {"content": ["Revenue grew 12%", "New markets"]}}
+        llm_service.client = FakeChatClient(json.dumps({"layout": LAYOUT, "content": bad_content}))
+
+        slide = asyncio.run(llm_service.generate_slide("Revenue grew 12% this quarter", "Quarterly results"))
+        llm_service.client = FakeChatClient(json.dumps(bad_layout))
+        layout = asyncio.run(llm_service.generate_slide_layout("Revenue grew 12% this quarter", "Quarterly results"))
+
+        assert slide["layout"] == LAYOUT
+        assert slide["content"]["section_0"]["content"] == "Revenue grew 12% this quarter"
+        assert layout["title"] == "Quarterly Results"
+        assert layout["sections"] != bad_layout["sections"]
+
+    def test_unparseable_response_falls_back(self, llm_service):
+        llm_service.client = FakeChatClient("not json")
+
+        slide = asyncio.run(llm_service.generate_slide("Revenue grew 12% this quarter", "Quarterly results"))
+
+        assert slide["layout"]["title"] == "Quarterly Results"
+        assert set(slide["content"]) == {"section_0"}
+
+
+class TestJsonMode:
+    def test_layout_and_content_calls_request_json_objects(self, llm_service):
+        layout_client = llm_service.client = FakeChatClient(json.dumps(LAYOUT))
+        layout = asyncio.run(llm_service.generate_slide_layout("Revenue grew 12%", "Quarterly results"))
+
+        content_client = llm_service.client = FakeChatClient(json.dumps({"section_0": {"content": "Revenue grew 12%"}}))
+        content = asyncio.run(llm_service.generate_slide_content("Revenue grew 12%", "Quarterly results", layout))
+
+        assert layout == LAYOUT
+        assert content == {"section_0": {"content": "Revenue grew 12%"}}
+        for client in (layout_client, content_client):
+            assert client.requests[0]["response_format"] == {"type": "json_object"}
+
+    def test_graph_extraction_uses_a_strict_schema_unless_disabled(self, llm_service, monkeypatch):
+        extraction = {"entities": [{"id": "e1", "name": "Acme Corp", "type": "organization", "description": "Employer"}],
+                      "relationships": [], "facts": []}
+        llm_service.client = FakeChatClient(json.dumps(extraction))
+        result = asyncio.run(llm_service.extract_knowledge_graph_from_chunk("Acme Corp hired 40 engineers.", 0, "a.txt", "/a.txt"))
+        override_settings(llm_service, monkeypatch, ENABLE_STRUCTURED_OUTPUTS=False)
+        asyncio.run(llm_service.extract_knowledge_graph_from_chunk("Acme Corp hired 40 engineers.", 0, "a.txt", "/a.txt"))
+
+        strict, plain = (request["response_format"] for request in llm_service.client.requests)
+        assert strict["type"] == "json_schema" and strict["json_schema"]["strict"]
+        assert strict["json_schema"]["schema"]["required"] == ["entities", "relationships", "facts"]
+        assert plain == {"type": "json_object"}
+        assert result["entities"] == extraction["entities"]
+
+    def test_layout_and_content_use_their_configured_models(self, llm_service, monkeypatch):
+        override_settings(llm_service, monkeypatch, LAYOUT_MODEL="layout-model", CONTENT_MODEL="content-model")
+        layout_client = llm_service.client = FakeChatClient(json.dumps(LAYOUT))
+        asyncio.run(llm_service.generate_slide_layout("Revenue grew 12%", "Quarterly results"))
+
+        content_client = llm_service.client = FakeChatClient(json.dumps({"section_0": {"content": "Revenue grew 12%"}}))
+        asyncio.run(llm_service.generate_slide_content("Revenue grew 12%", "Quarterly results", LAYOUT))
+
+        assert layout_client.requests[0]["model"] == "layout-model"
+        assert content_client.requests[0]["model"] == "content-model"
+
+    def test_extraction_and_generic_content_use_their_configured_models(self, llm_service, monkeypatch):
+        override_settings(llm_service, monkeypatch, KG_MODEL="kg-model", GENERAL_MODEL="general-model")
+        llm_service.client = FakeChatClient(json.dumps({"entities": [], "relationships": [], "facts": []}))
+
+        asyncio.run(llm_service.extract_knowledge_graph_from_chunk("Acme Corp hired 40 engineers.", 0, "a.txt", "/a.txt"))
+        asyncio.run(llm_service.generate_content("Summarize the quarter"))
+        asyncio.run(llm_service.generate_content("Summarize the quarter", system_prompt="You are an analyst."))
+
+        assert [request["model"] for request in llm_service.client.requests] == ["kg-model", "general-model", "gpt-4o"]
+
+
+class TestSlideResponseCache:
+    def test_repeated_request_is_served_from_cache(self, llm_service, monkeypatch):
+        override_settings(llm_service, monkeypatch, ENABLE_LLM_CACHE=True)
+        content = {"section_0": {"content": "Revenue grew 12%"}}
+        llm_service.client = FakeChatClient(json.dumps({"layout": LAYOUT, "content": content}))
+
+        first = asyncio.run(llm_service.generate_slide("Revenue grew 12%", "Quarterly results"))
+        first["layout"]["title"] = "Edited by the caller"
+        second = asyncio.run(llm_service.generate_slide("Revenue grew 12%", "Quarterly results"))
+        asyncio.run(llm_service.generate_slide("Revenue grew 12%", "Annual results"))
+
+        assert second == {"layout": LAYOUT, "content": content}
+        assert len(llm_service.client.requests) == 2
+
+    def test_concurrent_identical_requests_share_one_call(self, llm_service, monkeypatch):
+        override_settings(llm_service, monkeypatch, ENABLE_LLM_CACHE=True)
+        content = {"section_0": {"content": "Revenue grew 12%"}}
+        llm_service.client = FakeChatClient(json.dumps({"layout": LAYOUT, "content": content}))
+
+        async def generate_twice():
+            return await asyncio.gather(*(
+                llm_service.generate_slide("Revenue grew 12%", "Quarterly results") for _ in range(2)
+            ))
+
+        first, second = asyncio.run(generate_twice())
+
+        assert first == second == {"layout": LAYOUT, "content": content}
+        assert first is not second
+        assert len(llm_service.client.requests) == 1
+        assert not llm_service_module._slide_requests_in_flight
+
+    def test_disabled_cache_always_calls_the_model(self, llm_service, monkeypatch):
+        override_settings(llm_service, monkeypatch, ENABLE_LLM_CACHE=False)
+        llm_service.client = FakeChatClient(json.dumps(LAYOUT))
+
+        for _ in range(2):
+            asyncio.run(llm_service.generate_slide_layout("Revenue grew 12%", "Quarterly results"))
+
+        assert len(llm_service.client.requests) == 2
+
+
+class TestSemanticResponseCache:
+    def test_similar_request_reuses_the_cached_response(self, llm_service, monkeypatch):
+        override_settings(llm_service, monkeypatch, ENABLE_LLM_CACHE=True, ENABLE_SEMANTIC_LLM_CACHE=True)
+        content = {"section_0": {"content": "Revenue grew 12%"}}
+        llm_service.client = FakeChatClient(json.dumps({"layout": LAYOUT, "content": content}))
+
+        asyncio.run(llm_service.generate_slide("Revenue grew 12%", "Quarterly results"))
+        similar = asyncio.run(llm_service.generate_slide("Revenue grew 12 %", "Quarterly results!"))
+        asyncio.run(llm_service.generate_slide("Revenue grew 12 %", "Quarterly results!", theme="dark"))
+        asyncio.run(llm_service.generate_slide("Headcount is flat", "Hiring plans"))
+
+        assert similar == {"layout": LAYOUT, "content": content}
+        assert len(llm_service.client.requests) == 3
+
+    def test_index_matches_only_within_a_scope(self):
+        index = _SemanticIndex(max_size=2)
+        index.add("layout", "a", np.array([1.0, 0.0]))
+        index.add("layout", "b", np.array([0.0, 2.0]))
+
+        assert index.find("layout", np.array([0.1, 1.0]), threshold=0.95) == "b"
+        assert index.find("layout", np.array([1.0, 1.0]), threshold=0.95) is None
+        assert index.find("content", np.array([0.0, 1.0]), threshold=0.95) is None
+
+        index.add("layout", "c", np.array([1.0, 1.0]))
+        assert index.find("layout", np.array([1.0, 0.0]), threshold=0.95) is None
+
+
+class TestPromptPrefix:
+    def test_system_prompt_is_identical_across_themes(self, llm_service):
+        llm_service.client = FakeChatClient(json.dumps(LAYOUT))
+        theme_info = {"theme_name": "Ocean", "theme_description": "Calm blues", "color_palette": ["#003366"]}
+
+        asyncio.run(llm_service.generate_slide_layout("Revenue grew 12%", "Quarterly results", "ocean", False, theme_info))
+        asyncio.run(llm_service.generate_slide_layout("Revenue grew 12%", "Quarterly results"))
+
+        themed, plain = (request["messages"] for request in llm_service.client.requests)
+        assert themed[0] == plain[0]
+        assert [message["role"] for message in themed] == ["system", "system", "user"]
+        assert themed[1]["content"].startswith("THEME INFORMATION:")
+
+    def test_knowledge_graph_prompt_puts_the_chunk_after_the_static_prefix(self, llm_service):
+        llm_service.client = FakeChatClient(json.dumps({"entities": [], "relationships": [], "facts": []}))
+
+        for i, chunk in enumerate(["Acme Corp hired 40 engineers.", "Revenue grew 12%."]):
+            asyncio.run(llm_service.extract_knowledge_graph_from_chunk(chunk, i, "report.txt", "/tmp/report.txt"))
+
+        first, second = (request["messages"] for request in llm_service.client.requests)
+        assert first[0] == second[0]
+        assert "Acme Corp" in first[1]["content"] and "Acme Corp" not in first[0]["content"]
+
+
+class TestIncrementalJsonParser:
+    def test_partial_documents_hold_only_completed_values(self):
+        parser = _IncrementalJsonParser()
+        text = '{"title": "Q3, \\"final\\" [draft]", "sections": [{"type": "text"}, {"type": "chart"}], "color_scheme": "modern"}'
+
+        partials = [partial for partial in map(parser.feed, text) if partial is not None]
+
+        assert partials[0] == {"title": 'Q3, "final" [draft]'}
+        assert {"title": 'Q3, "final" [draft]', "sections": [{"type": "text"}]} in partials
+        assert partials[-1] == json.loads(text)
+        assert parser.text == text
+
+    def test_large_layout_is_parsed_once_per_section(self, monkeypatch):
+        parse_json = llm_service_module._parse_json
+        parses = []
+
+        def counting_parse_json(text):
+            parses.append(len(text))
+            return parse_json(text)
+
+        monkeypatch.setattr(llm_service_module, "_parse_json", counting_parse_json)
+        layout = dict(LAYOUT, sections=[
+            {"type": "chart", "position": {"x": index, "y": 0}, "content": {"items": ["a", "b", "c"], "label": f"Series {index}"}}
+            for index in range(200)
+        ])
+        text = json.dumps(layout, indent=2)
+        parser = _IncrementalJsonParser()
+
+        partials = [parser.feed(text[start:start + 3]) for start in range(0, len(text), 3)]
+
+        # Each top-level value and each section completes once; nested commas never trigger a parse
+        assert len(parses) <= len(layout) + len(layout["sections"])
+        assert [partial for partial in partials if partial is not None][-1] == layout
+        assert parser.text == text
+
+
+class TestLayoutStreaming:
+    def test_stream_yields_growing_layouts_then_the_final_one(self, llm_service):
+        llm_service.client = FakeChatClient(json.dumps(LAYOUT))
+
+        async def collect():
+            return [layout async for layout in llm_service.generate_slide_layout_stream("Revenue grew 12%", "Quarterly results")]
+
+        layouts = asyncio.run(collect())
+
+        assert layouts[-1] == LAYOUT
+        assert {"layout_type": "content_slide", "title": "Quarterly Results"} in layouts
+        section_counts = [len(layout.get("sections", [])) for layout in layouts]
+        assert section_counts == sorted(section_counts)
+        assert llm_service.client.requests[0]["stream"] is True
+
+
+class WordTokenizer:
+    """Stands in for tiktoken, treating every space-separated word as one token"""
+
+    def encode(self, text, disallowed_special=()):
+        return text.split(" ")
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+
+class TestPromptContentTruncation:
+    @pytest.fixture(autouse=True)
+    def clear_truncation_cache(self):
+        llm_service_module._truncate_prompt_content.cache_clear()
+        yield
+        llm_service_module._truncate_prompt_content.cache_clear()
+
+    def test_content_is_cut_to_the_token_budget(self, monkeypatch):
+        monkeypatch.setattr(llm_service_module, "_get_tokenizer", lambda: WordTokenizer())
+        words = [f"word{index}" for index in range(1000)]
+
+        truncated = llm_service_module._truncate_prompt_content(" ".join(words), 750)
+
+        assert truncated == " ".join(words[:750]) + "..."
+        assert llm_service_module._truncate_prompt_content("short content", 750) == "short content"
+
+    def test_characters_are_used_without_a_tokenizer(self, monkeypatch):
+        monkeypatch.setattr(llm_service_module, "_get_tokenizer", lambda: None)
+
+        assert llm_service_module._truncate_prompt_content("x" * 3001, 750) == "x" * 3000 + "..."
+        assert llm_service_module._truncate_prompt_content("x" * 3000, 750) == "x" * 3000
+
+    def test_prompt_budget_comes_from_settings(self, llm_service, monkeypatch):
+        monkeypatch.setattr(llm_service_module, "_get_tokenizer", lambda: WordTokenizer())
+        override_settings(llm_service, monkeypatch, PROMPT_CONTENT_TOKENS=3)
+        llm_service.client = FakeChatClient(json.dumps(LAYOUT))
+
+        asyncio.run(llm_service.generate_slide_layout("Revenue grew 12% in Q3", "Quarterly results"))
+
+        assert "Revenue grew 12%...\n" in llm_service.client.requests[0]["messages"][-1]["content"]
+
+
+class TestJsonFallback:
+    def test_responses_parse_without_orjson(self, llm_service, monkeypatch):
+        monkeypatch.setattr(llm_service_module, "ORJSON_AVAILABLE", False)
+        llm_service.client = FakeChatClient(json.dumps({"section_0": {"content": "Revenue grew 12%"}}))
+
+        content = asyncio.run(llm_service.generate_slide_content("Revenue grew 12%", "Quarterly results", LAYOUT))
+
+        assert content == {"section_0": {"content": "Revenue grew 12%"}}
+        assert json.dumps(LAYOUT, indent=2) in llm_service.client.requests[0]["messages"][-1]["content"]
+
+
+class FailingChatClient(FakeChatClient):
+    """Chat client whose completions fail as if OpenAI were unreachable"""
+
+    def __init__(self):
+        super().__init__("")
+
+    async def create(self, **kwargs):
+        self.requests.append(kwargs)
+        raise openai.APIConnectionError(request=None)
+
+
+class RecordingBucket:
+    """Stands in for a token bucket, recording what each call acquires"""
+
+    def __init__(self):
+        self.acquired = []
+
+    async def acquire(self, amount=1):
+        self.acquired.append(amount)
+
+
+class TestRateLimiting:
+    def test_bucket_spaces_calls_beyond_the_burst(self):
+        bucket = _TokenBucket(rate=2, period=0.1)
+
+        async def acquire_three():
+            start = time.monotonic()
+            for _ in range(3):
+                await bucket.acquire()
+            return time.monotonic() - start
+
+        assert asyncio.run(acquire_three()) >= 0.04
+
+    def test_requests_acquire_their_prompt_and_completion_tokens(self, llm_service, monkeypatch):
+        request_bucket, token_bucket = RecordingBucket(), RecordingBucket()
+        monkeypatch.setattr(llm_service_module, "_get_rate_limiters", lambda rpm, tpm: (request_bucket, token_bucket))
+        monkeypatch.setattr(llm_service_module, "_get_tokenizer", lambda: WordTokenizer())
+        llm_service.client = FakeChatClient("Revenue grew 12%")
+
+        asyncio.run(llm_service.generate_content("Summarize the quarter", max_tokens=400, system_prompt="You are an analyst."))
+
+        assert request_bucket.acquired == [1]
+        assert token_bucket.acquired == [len("You are an analyst.Summarize the quarter".split(" ")) + 400]
+
+    def test_slide_service_html_call_is_rate_limited(self, llm_service, monkeypatch):
+        request_bucket, token_bucket = RecordingBucket(), RecordingBucket()
+        monkeypatch.setattr(llm_service_module, "_get_rate_limiters", lambda rpm, tpm: (request_bucket, token_bucket))
+        llm_service.client = FakeChatClient('<div class="slide"><h1>Quarterly Results</h1></div>')
+        slide_service = SlideService()
+        slide_service.llm_service = llm_service
+
+        html = asyncio.run(slide_service._generate_html_with_llm(LAYOUT, {"section_0": {"content": "Revenue grew 12%"}}, "default", False))
+
+        assert "Quarterly Results" in html
+        assert request_bucket.acquired == [1]
+        assert token_bucket.acquired[0] > 4000
+        assert llm_service.client.requests[0]["max_tokens"] == 4000
+
+    def test_semantic_cache_embedding_is_rate_limited_and_guarded(self, llm_service, monkeypatch):
+        override_settings(llm_service, monkeypatch, ENABLE_LLM_CACHE=True, ENABLE_SEMANTIC_LLM_CACHE=True)
+        request_bucket, token_bucket = RecordingBucket(), RecordingBucket()
+        monkeypatch.setattr(llm_service_module, "_get_rate_limiters", lambda rpm, tpm: (request_bucket, token_bucket))
+        llm_service.client = FakeChatClient(json.dumps({"layout": LAYOUT, "content": {"section_0": {"content": "Revenue grew 12%"}}}))
+
+        asyncio.run(llm_service.generate_slide("Revenue grew 12%", "Quarterly results"))
+        assert request_bucket.acquired == [1, 1]
+
+        monkeypatch.setattr(llm_service_module, "_openai_breaker", _CircuitBreaker(fail_max=1, reset_timeout=30))
+        llm_service_module._openai_breaker.record_failure()
+        cached, embedding = asyncio.run(llm_service._find_cached_slide_response("other-key", "scope", "Headcount is flat", "Hiring"))
+        assert cached is None and embedding is None
+        assert request_bucket.acquired == [1, 1]
+
+    def test_limits_default_to_unlimited(self, llm_service):
+        assert llm_service_module._get_rate_limiters(llm_service.settings.OPENAI_RPM, llm_service.settings.OPENAI_TPM) == (None, None)
+
+
+class TestCircuitBreaker:
+    def test_open_breaker_falls_back_without_calling_openai(self, llm_service):
+        llm_service.client = FailingChatClient()
+
+        layouts = [asyncio.run(llm_service.generate_slide_layout("Revenue grew 12%", "Quarterly results")) for _ in range(3)]
+
+        assert all(layout["layout_type"] == "content_slide" for layout in layouts)
+        assert len(llm_service.client.requests) == 2
+
+    def test_trial_call_after_timeout_closes_breaker(self, llm_service, monkeypatch):
+        breaker = llm_service_module._openai_breaker
+        for _ in range(breaker.fail_max):
+            breaker.record_failure()
+        assert not breaker.allow()
+
+        monkeypatch.setattr(breaker, "_opened_at", breaker._opened_at - breaker.reset_timeout)
+        llm_service.client = FakeChatClient(json.dumps(LAYOUT))
+        layout = asyncio.run(llm_service.generate_slide_layout("Revenue grew 12%", "Quarterly results"))
+
+        assert layout == LAYOUT
+        assert breaker.allow()
+
+
+class TestFallbackGraphExtraction:
+    def test_capitalized_words_become_entities(self, llm_service):
+        data = llm_service._generate_fallback_knowledge_graph_data("Acme Corp. hired 40 engineers in Q3 at\tOslo", 2, "a.txt", "/a.txt")
+
+        assert [entity["name"] for entity in data["entities"]] == ["Acme", "Corp.", "Oslo"]
+        assert [entity["id"] for entity in data["entities"]] == ["entity_2_0", "entity_2_5", "entity_2_39"]
+
+
+class StallingChatClient(FakeChatClient):
+    """Streams the first fragment of its reply, then stops sending chunks"""
+
+    async def stream(self):
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=self.reply[:5]))], usage=None)
+        await asyncio.sleep(60)
+
+
+class TestStreamedText:
+    def test_slide_html_streams_and_is_assembled_without_fences(self, llm_service):
+        html = '<div class="slide-main"><h1>Quarterly Results</h1></div>'
+        llm_service.client = FakeChatClient(f"```html\n{html}\n```")
+
+        async def collect_stream():
+            return [text async for text in llm_service.generate_slide_html_stream("Quarterly results")]
+
+        fragments = asyncio.run(collect_stream())
+        assembled = asyncio.run(llm_service.generate_slide_html("Quarterly results"))
+
+        assert len(fragments) > 1 and "".join(fragments) == f"```html\n{html}\n```"
+        assert assembled == html
+        assert all(request["stream"] for request in llm_service.client.requests)
+
+    def test_stalled_generation_is_abandoned(self, llm_service, monkeypatch):
+        monkeypatch.setattr(llm_service_module, "_STREAM_STALL_TIMEOUT", 0.01)
+        llm_service.client = StallingChatClient("Revenue grew 12% in the third quarter")
+
+        assert asyncio.run(llm_service.generate_content("Summarize the quarter")) == ""
+        with pytest.raises(Exception, match="Failed to generate slide"):
+            asyncio.run(llm_service.generate_slide_html("Quarterly results"))
+
+
+class TestChunkExtraction:
+    def test_concurrency_is_bounded_and_order_kept(self, llm_service, monkeypatch):
+        override_settings(llm_service, monkeypatch, OPENAI_MAX_CONCURRENCY=3)
+        running = peak = 0
+
+        async def extract(content, chunk_index, filename, file_path):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0)
+            running -= 1
+            if chunk_index == 4:
+                raise RuntimeError("extraction failed")
+            return {"metadata": {"chunk_index": chunk_index}}
+
+        monkeypatch.setattr(llm_service, "extract_knowledge_graph_from_chunk", extract)
+        chunks = [f"Chunk {i} mentions Acme Corp." for i in range(10)]
+        results = asyncio.run(llm_service.extract_knowledge_graph_from_chunks(chunks, "report.txt", "/tmp/report.txt"))
+
+        assert peak == 3
+        assert [result["metadata"]["chunk_index"] for result in results] == list(range(10))
+        assert results[4]["metadata"]["chunk_content"] == chunks[4]
+
+
+class TestSharedSettings:
+    def test_instances_share_frozen_settings(self, llm_service):
+        assert LLMService().settings is llm_service.settings
+        with pytest.raises(ValidationError):
+            llm_service.settings.ENABLE_LLM_CACHE = True
+
+
+class TestSharedClient:
+    def test_client_is_shared_until_closed(self, monkeypatch):
+        monkeypatch.setattr(llm_service_module, "_openai_clients", {})
+        client = llm_service_module._get_client("test-key")
+        assert llm_service_module._get_client("test-key") is client
+
+        asyncio.run(llm_service_module.close_openai_clients())
+
+        assert client.is_closed()
+        assert not llm_service_module._openai_clients
+
+    def test_services_and_routers_share_one_llm_service(self):
+        assert llm_service_module.get_llm_service() is llm_service_module.get_llm_service()
+
+
+class TestInFlightSharing:
+    def test_concurrent_layout_and_content_requests_share_calls(self, llm_service, monkeypatch):
+        override_settings(llm_service, monkeypatch, ENABLE_LLM_CACHE=True)
+        content = {"section_0": {"content": "Revenue grew 12%"}}
+
+        async def generate_concurrently(method, *args):
+            return await asyncio.gather(*(method("Revenue grew 12%", "Quarterly results", *args) for _ in range(3)))
+
+        llm_service.client = FakeChatClient(json.dumps(LAYOUT))
+        layouts = asyncio.run(generate_concurrently(llm_service.generate_slide_layout))
+        layout_requests = len(llm_service.client.requests)
+        llm_service.client = FakeChatClient(json.dumps(content))
+        contents = asyncio.run(generate_concurrently(llm_service.generate_slide_content, LAYOUT))
+
+        assert layouts == [LAYOUT] * 3
+        assert contents == [content] * 3
+        assert layout_requests == len(llm_service.client.requests) == 1